@@ -0,0 +1,169 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Cached bank account balances.
+
+compute_account_balance rebuilds the bank-side balance from GL Entry and the
+uncleared vouchers. Its result is cached per bank account and date, tagged
+with the GL version of the bank account's GL account: a Redis counter bumped
+by the GL Entry insert and delete hooks. While the version matches, a cached
+balance is returned without touching the database.
+
+GL Entries changed behind the hooks (raw SQL reposts, deleted company
+transactions) are caught by a probe of the count and latest modified of the
+account's GL Entries, read from the abr_account_modified index. A cached
+balance is probed at most once every PROBE_INTERVAL seconds.
+
+Clearance dates move the balance without touching GL Entry. Bank Transaction
+hooks and apply_clearance_changes drop the cached balances through
+invalidate_account_balances. Clearance dates set elsewhere, e.g. by ERPNext's
+Bank Clearance tool, are only caught by the probe, which also reads the
+latest modified of the vouchers posting to the account; such a change can
+be served stale for up to PROBE_INTERVAL seconds. Cached balances expire
+BALANCE_CACHE_TTL seconds after they were last computed.
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, flt, getdate
+
+BALANCE_CACHE_PREFIX = "abr:account_balance:"
+GL_VERSION_KEY = "abr:gl_version"
+PROBE_INTERVAL = 300
+BALANCE_CACHE_TTL = 24 * 60 * 60
+
+
+def get_cached_account_balance(bank_account, till_date):
+	"""compute_account_balance(bank_account, till_date), served from the
+	cache while the GL version of the bank account's GL account holds."""
+	from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+		compute_account_balance,
+	)
+
+	gl_account = frappe.get_cached_value("Bank Account", bank_account, "account")
+	if not gl_account:
+		return 0.0
+
+	cache = frappe.cache()
+	key = _cache_key(bank_account)
+	field = str(getdate(till_date))
+	version = get_gl_version(gl_account)
+	checked_at = time.time()
+
+	cached = cache.hget(key, field)
+	if cached and cached.get("version") == version:
+		if checked_at - cached["checked_at"] < PROBE_INTERVAL:
+			return cached["balance"]
+
+		if cached.get("probe") == probe_gl_entries(gl_account):
+			cache.hset(key, field, {**cached, "checked_at": checked_at})
+			return cached["balance"]
+
+	probe = probe_gl_entries(gl_account)
+	balance = flt(compute_account_balance(bank_account, till_date))
+	cache.hset(
+		key,
+		field,
+		{"version": version, "probe": probe, "checked_at": checked_at, "balance": balance},
+	)
+	cache.execute_command("EXPIRE", cache.make_key(key), BALANCE_CACHE_TTL)
+	return balance
+
+
+def get_gl_version(gl_account):
+	cache = frappe.cache()
+	return cint(cache.execute_command("HGET", cache.make_key(GL_VERSION_KEY), gl_account))
+
+
+def bump_gl_version(doc, method=None):
+	"""doc_events hook for GL Entry. Bumped again after commit, so a
+	balance cached from the old state by a concurrent request in the
+	meantime is not served."""
+	if not doc.account:
+		return
+
+	_bump_gl_versions({doc.account})
+	pending = frappe.flags.abr_gl_version_bumps
+	if pending is None:
+		pending = frappe.flags.abr_gl_version_bumps = set()
+		frappe.db.after_commit.add(_bump_pending_gl_versions)
+		frappe.db.after_rollback.add(_reset_pending_gl_versions)
+	pending.add(doc.account)
+
+
+def probe_gl_entries(gl_account):
+	"""Count and latest modified of the account's GL Entries, and the latest
+	modified of the submitted vouchers whose clearance date counts in its
+	balance."""
+	row = frappe.db.sql(
+		"""
+		SELECT
+			(SELECT COUNT(*) FROM `tabGL Entry` WHERE account = %(account)s),
+			(SELECT MAX(modified) FROM `tabGL Entry` WHERE account = %(account)s),
+			(
+				SELECT MAX(modified) FROM `tabPayment Entry`
+				WHERE docstatus = 1 AND (paid_from = %(account)s OR paid_to = %(account)s)
+			),
+			(
+				SELECT MAX(je.modified)
+				FROM `tabJournal Entry Account` jea
+				INNER JOIN `tabJournal Entry` je ON je.name = jea.parent
+				WHERE jea.account = %(account)s AND je.docstatus = 1
+			),
+			(
+				SELECT MAX(modified) FROM `tabSales Invoice Payment`
+				WHERE account = %(account)s AND docstatus = 1
+			),
+			(
+				SELECT MAX(modified) FROM `tabPurchase Invoice`
+				WHERE cash_bank_account = %(account)s AND docstatus = 1
+			)
+		""",
+		{"account": gl_account},
+	)[0]
+	return ":".join(str(value) for value in row)
+
+
+def invalidate_account_balances(bank_account=None):
+	"""Drop cached balances of one bank account, or of all of them. Dropped
+	again after commit, so a balance cached from the old state by a
+	concurrent request in the meantime does not survive."""
+	_drop_balances(bank_account)
+	frappe.db.after_commit.add(lambda: _drop_balances(bank_account))
+
+
+def _drop_balances(bank_account):
+	if bank_account:
+		frappe.cache().delete_value(_cache_key(bank_account))
+	else:
+		frappe.cache().delete_keys(BALANCE_CACHE_PREFIX)
+
+
+def invalidate_transaction_balances(doc, method=None):
+	"""doc_events hook for Bank Transaction: (un)reconciling a transaction
+	sets or resets clearance dates on its bank account."""
+	if doc.bank_account:
+		invalidate_account_balances(doc.bank_account)
+
+
+def _bump_gl_versions(gl_accounts):
+	cache = frappe.cache()
+	pipe = cache.pipeline()
+	for gl_account in gl_accounts:
+		pipe.hincrby(cache.make_key(GL_VERSION_KEY), gl_account, 1)
+	pipe.execute()
+
+
+def _bump_pending_gl_versions():
+	pending = frappe.flags.abr_gl_version_bumps
+	_reset_pending_gl_versions()
+	if pending:
+		_bump_gl_versions(pending)
+
+
+def _reset_pending_gl_versions():
+	frappe.flags.abr_gl_version_bumps = None
+
+
+def _cache_key(bank_account):
+	return f"{BALANCE_CACHE_PREFIX}{bank_account}"
@@ -0,0 +1,31 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Versions of the Bank Transaction change feed.
+
+get_transaction_changes sends the rows modified since the last row it
+delivered, overlapping a few seconds for transactions that commit a little
+after they saved. Writers that keep rows uncommitted for longer, such as bulk
+reconciliation jobs and statement imports, bump the bank account's change
+version once their rows are committed instead. A change token carrying an
+older version makes the client reload its listing.
+"""
+
+import frappe
+from frappe.utils import cint
+
+CHANGE_VERSION_KEY = "abr:transaction_change_version"
+
+
+def get_change_version(bank_account):
+	cache = frappe.cache()
+	return cint(cache.execute_command("HGET", cache.make_key(CHANGE_VERSION_KEY), bank_account))
+
+
+def bump_change_versions(bank_accounts):
+	"""Make change tokens issued so far for these bank accounts reset. Call it
+	once the writes are committed, or a client could reload before them."""
+	cache = frappe.cache()
+	pipe = cache.pipeline()
+	for bank_account in bank_accounts:
+		pipe.hincrby(cache.make_key(CHANGE_VERSION_KEY), bank_account, 1)
+	pipe.execute()
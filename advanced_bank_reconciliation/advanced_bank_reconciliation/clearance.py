@@ -0,0 +1,460 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Set-based clearance-date recomputation.
+
+recompute_clearance_dates works out the clearance_date every voucher
+reconciled against a bank account in a period should have, compares it with
+what is stored and writes only the differences.
+
+A voucher is cleared on the latest date of the submitted Bank Transactions
+allocating it on the bank account's GL account, once those allocations cover
+its bank-side amount (see should_clear_invoice for the coverage rule). A
+Payment Entry, Sales Invoice Payment or Purchase Invoice whose allocations do
+not cover it keeps whatever date it has, so a date set by hand (e.g. through
+ERPNext's Bank Clearance) on a partly allocated voucher survives. Journal
+Entries follow clear_journal_entry: every bank row that belongs to a
+reconciled Bank Account must be matched exactly, and entries posting twice to
+the same bank account are left alone.
+
+Vouchers are in scope when they are allocated to a submitted Bank Transaction
+of the bank account dated within the period (or, for
+recompute_clearance_for_transactions, to one of the given Bank
+Transactions); coverage is computed over all of their allocations, including
+those outside the scope.
+"""
+
+from collections import defaultdict
+
+import frappe
+from frappe import _
+from frappe.utils import create_batch, flt, getdate, now
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache import (
+	invalidate_account_balances,
+)
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+logger = get_logger()
+
+# Matches the default currency precision used by should_clear_invoice
+AMOUNT_PRECISION = 2
+UPDATE_BATCH_SIZE = 500
+
+BANK_GL_ACCOUNTS_CACHE_KEY = "abr_reconciled_bank_gl_accounts"
+
+CLEARANCE_TABLES = {
+	"Payment Entry": "tabPayment Entry",
+	"Journal Entry": "tabJournal Entry",
+	"Sales Invoice Payment": "tabSales Invoice Payment",
+	"Purchase Invoice": "tabPurchase Invoice",
+}
+
+# Vouchers of one payment_document allocated to the in-scope Bank Transactions
+_SCOPE_SQL = """
+	SELECT DISTINCT scope_btp.payment_entry
+	FROM `tabBank Transaction Payments` scope_btp
+	INNER JOIN `tabBank Transaction` scope_bt ON scope_bt.name = scope_btp.parent
+	WHERE scope_btp.payment_document = {doctype}
+		AND scope_bt.docstatus = 1
+		AND {condition}
+"""
+
+PERIOD_SCOPE = (
+	"scope_bt.bank_account = %(bank_account)s AND scope_bt.date BETWEEN %(from_date)s AND %(to_date)s"
+)
+TRANSACTION_SCOPE = "scope_bt.bank_account = %(bank_account)s AND scope_bt.name IN %(bank_transactions)s"
+
+# Cumulative allocation and latest clearing date per in-scope voucher
+_ALLOCATION_SQL = """
+	SELECT
+		btp.payment_entry AS name,
+		SUM(btp.allocated_amount) AS allocated,
+		MAX(bt.date) AS cleared_on
+	FROM `tabBank Transaction Payments` btp
+	INNER JOIN `tabBank Transaction` bt ON bt.name = btp.parent
+	INNER JOIN `tabBank Account` ba ON ba.name = bt.bank_account
+	WHERE btp.payment_document = {doctype}
+		AND bt.docstatus = 1
+		AND ba.account = %(gl_account)s
+		AND btp.payment_entry IN ({scope})
+	GROUP BY btp.payment_entry
+"""
+
+
+def recompute_clearance_dates(bank_account, from_date, to_date, dry_run=False):
+	"""Recompute clearance dates for vouchers reconciled against `bank_account`
+	between `from_date` and `to_date`.
+
+	Returns the diff: one row per voucher whose stored clearance_date is
+	wrong, with the stored and the expected value. Unless `dry_run`, the
+	differences are written with one UPDATE ... JOIN per table and batch.
+	"""
+	params = {"from_date": getdate(from_date), "to_date": getdate(to_date)}
+	changes = _collect_changes(bank_account, PERIOD_SCOPE, params)
+
+	if changes and not dry_run:
+		apply_clearance_changes(changes)
+
+	logger.info(
+		"Clearance recompute for %s %s..%s: %s changes%s",
+		bank_account,
+		from_date,
+		to_date,
+		len(changes),
+		" (dry run)" if dry_run else "",
+	)
+	return {
+		"bank_account": bank_account,
+		"from_date": str(params["from_date"]),
+		"to_date": str(params["to_date"]),
+		"dry_run": bool(dry_run),
+		"changes": changes,
+		"summary": _summarise(changes),
+	}
+
+
+def recompute_clearance_for_transactions(bank_transactions, dry_run=False):
+	"""Recompute clearance dates for the vouchers allocated to the given Bank
+	Transactions, with one set of queries per bank account. Returns the diff."""
+	by_bank_account = defaultdict(list)
+	for row in frappe.get_all(
+		"Bank Transaction",
+		filters={"name": ["in", list(bank_transactions)], "docstatus": 1},
+		fields=["name", "bank_account"],
+	):
+		by_bank_account[row.bank_account].append(row.name)
+
+	changes = []
+	for bank_account, names in by_bank_account.items():
+		changes.extend(_collect_changes(bank_account, TRANSACTION_SCOPE, {"bank_transactions": tuple(names)}))
+
+	if changes and not dry_run:
+		apply_clearance_changes(changes)
+	return changes
+
+
+def _collect_changes(bank_account, scope, params):
+	gl_account = frappe.db.get_value("Bank Account", bank_account, "account")
+	if not gl_account:
+		frappe.throw(_("Bank Account {0} is not linked to a GL account").format(bank_account))
+
+	params = {
+		**params,
+		"bank_account": bank_account,
+		"gl_account": gl_account,
+		"precision": AMOUNT_PRECISION,
+	}
+	return [
+		*_payment_entry_changes(params, scope),
+		*_sales_invoice_payment_changes(params, scope),
+		*_purchase_invoice_changes(params, scope),
+		*_journal_entry_changes(params, scope),
+	]
+
+
+def apply_clearance_changes(changes):
+	"""Write clearance dates from a recompute diff, one UPDATE per table and batch."""
+	by_doctype = defaultdict(list)
+	for change in changes:
+		by_doctype[change["doctype"]].append(change)
+
+	modified = now()
+	for doctype, rows in by_doctype.items():
+		table = CLEARANCE_TABLES[doctype]
+		for batch in create_batch(rows, UPDATE_BATCH_SIZE):
+			values = []
+			selects = []
+			for row in batch:
+				selects.append("SELECT %s AS name, %s AS clearance_date")
+				values.extend([row["name"], row["to"]])
+
+			frappe.db.sql(
+				f"""
+				UPDATE `{table}` target
+				INNER JOIN ({" UNION ALL ".join(selects)}) expected ON expected.name = target.name
+				SET target.clearance_date = expected.clearance_date,
+					target.modified = %s,
+					target.modified_by = %s
+				""",
+				(*values, modified, frappe.session.user),
+			)
+
+	# Clearance dates are part of the bank-side balance
+	for bank_account in _changed_bank_accounts(changes):
+		invalidate_account_balances(bank_account)
+
+
+def _changed_bank_accounts(changes):
+	"""Bank Accounts whose balances the changed vouchers count in: those of
+	the Bank Transactions allocating them, and any sharing their GL account."""
+	vouchers = defaultdict(set)
+	for change in changes:
+		if change["doctype"] == "Sales Invoice Payment":
+			vouchers["Sales Invoice"].add(change["parent"])
+		else:
+			vouchers[change["doctype"]].add(change["name"])
+
+	conditions = []
+	values = []
+	for payment_document, names in vouchers.items():
+		conditions.append("(btp.payment_document = %s AND btp.payment_entry IN %s)")
+		values.extend([payment_document, tuple(names)])
+
+	return frappe.db.sql_list(
+		f"""
+		SELECT DISTINCT shared.name
+		FROM `tabBank Transaction Payments` btp
+		INNER JOIN `tabBank Transaction` bt ON bt.name = btp.parent
+		INNER JOIN `tabBank Account` ba ON ba.name = bt.bank_account
+		INNER JOIN `tabBank Account` shared ON shared.account = ba.account
+		WHERE {" OR ".join(conditions)}
+		""",
+		values,
+	)
+
+
+def _payment_entry_changes(params, scope):
+	# The bank side of a Payment Entry is paid_to for money in, paid_from for money out
+	rows = frappe.db.sql(
+		f"""
+		SELECT name, current, expected
+		FROM (
+			SELECT
+				pe.name,
+				pe.clearance_date AS current,
+				IF(
+					ROUND(ABS(alloc.allocated), %(precision)s) >= ROUND(
+						IF(pe.paid_to = %(gl_account)s, pe.received_amount, pe.paid_amount), %(precision)s
+					),
+					alloc.cleared_on,
+					pe.clearance_date
+				) AS expected
+			FROM `tabPayment Entry` pe
+			INNER JOIN ({_allocation_sql("Payment Entry", scope)}) alloc ON alloc.name = pe.name
+			WHERE pe.docstatus = 1
+				AND (pe.paid_to = %(gl_account)s OR pe.paid_from = %(gl_account)s)
+		) evaluated
+		WHERE NOT (current <=> expected)
+		""",
+		params,
+		as_dict=True,
+	)
+	return [_change("Payment Entry", row) for row in rows]
+
+
+def _sales_invoice_payment_changes(params, scope):
+	rows = frappe.db.sql(
+		f"""
+		SELECT name, parent, current, expected
+		FROM (
+			SELECT
+				sip.name,
+				sip.parent,
+				sip.clearance_date AS current,
+				IF(
+					ROUND(ABS(alloc.allocated), %(precision)s) >= ROUND(ABS(sip.amount), %(precision)s),
+					alloc.cleared_on,
+					sip.clearance_date
+				) AS expected
+			FROM `tabSales Invoice Payment` sip
+			INNER JOIN `tabSales Invoice` si ON si.name = sip.parent
+			INNER JOIN ({_allocation_sql("Sales Invoice", scope)}) alloc ON alloc.name = sip.parent
+			WHERE si.docstatus = 1
+				AND sip.account = %(gl_account)s
+		) evaluated
+		WHERE NOT (current <=> expected)
+		""",
+		params,
+		as_dict=True,
+	)
+	return [_change("Sales Invoice Payment", row) for row in rows]
+
+
+def _purchase_invoice_changes(params, scope):
+	rows = frappe.db.sql(
+		f"""
+		SELECT name, current, expected
+		FROM (
+			SELECT
+				pi.name,
+				pi.clearance_date AS current,
+				IF(
+					ROUND(ABS(alloc.allocated), %(precision)s) >= ROUND(ABS(pi.paid_amount), %(precision)s),
+					alloc.cleared_on,
+					pi.clearance_date
+				) AS expected
+			FROM `tabPurchase Invoice` pi
+			INNER JOIN ({_allocation_sql("Purchase Invoice", scope)}) alloc ON alloc.name = pi.name
+			WHERE pi.docstatus = 1
+				AND pi.is_paid = 1
+		) evaluated
+		WHERE NOT (current <=> expected)
+		""",
+		params,
+		as_dict=True,
+	)
+	return [_change("Purchase Invoice", row) for row in rows]
+
+
+def _journal_entry_changes(params, scope):
+	names = frappe.db.sql_list(_SCOPE_SQL.format(doctype="'Journal Entry'", condition=scope), params)
+	return journal_entry_clearance_changes(names)
+
+
+def journal_entry_clearance_changes(journal_entries):
+	"""Diff of Journal Entry clearance dates for many entries at once.
+
+	Each batch costs two queries, one for the entries' account rows and one
+	for their Bank Transaction allocations; whether a row posts to a
+	reconciled bank account comes from get_reconciled_bank_gl_accounts.
+	"""
+	changes = []
+	for names in create_batch(list(dict.fromkeys(journal_entries)), UPDATE_BATCH_SIZE):
+		account_rows = frappe.db.sql(
+			"""
+			SELECT
+				jea.parent,
+				jea.account,
+				jea.debit_in_account_currency AS debit,
+				jea.credit_in_account_currency AS credit,
+				je.company,
+				je.clearance_date
+			FROM `tabJournal Entry Account` jea
+			INNER JOIN `tabJournal Entry` je ON je.name = jea.parent
+			WHERE je.docstatus = 1
+				AND jea.parent IN %(names)s
+			""",
+			{"names": names},
+			as_dict=True,
+		)
+
+		# Signed (deposit positive) allocation and latest date per entry and GL account
+		allocations = frappe.db.sql(
+			"""
+			SELECT
+				btp.payment_entry AS parent,
+				ba.account,
+				SUM(IF(bt.deposit > 0, btp.allocated_amount, -btp.allocated_amount)) AS allocated,
+				MAX(bt.date) AS cleared_on
+			FROM `tabBank Transaction Payments` btp
+			INNER JOIN `tabBank Transaction` bt ON bt.name = btp.parent
+			INNER JOIN `tabBank Account` ba ON ba.name = bt.bank_account
+			WHERE btp.payment_document = 'Journal Entry'
+				AND bt.docstatus = 1
+				AND btp.payment_entry IN %(names)s
+			GROUP BY btp.payment_entry, ba.account
+			""",
+			{"names": names},
+			as_dict=True,
+		)
+		allocated = {(row.parent, row.account): row for row in allocations}
+
+		bank_rows_by_entry = defaultdict(list)
+		for row in account_rows:
+			if row.account in get_reconciled_bank_gl_accounts(row.company):
+				bank_rows_by_entry[row.parent].append(row)
+
+		for name, bank_rows in bank_rows_by_entry.items():
+			expected = evaluate_journal_entry_clearance(bank_rows, allocated)
+			if expected is False:
+				continue
+			current = bank_rows[0].clearance_date
+			if (getdate(current) if current else None) != (getdate(expected) if expected else None):
+				changes.append(_change("Journal Entry", {"name": name, "current": current, "expected": expected}))
+	return changes
+
+
+def clear_journal_entries(journal_entries, dry_run=False):
+	"""Set or reset the clearance date of many Journal Entries. Returns the diff."""
+	changes = journal_entry_clearance_changes(journal_entries)
+	if changes and not dry_run:
+		apply_clearance_changes(changes)
+	return changes
+
+
+def get_reconciled_bank_gl_accounts(company):
+	"""GL accounts of type Bank that have a Bank Account in `company`.
+
+	Cached per company until a Bank Account or Account changes; see
+	clear_bank_gl_account_cache.
+	"""
+	return frappe.cache().hget(
+		BANK_GL_ACCOUNTS_CACHE_KEY,
+		company,
+		generator=lambda: frozenset(
+			frappe.db.sql_list(
+				"""
+				SELECT DISTINCT ba.account
+				FROM `tabBank Account` ba
+				INNER JOIN `tabAccount` acc ON acc.name = ba.account
+				WHERE ba.company = %(company)s
+					AND acc.account_type = 'Bank'
+				""",
+				{"company": company},
+			)
+		),
+	)
+
+
+def clear_bank_gl_account_cache(doc=None, method=None):
+	"""doc_events hook for Bank Account and Account."""
+	if doc and doc.get("company"):
+		frappe.cache().hdel(BANK_GL_ACCOUNTS_CACHE_KEY, doc.company)
+	else:
+		frappe.cache().delete_value(BANK_GL_ACCOUNTS_CACHE_KEY)
+
+
+def evaluate_journal_entry_clearance(bank_rows, allocated):
+	"""Clearance date for one Journal Entry from its bank rows and the
+	allocations keyed by (journal entry, GL account).
+
+	Returns None when some bank row is not fully matched, and False when the
+	entry posts twice to the same bank account and must not be touched.
+	"""
+	accounts = [row.account for row in bank_rows]
+	if len(accounts) != len(set(accounts)):
+		logger.warning("Journal Entry %s posts twice to the same bank account; skipping", bank_rows[0].parent)
+		return False
+
+	cleared_on = None
+	for row in bank_rows:
+		allocation = allocated.get((row.parent, row.account))
+		if not allocation:
+			return None
+
+		amount = flt(allocation.allocated, AMOUNT_PRECISION)
+		if flt(row.debit) > 0:
+			matched = amount == flt(row.debit, AMOUNT_PRECISION)
+		else:
+			matched = flt(row.credit) > 0 and amount == -flt(row.credit, AMOUNT_PRECISION)
+		if not matched:
+			return None
+
+		if not cleared_on or getdate(allocation.cleared_on) > getdate(cleared_on):
+			cleared_on = allocation.cleared_on
+	return cleared_on
+
+
+def _allocation_sql(payment_document, scope):
+	doctype = frappe.db.escape(payment_document)
+	return _ALLOCATION_SQL.format(doctype=doctype, scope=_SCOPE_SQL.format(doctype=doctype, condition=scope))
+
+
+def _change(doctype, row):
+	change = {
+		"doctype": doctype,
+		"name": row["name"],
+		"from": str(row["current"]) if row["current"] else None,
+		"to": str(row["expected"]) if row["expected"] else None,
+	}
+	if row.get("parent"):
+		change["parent"] = row["parent"]
+	return change
+
+
+def _summarise(changes):
+	summary = {}
+	for change in changes:
+		counts = summary.setdefault(change["doctype"], {"set": 0, "cleared": 0})
+		counts["set" if change["to"] else "cleared"] += 1
+	return summary
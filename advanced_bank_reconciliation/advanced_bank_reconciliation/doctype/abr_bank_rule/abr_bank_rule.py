@@ -7,12 +7,17 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt
 
-from advanced_bank_reconciliation.api.permission import assert_party_access
+from advanced_bank_reconciliation.api.permission import (
+	assert_party_access,
+	permission_memo,
+	prime_party_access,
+)
 from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
 	create_journal_entry_bts,
 	create_payment_entry_bts,
 	get_bank_transactions,
 )
+from advanced_bank_reconciliation.utils.locks import ABRLock
 from advanced_bank_reconciliation.utils.logger import get_logger
 
 
@@ -143,8 +148,22 @@ def run_bank_rules(bank_account, from_date, to_date):
 	if not bank_account or not from_date or not to_date:
 		frappe.throw("Bank account, from date and to date are required")
 
+	run_lock = ABRLock(f"bank_rules:{bank_account}")
+	if not run_lock.acquire():
+		frappe.throw("Bank rules are already running for bank account %s. Please wait." % bank_account)
+	try:
+		with permission_memo():
+			return _run_bank_rules(bank_account, from_date, to_date, logger)
+	finally:
+		run_lock.release()
+
+
+def _run_bank_rules(bank_account, from_date, to_date, logger):
 	transactions = get_bank_transactions(bank_account, from_date, to_date)
 	rules = _load_rules(bank_account)
+	# Every rule's party is checked once for the account's company, not per transaction
+	company = frappe.get_cached_value("Bank Account", bank_account, "company")
+	prime_party_access([(rule.party_type, rule.party, company) for rule in rules if rule.party])
 
 	logger.info(
 		"Running %s rules against %s transactions for bank account '%s'",
@@ -160,6 +179,11 @@ def run_bank_rules(bank_account, from_date, to_date):
 
 	for txn_summary in transactions:
 		matched_rule = None
+		# Leave transactions that a reconciliation is working on to that process
+		txn_lock = ABRLock(f"bank_transaction:{txn_summary.name}")
+		if not txn_lock.acquire(renew=False):
+			skipped_count += 1
+			continue
 		try:
 			transaction = frappe.get_doc("Bank Transaction", txn_summary.name)
 			if not transaction.unallocated_amount or transaction.unallocated_amount <= 0:
@@ -193,6 +217,8 @@ def run_bank_rules(bank_account, from_date, to_date):
 					"Failed to persist Error Log for transaction '%s': %s",
 					txn_summary.name, frappe.get_traceback(),
 				)
+		finally:
+			txn_lock.release()
 
 	result_msg = "Bank Rules Result: %s matched, %s unmatched, %s skipped, %s errors" % (
 		matched_count,
@@ -0,0 +1,252 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt, getdate
+
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+logger = get_logger()
+
+INSERT_BATCH_SIZE = 500
+
+# Cleared debits and credits per Bank Transaction date: Payment Entries and
+# bank-account Journal Entry rows allocated to fully allocated transactions.
+_CLEARED_AMOUNTS_SQL = """
+	SELECT cleared.date, SUM(cleared.debit) AS cleared_debit, SUM(cleared.credit) AS cleared_credit
+	FROM (
+		SELECT
+			bt.date,
+			CASE
+				WHEN pe.payment_type = 'Receive' AND pe.paid_to = %(account)s THEN pe.received_amount
+				ELSE 0
+			END AS debit,
+			CASE
+				WHEN pe.payment_type = 'Pay' AND pe.paid_from = %(account)s THEN pe.paid_amount
+				ELSE 0
+			END AS credit
+		FROM `tabBank Transaction` bt
+		INNER JOIN `tabBank Transaction Payments` btp ON btp.parent = bt.name
+		INNER JOIN `tabPayment Entry` pe ON pe.name = btp.payment_entry
+		WHERE bt.bank_account = %(bank_account)s
+			AND bt.docstatus = 1
+			AND bt.unallocated_amount = 0
+			AND btp.payment_document = 'Payment Entry'
+			{condition}
+
+		UNION ALL
+
+		SELECT
+			bt.date,
+			jea.debit_in_account_currency AS debit,
+			jea.credit_in_account_currency AS credit
+		FROM `tabBank Transaction` bt
+		INNER JOIN `tabBank Transaction Payments` btp ON btp.parent = bt.name
+		INNER JOIN `tabJournal Entry` je ON je.name = btp.payment_entry
+		INNER JOIN `tabJournal Entry Account` jea ON jea.parent = je.name
+		WHERE bt.bank_account = %(bank_account)s
+			AND bt.docstatus = 1
+			AND bt.unallocated_amount = 0
+			AND btp.payment_document = 'Journal Entry'
+			AND jea.account = %(account)s
+			AND IFNULL(je.is_opening, 'No') = 'No'
+			{condition}
+	) cleared
+	GROUP BY cleared.date
+"""
+
+_RANGE_CONDITION = "AND bt.date BETWEEN %(from_date)s AND %(to_date)s"
+
+
+class ABRClearedBalanceSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		bank_account: DF.Link
+		cleared_credit: DF.Currency
+		cleared_debit: DF.Currency
+		date: DF.Date
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"ABR Cleared Balance Snapshot", ["bank_account", "date"], constraint_name="unique_bank_account_date"
+	)
+
+
+def get_cleared_amount(bank_account, from_date, till_date):
+	"""Net cleared amount (debit - credit) of `bank_account` between the two
+	dates, summed from the daily snapshots. Read-only: the history of an
+	account is backfilled after migrate and checked nightly."""
+	result = frappe.db.sql(
+		"""
+		SELECT SUM(cleared_debit) - SUM(cleared_credit)
+		FROM `tabABR Cleared Balance Snapshot`
+		WHERE bank_account = %s AND date BETWEEN %s AND %s
+		""",
+		(bank_account, from_date, till_date),
+	)
+	return flt(result[0][0]) if result else 0.0
+
+
+def compute_cleared_amounts(bank_account, from_date=None, to_date=None):
+	"""Cleared amounts per day as {date: (debit, credit)}, computed from the
+	reconciled Bank Transactions. Without dates the full history is read."""
+	account = frappe.db.get_value("Bank Account", bank_account, "account")
+	if not account:
+		return {}
+
+	condition = _RANGE_CONDITION if from_date and to_date else ""
+	rows = frappe.db.sql(
+		_CLEARED_AMOUNTS_SQL.format(condition=condition),
+		{"bank_account": bank_account, "account": account, "from_date": from_date, "to_date": to_date},
+		as_dict=True,
+	)
+	return {
+		getdate(row.date): (flt(row.cleared_debit), flt(row.cleared_credit))
+		for row in rows
+		if flt(row.cleared_debit) or flt(row.cleared_credit)
+	}
+
+
+def get_stored_amounts(bank_account, from_date=None, to_date=None):
+	filters = {"bank_account": bank_account}
+	if from_date and to_date:
+		filters["date"] = ["between", [from_date, to_date]]
+
+	return {
+		getdate(row.date): (flt(row.cleared_debit), flt(row.cleared_credit))
+		for row in frappe.get_all(
+			"ABR Cleared Balance Snapshot",
+			filters=filters,
+			fields=["date", "cleared_debit", "cleared_credit"],
+		)
+	}
+
+
+def refresh_snapshots(bank_account, from_date=None, to_date=None):
+	"""Rewrite the snapshots of `bank_account` between the two dates (all
+	of them without dates) and return the days that changed."""
+	expected = compute_cleared_amounts(bank_account, from_date, to_date)
+	stored = get_stored_amounts(bank_account, from_date, to_date)
+
+	changed = {
+		date: amounts
+		for date, amounts in expected.items()
+		if not _same_amounts(stored.get(date), amounts)
+	}
+	removed = [date for date in stored if date not in expected]
+
+	if removed:
+		frappe.db.delete("ABR Cleared Balance Snapshot", {"bank_account": bank_account, "date": ["in", removed]})
+	if changed:
+		_upsert_snapshots(bank_account, changed)
+
+	return sorted(list(changed) + removed)
+
+
+def refresh_transaction_snapshot(doc, method=None):
+	"""Keep the snapshot of the transaction's day in step with its
+	allocations. Hooked on Bank Transaction submit, update and cancel."""
+	if not doc.bank_account or not doc.date:
+		return
+
+	dates = {getdate(doc.date)}
+	before = doc.get_doc_before_save()
+	if before and before.date and before.bank_account == doc.bank_account:
+		dates.add(getdate(before.date))
+
+	for date in dates:
+		refresh_snapshots(doc.bank_account, date, date)
+
+
+def reconcile_snapshots():
+	"""Check every bank account's snapshots against the full recomputation
+	and repair any drift. Runs nightly from the scheduler."""
+	for bank_account in frappe.get_all(
+		"Bank Account", filters={"is_company_account": 1, "account": ["is", "set"]}, pluck="name"
+	):
+		try:
+			drifted = refresh_snapshots(bank_account)
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			logger.error("Cleared balance snapshot check failed for %s", bank_account, exc_info=True)
+			continue
+
+		if drifted:
+			logger.warning(
+				"Repaired %s drifted cleared balance snapshots for %s (first %s, last %s)",
+				len(drifted),
+				bank_account,
+				drifted[0],
+				drifted[-1],
+			)
+
+
+def backfill_snapshots():
+	"""Build the snapshots of bank accounts that have none yet. Queued after
+	migrate; accounts with nothing cleared are simply scanned again."""
+	for bank_account in frappe.get_all(
+		"Bank Account", filters={"is_company_account": 1, "account": ["is", "set"]}, pluck="name"
+	):
+		if frappe.db.exists("ABR Cleared Balance Snapshot", {"bank_account": bank_account}):
+			continue
+		try:
+			refresh_snapshots(bank_account)
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			logger.error("Cleared balance snapshot backfill failed for %s", bank_account, exc_info=True)
+
+
+def enqueue_snapshot_backfill():
+	frappe.enqueue(
+		"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot.backfill_snapshots",
+		queue="long",
+		timeout=3600,
+		enqueue_after_commit=True,
+		job_id="abr_cleared_balance_snapshot_backfill",
+		deduplicate=True,
+	)
+
+
+def _same_amounts(stored, expected):
+	return stored is not None and all(
+		flt(a, 2) == flt(b, 2) for a, b in zip(stored, expected, strict=True)
+	)
+
+
+def _upsert_snapshots(bank_account, amounts):
+	now = frappe.utils.now()
+	user = frappe.session.user
+	rows = [
+		(frappe.generate_hash(length=10), bank_account, date, debit, credit, now, now, user, user)
+		for date, (debit, credit) in sorted(amounts.items())
+	]
+
+	for start in range(0, len(rows), INSERT_BATCH_SIZE):
+		batch = rows[start : start + INSERT_BATCH_SIZE]
+		placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(batch))
+		frappe.db.sql(
+			f"""
+			INSERT INTO `tabABR Cleared Balance Snapshot`
+				(name, bank_account, date, cleared_debit, cleared_credit, creation, modified, owner, modified_by)
+			VALUES {placeholders}
+			ON DUPLICATE KEY UPDATE
+				cleared_debit = VALUES(cleared_debit),
+				cleared_credit = VALUES(cleared_credit),
+				modified = VALUES(modified),
+				modified_by = VALUES(modified_by)
+			""",
+			[value for row in batch for value in row],
+		)
@@ -0,0 +1,101 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt, nowdate
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot import (
+	backfill_snapshots,
+	get_cleared_amount,
+	reconcile_snapshots,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	create_payment_entry_for_invoice,
+	reconcile_vouchers,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	TEST_COMPANY,
+	create_test_bank_transaction,
+	create_test_sales_invoice,
+	setup_abr_test_data,
+)
+
+SNAPSHOT_MODULE = (
+	"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot"
+)
+
+
+class TestABRClearedBalanceSnapshot(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+
+	def _reconcile(self, amount, date):
+		si = create_test_sales_invoice(outstanding=amount)
+		bt = create_test_bank_transaction(self.bank_account, deposit=amount, date=date)
+		pe = create_payment_entry_for_invoice(si, bt, amount, "Receive", "Customer", si.customer)
+		reconcile_vouchers(
+			bt.name, json.dumps([{"payment_doctype": "Payment Entry", "payment_name": pe.name, "amount": amount}])
+		)
+		return bt
+
+	def _snapshot(self, date):
+		return frappe.db.get_value(
+			"ABR Cleared Balance Snapshot",
+			{"bank_account": self.bank_account, "date": date},
+			["cleared_debit", "cleared_credit"],
+			as_dict=True,
+		)
+
+	def test_reconciliation_updates_the_day_snapshot(self):
+		date = add_days(nowdate(), -60)
+		before = get_cleared_amount(self.bank_account, date, date)
+
+		self._reconcile(70, date)
+
+		self.assertEqual(flt(self._snapshot(date).cleared_debit - before), 70)
+		self.assertEqual(get_cleared_amount(self.bank_account, date, date), before + 70)
+
+	def test_cancelled_transaction_leaves_the_snapshot(self):
+		date = add_days(nowdate(), -61)
+		before = get_cleared_amount(self.bank_account, date, date)
+		bt = self._reconcile(30, date)
+
+		bt.reload()
+		bt.cancel()
+
+		self.assertEqual(get_cleared_amount(self.bank_account, date, date), before)
+
+	def test_nightly_check_repairs_drift(self):
+		date = add_days(nowdate(), -62)
+		self._reconcile(45, date)
+		expected = self._snapshot(date)
+		frappe.db.set_value(
+			"ABR Cleared Balance Snapshot",
+			{"bank_account": self.bank_account, "date": date},
+			"cleared_debit",
+			1,
+		)
+
+		reconcile_snapshots()
+
+		self.assertEqual(flt(self._snapshot(date).cleared_debit), flt(expected.cleared_debit))
+
+	def test_cleared_amount_does_not_backfill_on_read(self):
+		with patch(f"{SNAPSHOT_MODULE}.refresh_snapshots") as refresh:
+			get_cleared_amount("_ABR Account Without Snapshots", nowdate(), nowdate())
+		refresh.assert_not_called()
+
+	def test_backfill_builds_missing_account_snapshots(self):
+		date = add_days(nowdate(), -63)
+		self._reconcile(25, date)
+		frappe.db.delete("ABR Cleared Balance Snapshot", {"bank_account": self.bank_account})
+
+		backfill_snapshots()
+
+		self.assertEqual(flt(self._snapshot(date).cleared_debit), 25)
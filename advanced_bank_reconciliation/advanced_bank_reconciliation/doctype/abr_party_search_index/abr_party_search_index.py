@@ -0,0 +1,239 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+
+import re
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint
+
+from advanced_bank_reconciliation.api.party_company import (
+	SUPPORTED_PARTY_TYPES,
+	_get_search_fields,
+	_has_check_field,
+	get_party_company_field,
+)
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+logger = get_logger()
+
+REBUILD_BATCH_SIZE = 2000
+TOKEN_LENGTH = 140
+# Candidates read from the index per requested row; the permission-checked
+# get_list in search_parties may drop some of them
+CANDIDATES_PER_ROW = 4
+# Stored as the built flag; bumped when the rows change shape, so a migrate
+# rebuilds the index and searches fall back to LIKE until it is done
+INDEX_VERSION = 2
+
+
+class ABRPartySearchIndex(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		company: DF.Link | None
+		disabled: DF.Check
+		field_rank: DF.Int
+		party: DF.DynamicLink
+		party_type: DF.Link
+		token: DF.Data
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("ABR Party Search Index", ["party_type", "token"], "party_type_token")
+	frappe.db.add_index("ABR Party Search Index", ["party_type", "party"], "party_type_party")
+
+
+def get_tokens(value):
+	"""Lower-cased tails of `value` from each word on ("acme corp ltd",
+	"corp ltd", "ltd"), so a prefix search matches at any word start."""
+	words = re.findall(r"\w+", str(value or "").lower())
+	return [" ".join(words[index:])[:TOKEN_LENGTH] for index in range(len(words))]
+
+
+def search_party_index(party_type, txt, company=None, limit=20, after=None):
+	"""Parties whose search fields have a word starting with `txt`, best
+	first: matches on the name, then the title, then other search fields,
+	whole words before prefixes. Disabled parties are skipped, and with
+	`company` so are parties of other companies.
+
+	Returns (party, score) rows; pass the last one as `after` for the rows
+	that follow it. Returns None until a full rebuild of the party type has
+	completed, so callers can fall back to a LIKE search."""
+	if not is_index_built(party_type):
+		return None
+
+	query = " ".join(re.findall(r"\w+", str(txt or "").lower()))[:TOKEN_LENGTH]
+	if not query:
+		return None
+
+	conditions = ["party_type = %(party_type)s", "token LIKE %(prefix)s", "disabled = 0"]
+	if company:
+		conditions.append("IFNULL(company, '') IN (%(company)s, '')")
+
+	params = {
+		"party_type": party_type,
+		"prefix": "{0}%".format(query.replace("_", "\\_")),
+		"query": query,
+		"company": company,
+		"limit": limit,
+	}
+	having = ""
+	if after:
+		params["after_party"], params["after_score"] = after
+		having = "HAVING score > %(after_score)s OR (score = %(after_score)s AND party > %(after_party)s)"
+
+	return frappe.db.sql(
+		f"""
+		SELECT party, MIN(field_rank * 2 + (token != %(query)s)) AS score
+		FROM `tabABR Party Search Index`
+		WHERE {" AND ".join(conditions)}
+		GROUP BY party
+		{having}
+		ORDER BY score, party
+		LIMIT %(limit)s
+		""",
+		params,
+	)
+
+
+def index_party(doc, method=None):
+	"""doc_events hook: reindex a Customer, Supplier or Employee on save."""
+	_delete_party(doc.doctype, doc.name)
+	fields, company_field, status_fields = _get_indexed_fields(doc.doctype)
+	_insert_rows(_party_rows(doc.doctype, doc, fields, company_field, status_fields))
+
+
+def rename_party(doc, method=None, old=None, new=None, merge=False):
+	"""doc_events hook for after_rename; a merge drops the old party."""
+	_delete_party(doc.doctype, old)
+	index_party(doc)
+
+
+def remove_party(doc, method=None):
+	_delete_party(doc.doctype, doc.name)
+
+
+def rebuild_party_search_index(party_type=None):
+	"""Rebuild the index of one party type, or of all of them."""
+	for current_type in [party_type] if party_type else SUPPORTED_PARTY_TYPES:
+		fields, company_field, status_fields = _get_indexed_fields(current_type)
+		frappe.db.delete("ABR Party Search Index", {"party_type": current_type})
+
+		start = 0
+		indexed = 0
+		while True:
+			parties = frappe.get_all(
+				current_type,
+				fields=list(dict.fromkeys([*fields, company_field or "name", *status_fields])),
+				order_by="name",
+				limit_start=start,
+				limit_page_length=REBUILD_BATCH_SIZE,
+			)
+			if not parties:
+				break
+			_insert_rows(
+				[
+					row
+					for party in parties
+					for row in _party_rows(current_type, party, fields, company_field, status_fields)
+				]
+			)
+			start += REBUILD_BATCH_SIZE
+			indexed += len(parties)
+
+		# Committed with the rows, so a rebuild that fails never marks the index built
+		frappe.db.set_global(_built_key(current_type), INDEX_VERSION)
+		frappe.db.commit()
+		logger.info("Rebuilt the party search index of %s (%s parties)", current_type, indexed)
+
+
+def enqueue_party_search_index_rebuild(party_type=None):
+	frappe.enqueue(
+		"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.rebuild_party_search_index",
+		queue="long",
+		timeout=3600,
+		party_type=party_type,
+		enqueue_after_commit=True,
+		job_id=f"abr_party_search_index::{party_type or 'all'}",
+		deduplicate=True,
+	)
+
+
+def ensure_party_search_index():
+	"""after_migrate: queue a rebuild of every party type not fully indexed
+	yet. Rows written by the save hooks alone do not count."""
+	for party_type in SUPPORTED_PARTY_TYPES:
+		if not is_index_built(party_type):
+			enqueue_party_search_index_rebuild(party_type)
+
+
+def is_index_built(party_type):
+	return cint(frappe.db.get_global(_built_key(party_type))) == INDEX_VERSION
+
+
+def _built_key(party_type):
+	return f"abr_party_search_index_built:{party_type}"
+
+
+def _get_indexed_fields(party_type):
+	meta = frappe.get_meta(party_type)
+	fields = _get_search_fields(meta, None)
+	try:
+		company_field = get_party_company_field(party_type)
+	except frappe.ValidationError:
+		# Incomplete settings fail closed in search_parties; index without company
+		company_field = None
+	# The checks search_parties filters on
+	status_fields = [fieldname for fieldname in ("enabled", "disabled") if _has_check_field(meta, fieldname)]
+	return fields, company_field, status_fields
+
+
+def _party_rows(party_type, party, fields, company_field, status_fields):
+	company = party.get(company_field) if company_field else None
+	disabled = int(
+		("enabled" in status_fields and not cint(party.get("enabled")))
+		or ("disabled" in status_fields and cint(party.get("disabled")))
+	)
+	rows = {}
+	for rank, fieldname in enumerate(fields):
+		for token in get_tokens(party.get(fieldname)):
+			rows.setdefault(token, rank)
+	return [(party_type, party.name, company, disabled, token, rank) for token, rank in rows.items()]
+
+
+def _insert_rows(rows):
+	if not rows:
+		return
+
+	now = frappe.utils.now()
+	user = frappe.session.user
+	frappe.db.bulk_insert(
+		"ABR Party Search Index",
+		[
+			"name",
+			"party_type",
+			"party",
+			"company",
+			"disabled",
+			"token",
+			"field_rank",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+		],
+		[(frappe.generate_hash(length=12), *row, now, now, user, user) for row in rows],
+	)
+
+
+def _delete_party(party_type, party):
+	frappe.db.delete("ABR Party Search Index", {"party_type": party_type, "party": party})
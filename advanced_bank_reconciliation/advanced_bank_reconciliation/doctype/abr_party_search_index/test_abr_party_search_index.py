@@ -0,0 +1,76 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index import (
+	ensure_party_search_index,
+	get_tokens,
+	index_party,
+	rebuild_party_search_index,
+	remove_party,
+	search_party_index,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	ensure_customer,
+)
+
+
+def _search(party_type, txt):
+	return [party for party, _score in search_party_index(party_type, txt, limit=1000) or []]
+
+
+class TestABRPartySearchIndex(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.customer = frappe.get_doc("Customer", ensure_customer())
+		rebuild_party_search_index("Customer")
+
+	def setUp(self):
+		index_party(self.customer)
+
+	def test_tokens_start_at_every_word(self):
+		self.assertEqual(get_tokens("Acme Corp, Ltd."), ["acme corp ltd", "corp ltd", "ltd"])
+		self.assertEqual(get_tokens(None), [])
+
+	def test_search_matches_a_prefix_of_any_word(self):
+		words = get_tokens(self.customer.customer_name)
+		self.assertIn(self.customer.name, _search("Customer", words[0][:3]))
+		self.assertIn(self.customer.name, _search("Customer", words[-1]))
+
+	def test_removed_parties_leave_the_index(self):
+		remove_party(self.customer)
+
+		self.assertNotIn(self.customer.name, _search("Customer", self.customer.customer_name))
+
+	def test_disabled_parties_are_skipped(self):
+		customer = frappe.get_doc("Customer", self.customer.name)
+		customer.disabled = 1
+		index_party(customer)
+
+		self.assertNotIn(self.customer.name, _search("Customer", self.customer.customer_name))
+
+	def test_search_pages_after_the_last_row(self):
+		rows = search_party_index("Customer", self.customer.customer_name, limit=1000)
+		self.assertIn(self.customer.name, [party for party, _score in rows])
+
+		index = [party for party, _score in rows].index(self.customer.name)
+		following = search_party_index("Customer", self.customer.customer_name, limit=1000, after=rows[index])
+		self.assertEqual(following, rows[index + 1 :])
+
+	def test_rows_from_save_hooks_alone_are_not_served(self):
+		with (
+			patch("frappe.db.get_global", return_value=None),
+			patch("frappe.enqueue") as enqueue,
+		):
+			self.assertIsNone(search_party_index("Customer", self.customer.customer_name))
+			ensure_party_search_index()
+
+		self.assertEqual(
+			{call.kwargs["party_type"] for call in enqueue.call_args_list},
+			{"Customer", "Supplier", "Employee"},
+		)
@@ -0,0 +1,176 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_to_date, cint, now_datetime
+
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+logger = get_logger()
+
+ACTIVE_PHASES = ("Queued", "Creating Payment Entries", "Reconciling")
+# A running job touches its record after every committed batch, so a record
+# left untouched this long belongs to a worker that died.
+STALE_AFTER_MINUTES = 10
+MAX_ATTEMPTS = 3
+
+
+class ABRReconciliationJob(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		attempts: DF.Int
+		bank_transaction: DF.Link
+		committed_units: DF.Int
+		created_vouchers: DF.JSON | None
+		error: DF.LongText | None
+		failed_invoices: DF.Int
+		first_error: DF.JSON | None
+		group_by_party: DF.Check
+		invoices: DF.JSON | None
+		job_id: DF.Data
+		phase: DF.Literal["Queued", "Creating Payment Entries", "Reconciling", "Completed", "Failed"]
+		processed_invoices: DF.Int
+		regular_vouchers: DF.JSON | None
+		total_invoices: DF.Int
+		user: DF.Link | None
+	# end: auto-generated types
+
+	def get_invoices(self):
+		return frappe.parse_json(self.invoices or "[]")
+
+	def get_regular_vouchers(self):
+		return frappe.parse_json(self.regular_vouchers or "[]")
+
+	def get_created_vouchers(self):
+		return frappe.parse_json(self.created_vouchers or "[]")
+
+	def get_first_error(self):
+		return frappe.parse_json(self.first_error) if self.first_error else None
+
+	def is_active(self):
+		return self.phase in ACTIVE_PHASES
+
+	def start_attempt(self):
+		self.db_set({"attempts": cint(self.attempts) + 1, "error": None})
+
+	def set_phase(self, phase, error=None):
+		values = {"phase": phase}
+		if error is not None:
+			values["error"] = error
+		self.db_set(values)
+
+	def record_batch(self, vouchers, units, processed, failed, first_error=None):
+		"""Persist the outcome of a batch.
+
+		Must be called before the batch's commit so the job record and the
+		Payment Entries it lists are committed together; a resumed job then
+		never repeats or loses a committed batch.
+		"""
+		self.db_set(
+			{
+				"created_vouchers": frappe.as_json(self.get_created_vouchers() + list(vouchers)),
+				"committed_units": cint(self.committed_units) + units,
+				"processed_invoices": processed,
+				"failed_invoices": failed,
+				"first_error": frappe.as_json(first_error) if first_error else None,
+			}
+		)
+
+
+def get_or_create_reconciliation_job(
+	job_id, bank_transaction, invoices, regular_vouchers, user, group_by_party=False
+):
+	"""Return the job record for `job_id`, creating it from the given selection
+	when the job was enqueued without one."""
+	if frappe.db.exists("ABR Reconciliation Job", job_id):
+		return frappe.get_doc("ABR Reconciliation Job", job_id)
+
+	job = frappe.get_doc(
+		{
+			"doctype": "ABR Reconciliation Job",
+			"job_id": job_id,
+			"phase": "Queued",
+			"bank_transaction": bank_transaction,
+			"user": user,
+			"group_by_party": 1 if group_by_party else 0,
+			"total_invoices": len(invoices or []),
+			"invoices": frappe.as_json(invoices or []),
+			"regular_vouchers": frappe.as_json(regular_vouchers or []),
+			"created_vouchers": "[]",
+		}
+	)
+	job.insert(ignore_permissions=True)
+	return job
+
+
+def resume_interrupted_jobs():
+	"""Re-enqueue reconciliation jobs whose worker died mid-run.
+
+	Runs from the scheduler. A job is considered interrupted when it is still
+	in an active phase, its record has not been touched for
+	STALE_AFTER_MINUTES and no RQ job with its id is queued or running.
+	"""
+	from frappe.utils.background_jobs import is_job_enqueued
+
+	stale_before = add_to_date(now_datetime(), minutes=-STALE_AFTER_MINUTES)
+	jobs = frappe.get_all(
+		"ABR Reconciliation Job",
+		filters={"phase": ["in", ACTIVE_PHASES], "modified": ["<", stale_before]},
+		pluck="name",
+	)
+	for name in jobs:
+		job = frappe.get_doc("ABR Reconciliation Job", name)
+		if is_job_enqueued(job.job_id):
+			continue
+
+		if cint(job.attempts) >= MAX_ATTEMPTS:
+			job.set_phase(
+				"Failed",
+				error=_("Stopped after {0} interrupted attempts. Created payment entries are listed on this job.").format(
+					job.attempts
+				),
+			)
+			frappe.db.commit()
+			logger.error("Reconciliation job %s abandoned after %s attempts", job.name, job.attempts)
+			continue
+
+		logger.info(
+			"Resuming interrupted reconciliation job %s for %s from unit %s",
+			job.name,
+			job.bank_transaction,
+			job.committed_units,
+		)
+		_enqueue_job(job)
+
+
+@frappe.whitelist()
+def resume_job(job_id):
+	"""Manually resume an interrupted reconciliation job."""
+	job = frappe.get_doc("ABR Reconciliation Job", job_id)
+	job.check_permission("write")
+	if not job.is_active():
+		frappe.throw(_("Reconciliation job {0} is already {1}").format(job.name, job.phase))
+
+	from frappe.utils.background_jobs import is_job_enqueued
+
+	if is_job_enqueued(job.job_id):
+		frappe.throw(_("Reconciliation job {0} is still running").format(job.name))
+
+	_enqueue_job(job)
+	return {"job_id": job.job_id, "status": "queued"}
+
+
+def _enqueue_job(job):
+	from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+		enqueue_bulk_reconciliation,
+	)
+
+	enqueue_bulk_reconciliation(job)
@@ -0,0 +1,176 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, flt, now_datetime
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_reconciliation_job.abr_reconciliation_job import (
+	MAX_ATTEMPTS,
+	get_or_create_reconciliation_job,
+	resume_interrupted_jobs,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	create_payment_entries_bulk,
+	create_payment_entry_for_invoice,
+	process_bulk_reconciliation,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	TEST_COMPANY,
+	create_test_bank_transaction,
+	create_test_sales_invoice,
+	setup_abr_test_data,
+)
+
+JOB_MODULE = "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_reconciliation_job.abr_reconciliation_job"
+
+
+def _selection(invoice, allocated_amount):
+	return {"doctype": "Unpaid Sales Invoice", "name": invoice.name, "allocated_amount": allocated_amount}
+
+
+def _make_stale(job):
+	frappe.db.set_value(
+		"ABR Reconciliation Job",
+		job.name,
+		"modified",
+		add_to_date(now_datetime(), hours=-1),
+		update_modified=False,
+	)
+
+
+class TestABRReconciliationJob(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+		cls._orig_bg = frappe.db.get_single_value(
+			"Advance Bank Reconciliation Settings", "reconcile_unpaid_invoices_in_background"
+		)
+		frappe.db.set_single_value(
+			"Advance Bank Reconciliation Settings", "reconcile_unpaid_invoices_in_background", 0
+		)
+		frappe.db.commit()
+
+	@classmethod
+	def tearDownClass(cls):
+		frappe.db.set_single_value(
+			"Advance Bank Reconciliation Settings",
+			"reconcile_unpaid_invoices_in_background",
+			cls._orig_bg,
+		)
+		frappe.db.commit()
+		super().tearDownClass()
+
+	def test_bulk_run_records_completed_job(self):
+		si = create_test_sales_invoice(outstanding=40)
+		bt = create_test_bank_transaction(self.bank_account, deposit=40)
+
+		result = create_payment_entries_bulk(
+			bank_transaction_name=bt.name,
+			invoices=[_selection(si, 40)],
+		)
+
+		job = frappe.get_doc("ABR Reconciliation Job", result["job_id"])
+		bt.reload()
+		self.assertEqual(job.phase, "Completed")
+		self.assertEqual(job.attempts, 1)
+		self.assertEqual(job.processed_invoices, 1)
+		self.assertEqual(
+			[voucher["payment_name"] for voucher in job.get_created_vouchers()],
+			[row.payment_entry for row in bt.payment_entries],
+		)
+
+	def test_resume_links_committed_entries_without_duplicating_them(self):
+		si1 = create_test_sales_invoice(outstanding=25)
+		si2 = create_test_sales_invoice(outstanding=35)
+		bt = create_test_bank_transaction(self.bank_account, deposit=60)
+		invoices = [_selection(si1, 25), _selection(si2, 35)]
+
+		# State left behind by a worker that died after committing the first batch
+		job = get_or_create_reconciliation_job(
+			frappe.generate_hash(length=10), bt.name, invoices, [], frappe.session.user
+		)
+		orphan = create_payment_entry_for_invoice(si1, bt, 25, "Receive", "Customer", si1.customer)
+		job.set_phase("Creating Payment Entries")
+		job.record_batch(
+			[{"payment_doctype": "Payment Entry", "payment_name": orphan.name, "amount": 25}],
+			units=1,
+			processed=1,
+			failed=0,
+		)
+
+		process_bulk_reconciliation(bt.name, invoices, [], job.job_id, frappe.session.user)
+
+		bt.reload()
+		job.reload()
+		self.assertEqual(job.phase, "Completed")
+		self.assertAlmostEqual(flt(bt.unallocated_amount), 0.0, places=2)
+		linked = [row.payment_entry for row in bt.payment_entries]
+		self.assertIn(orphan.name, linked)
+		self.assertEqual(len(linked), 2)
+		self.assertEqual(
+			frappe.db.count(
+				"Payment Entry Reference",
+				{"reference_name": si1.name, "docstatus": 1},
+			),
+			1,
+		)
+
+	def test_completed_job_is_not_run_again(self):
+		si = create_test_sales_invoice(outstanding=15)
+		bt = create_test_bank_transaction(self.bank_account, deposit=15)
+		job = get_or_create_reconciliation_job(
+			frappe.generate_hash(length=10), bt.name, [_selection(si, 15)], [], frappe.session.user
+		)
+		job.set_phase("Completed")
+
+		with patch(
+			"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool._create_payment_entry_for_unit"
+		) as create_unit:
+			process_bulk_reconciliation(bt.name, [_selection(si, 15)], [], job.job_id, frappe.session.user)
+
+		create_unit.assert_not_called()
+
+	def test_stale_active_job_is_resumed(self):
+		bt = create_test_bank_transaction(self.bank_account, deposit=10)
+		job = get_or_create_reconciliation_job(
+			frappe.generate_hash(length=10), bt.name, [], [], frappe.session.user
+		)
+		_make_stale(job)
+
+		with (
+			patch("frappe.utils.background_jobs.is_job_enqueued", return_value=False),
+			patch(f"{JOB_MODULE}._enqueue_job") as enqueue_job,
+		):
+			resume_interrupted_jobs()
+
+		self.assertIn(job.name, [call.args[0].name for call in enqueue_job.call_args_list])
+
+	def test_running_or_exhausted_jobs_are_not_resumed(self):
+		bt = create_test_bank_transaction(self.bank_account, deposit=10)
+		running = get_or_create_reconciliation_job(
+			frappe.generate_hash(length=10), bt.name, [], [], frappe.session.user
+		)
+		exhausted = get_or_create_reconciliation_job(
+			frappe.generate_hash(length=10), bt.name, [], [], frappe.session.user
+		)
+		exhausted.db_set("attempts", MAX_ATTEMPTS)
+		_make_stale(running)
+		_make_stale(exhausted)
+
+		with (
+			patch(
+				"frappe.utils.background_jobs.is_job_enqueued",
+				side_effect=lambda job_id: job_id == running.job_id,
+			),
+			patch(f"{JOB_MODULE}._enqueue_job") as enqueue_job,
+		):
+			resume_interrupted_jobs()
+
+		resumed = [call.args[0].name for call in enqueue_job.call_args_list]
+		self.assertNotIn(running.name, resumed)
+		self.assertNotIn(exhausted.name, resumed)
+		self.assertEqual(frappe.db.get_value("ABR Reconciliation Job", exhausted.name, "phase"), "Failed")
@@ -0,0 +1,218 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_to_date, cint, getdate, now_datetime
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import (
+	recompute_clearance_for_transactions,
+)
+from advanced_bank_reconciliation.utils.locks import ABRLock
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+logger = get_logger()
+
+ACTIVE_STATUSES = ("Queued", "Running")
+DEFAULT_CHUNK_SIZE = 200
+MAX_CHUNK_SIZE = 1000
+# A running sweep touches its record after every chunk
+STALE_AFTER_MINUTES = 10
+MAX_ATTEMPTS = 3
+
+
+class ABRValidationSweep(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		attempts: DF.Int
+		bank_account: DF.Link
+		changed_vouchers: DF.Int
+		chunk_size: DF.Int
+		chunks: DF.Int
+		error: DF.LongText | None
+		from_date: DF.Date
+		last_date: DF.Date | None
+		last_transaction: DF.Data | None
+		processed_transactions: DF.Int
+		status: DF.Literal["Queued", "Running", "Completed", "Failed"]
+		to_date: DF.Date
+		user: DF.Link | None
+	# end: auto-generated types
+
+	def is_active(self):
+		return self.status in ACTIVE_STATUSES
+
+	def get_next_chunk(self):
+		"""Names of the next chunk_size reconciled Bank Transactions after
+		the watermark, in (date, name) order."""
+		watermark = ""
+		if self.last_date:
+			watermark = "AND (bt.date > %(last_date)s OR (bt.date = %(last_date)s AND bt.name > %(last_transaction)s))"
+
+		return frappe.db.sql(
+			f"""
+			SELECT bt.name, bt.date
+			FROM `tabBank Transaction` bt
+			WHERE bt.bank_account = %(bank_account)s
+				AND bt.docstatus = 1
+				AND bt.date BETWEEN %(from_date)s AND %(to_date)s
+				{watermark}
+				AND EXISTS (
+					SELECT 1 FROM `tabBank Transaction Payments` btp WHERE btp.parent = bt.name
+				)
+			ORDER BY bt.date, bt.name
+			LIMIT %(chunk_size)s
+			""",
+			{
+				"bank_account": self.bank_account,
+				"from_date": self.from_date,
+				"to_date": self.to_date,
+				"last_date": self.last_date,
+				"last_transaction": self.last_transaction or "",
+				"chunk_size": cint(self.chunk_size) or DEFAULT_CHUNK_SIZE,
+			},
+			as_dict=True,
+		)
+
+	def record_chunk(self, last_row, processed, changed):
+		"""Advance the watermark. Must be called before the chunk's commit so
+		the clearance dates and the watermark are committed together."""
+		self.db_set(
+			{
+				"status": "Running",
+				"last_date": last_row.date,
+				"last_transaction": last_row.name,
+				"chunks": cint(self.chunks) + 1,
+				"processed_transactions": cint(self.processed_transactions) + processed,
+				"changed_vouchers": cint(self.changed_vouchers) + changed,
+			}
+		)
+
+
+@frappe.whitelist()
+def start_validation_sweep(bank_account, from_date, to_date, chunk_size=None):
+	"""Validate every reconciled Bank Transaction of `bank_account` in the
+	period, chunk by chunk in the background. An active sweep over the same
+	account and period is resumed instead of started again."""
+	frappe.has_permission("Bank Account", "read", bank_account, throw=True)
+
+	existing = frappe.get_all(
+		"ABR Validation Sweep",
+		filters={
+			"bank_account": bank_account,
+			"from_date": getdate(from_date),
+			"to_date": getdate(to_date),
+			"status": ["in", ACTIVE_STATUSES],
+		},
+		pluck="name",
+		limit=1,
+	)
+	if existing:
+		return frappe.get_doc("ABR Validation Sweep", existing[0])
+
+	sweep = frappe.get_doc(
+		{
+			"doctype": "ABR Validation Sweep",
+			"bank_account": bank_account,
+			"from_date": from_date,
+			"to_date": to_date,
+			"status": "Queued",
+			"user": frappe.session.user,
+			"chunk_size": min(cint(chunk_size) or DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE),
+		}
+	)
+	sweep.insert(ignore_permissions=True)
+	_enqueue_chunk(sweep)
+	return sweep
+
+
+def process_sweep_chunk(sweep_name):
+	"""Validate one chunk after the watermark and enqueue the next one."""
+	sweep = frappe.get_doc("ABR Validation Sweep", sweep_name)
+	if not sweep.is_active():
+		return
+
+	lock = ABRLock(f"validation_sweep:{sweep.name}", ttl=600)
+	if not lock.acquire():
+		logger.info("Validation sweep %s is already being processed", sweep.name)
+		return
+
+	try:
+		rows = sweep.get_next_chunk()
+		if rows:
+			changes = recompute_clearance_for_transactions([row.name for row in rows])
+			lock.assert_held()
+			sweep.record_chunk(rows[-1], len(rows), len(changes))
+			frappe.db.commit()
+
+		if len(rows) < (cint(sweep.chunk_size) or DEFAULT_CHUNK_SIZE):
+			sweep.db_set("status", "Completed")
+			frappe.db.commit()
+			logger.info(
+				"Validation sweep %s completed: %s transactions, %s clearance dates changed",
+				sweep.name,
+				sweep.processed_transactions,
+				sweep.changed_vouchers,
+			)
+			return
+	except Exception as e:
+		frappe.db.rollback()
+		logger.error("Validation sweep %s failed after %s", sweep.name, sweep.last_transaction, exc_info=True)
+		sweep.reload()
+		sweep.db_set("error", str(e))
+		frappe.db.commit()
+		raise
+	finally:
+		lock.release()
+
+	_enqueue_chunk(sweep)
+
+
+def resume_interrupted_sweeps():
+	"""Re-enqueue sweeps whose chunk job died. Runs from the scheduler."""
+	from frappe.utils.background_jobs import is_job_enqueued
+
+	stale_before = add_to_date(now_datetime(), minutes=-STALE_AFTER_MINUTES)
+	for name in frappe.get_all(
+		"ABR Validation Sweep",
+		filters={"status": ["in", ACTIVE_STATUSES], "modified": ["<", stale_before]},
+		pluck="name",
+	):
+		sweep = frappe.get_doc("ABR Validation Sweep", name)
+		if is_job_enqueued(_chunk_job_id(sweep)):
+			continue
+
+		if cint(sweep.attempts) >= MAX_ATTEMPTS:
+			sweep.db_set("status", "Failed")
+			frappe.db.commit()
+			logger.error("Validation sweep %s abandoned after %s attempts", sweep.name, sweep.attempts)
+			continue
+
+		sweep.db_set("attempts", cint(sweep.attempts) + 1)
+		frappe.db.commit()
+		logger.info("Resuming validation sweep %s after %s", sweep.name, sweep.last_transaction)
+		_enqueue_chunk(sweep)
+
+
+def _chunk_job_id(sweep):
+	# One id per chunk: the next chunk is enqueued while the current job still runs
+	return f"abr_validation_sweep_{sweep.name}_{cint(sweep.chunks)}"
+
+
+def _enqueue_chunk(sweep):
+	frappe.enqueue(
+		"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_validation_sweep.abr_validation_sweep.process_sweep_chunk",
+		queue="long",
+		timeout=1800,
+		job_id=_chunk_job_id(sweep),
+		deduplicate=True,
+		enqueue_after_commit=True,
+		sweep_name=sweep.name,
+	)
@@ -0,0 +1,91 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, nowdate
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_validation_sweep.abr_validation_sweep import (
+	process_sweep_chunk,
+	start_validation_sweep,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	create_payment_entry_for_invoice,
+	reconcile_vouchers,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	TEST_COMPANY,
+	create_test_bank_transaction,
+	create_test_sales_invoice,
+	setup_abr_test_data,
+)
+
+SWEEP_MODULE = "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_validation_sweep.abr_validation_sweep"
+
+
+class TestABRValidationSweep(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+
+	def _reconciled_transaction(self, amount, date):
+		si = create_test_sales_invoice(outstanding=amount)
+		bt = create_test_bank_transaction(self.bank_account, deposit=amount, date=date)
+		pe = create_payment_entry_for_invoice(si, bt, amount, "Receive", "Customer", si.customer)
+		reconcile_vouchers(
+			bt.name, json.dumps([{"payment_doctype": "Payment Entry", "payment_name": pe.name, "amount": amount}])
+		)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", None)
+		return bt, pe
+
+	def test_sweep_walks_the_range_in_chunks_and_records_watermark(self):
+		date = add_days(nowdate(), -40)
+		reconciled = [self._reconciled_transaction(amount, date) for amount in (11, 12, 13)]
+
+		with patch("frappe.enqueue"):
+			sweep = start_validation_sweep(self.bank_account, date, date, chunk_size=2)
+			process_sweep_chunk(sweep.name)
+
+			sweep.reload()
+			self.assertEqual(sweep.status, "Running")
+			self.assertEqual(sweep.processed_transactions, 2)
+			first_chunk = sorted(bt.name for bt, _pe in reconciled)[:2]
+			self.assertEqual(sweep.last_transaction, first_chunk[-1])
+
+			process_sweep_chunk(sweep.name)
+
+		sweep.reload()
+		self.assertEqual(sweep.status, "Completed")
+		self.assertEqual(sweep.processed_transactions, 3)
+		self.assertEqual(sweep.changed_vouchers, 3)
+		for bt, pe in reconciled:
+			self.assertEqual(str(frappe.db.get_value("Payment Entry", pe.name, "clearance_date")), str(bt.date))
+
+	def test_active_sweep_is_resumed_instead_of_duplicated(self):
+		date = add_days(nowdate(), -41)
+
+		with patch("frappe.enqueue") as enqueue:
+			first = start_validation_sweep(self.bank_account, date, date)
+			second = start_validation_sweep(self.bank_account, date, date)
+
+		self.assertEqual(first.name, second.name)
+		self.assertEqual(enqueue.call_count, 1)
+
+	def test_failed_chunk_keeps_watermark_for_resume(self):
+		date = add_days(nowdate(), -42)
+		self._reconciled_transaction(14, date)
+
+		with patch("frappe.enqueue"):
+			sweep = start_validation_sweep(self.bank_account, date, date)
+			with patch(f"{SWEEP_MODULE}.recompute_clearance_for_transactions", side_effect=Exception("boom")):
+				with self.assertRaises(Exception):
+					process_sweep_chunk(sweep.name)
+
+		sweep.reload()
+		self.assertEqual(sweep.status, "Queued")
+		self.assertFalse(sweep.last_transaction)
+		self.assertEqual(sweep.error, "boom")
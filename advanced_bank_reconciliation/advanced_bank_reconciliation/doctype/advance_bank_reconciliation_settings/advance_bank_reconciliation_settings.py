@@ -3,6 +3,9 @@
 
 from frappe.model.document import Document
 
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index import (
+	enqueue_party_search_index_rebuild,
+)
 from advanced_bank_reconciliation.api.party_company import (
 	validate_enabled_bank_rules,
 	validate_party_company_settings,
@@ -21,6 +24,7 @@ class AdvanceBankReconciliationSettings(Document):
 		customer_company_field: DF.Autocomplete | None
 		employee_company_field: DF.Autocomplete | None
 		filter_parties_by_company: DF.Check
+		group_payment_entries_by_party: DF.Check
 		reconcile_unpaid_invoices_in_background: DF.Check
 		supplier_company_field: DF.Autocomplete | None
 		validate_selection_against_unallocated_amount: DF.Check
@@ -29,3 +33,16 @@ class AdvanceBankReconciliationSettings(Document):
 	def validate(self):
 		validate_party_company_settings(self)
 		validate_enabled_bank_rules(self)
+
+	def on_update(self):
+		# The party search index stores each party's company
+		if any(
+			self.has_value_changed(fieldname)
+			for fieldname in (
+				"filter_parties_by_company",
+				"customer_company_field",
+				"supplier_company_field",
+				"employee_company_field",
+			)
+		):
+			enqueue_party_search_index_rebuild()
@@ -125,37 +125,28 @@ class TestAdvanceBankReconciliationSettings(FrappeTestCase):
 
 	def test_disabled_settings_skip_rule_validation(self):
 		settings = frappe._dict(filter_parties_by_company=0)
-		with patch("frappe.get_all") as get_all:
+		with patch("frappe.db.sql_list") as sql_list:
 			validate_enabled_bank_rules(settings)
-		get_all.assert_not_called()
+		sql_list.assert_not_called()
 
 	def test_enabled_settings_reject_ineligible_rules_without_updating_them(self):
 		settings = frappe._dict(filter_parties_by_company=1)
-		rules = [
-			frappe._dict(
-				name="Rule One",
-				party_type="Customer",
-				party="_Test Customer",
-				company="_Test Company",
-			),
-			frappe._dict(
-				name="Rule Two",
-				party_type="Supplier",
-				party="_Test Supplier",
-				company="_Test Company",
-			),
-		]
 		with (
-			patch("frappe.get_all", return_value=rules),
 			patch(
-				"advanced_bank_reconciliation.api.party_company.is_party_eligible_for_company",
-				side_effect=[False, True],
+				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
+				return_value="company_scope",
 			),
+			patch("frappe.db.sql_list", side_effect=[["Rule Two"], [], ["Rule One"]]) as sql_list,
 			patch("frappe.db.set_value") as set_value,
 		):
 			with self.assertRaisesRegex(
 				frappe.ValidationError,
-				"Rule One.*correct or disable",
+				"Rule One, Rule Two.*correct or disable",
 			):
 				validate_enabled_bank_rules(settings)
 		set_value.assert_not_called()
+		self.assertEqual(
+			[call.args[1]["party_type"] for call in sql_list.call_args_list],
+			["Customer", "Supplier", "Employee"],
+		)
+		self.assertIn("INNER JOIN `tabCustomer` party", sql_list.call_args_list[0].args[0])
@@ -183,7 +183,7 @@ frappe.ui.form.on("Advance Bank Reconciliation Tool", {
 	get_account_opening_balance(frm) {
 		if (frm.doc.company && frm.doc.bank_account && frm.doc.bank_statement_from_date) {
 			frappe.call({
-				method: "erpnext.accounts.doctype.bank_reconciliation_tool.bank_reconciliation_tool.get_account_balance",
+				method: "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool.get_account_balance",
 				args: {
 					bank_account: frm.doc.bank_account,
 					till_date: frappe.datetime.add_days(frm.doc.bank_statement_from_date, -1),
@@ -199,7 +199,7 @@ frappe.ui.form.on("Advance Bank Reconciliation Tool", {
 	get_cleared_balance(frm) {
 		if (frm.doc.company && frm.doc.bank_account && frm.doc.bank_statement_to_date) {
 			return frappe.call({
-				method: "erpnext.accounts.doctype.bank_reconciliation_tool.bank_reconciliation_tool.get_account_balance",
+				method: "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool.get_account_balance",
 				args: {
 					bank_account: frm.doc.bank_account,
 					till_date: frm.doc.bank_statement_to_date,
@@ -242,7 +242,7 @@ frappe.ui.form.on("Advance Bank Reconciliation Tool", {
 		}
 
 		frappe.confirm(
-			__("This will queue background validation jobs for unvalidated transactions in the selected period. Continue?"),
+			__("This will re-validate every reconciled transaction in the selected period in the background. Continue?"),
 			function () {
 				frappe.call({
 					method: "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool.batch_validate_unvalidated_transactions",
@@ -250,7 +250,7 @@ frappe.ui.form.on("Advance Bank Reconciliation Tool", {
 						bank_account: frm.doc.bank_account,
 						from_date: frm.doc.bank_statement_from_date,
 						to_date: frm.doc.bank_statement_to_date,
-						limit: 100,
+						limit: 200,
 					},
 					callback: function (r) {
 						if (r.message && r.message.success) {
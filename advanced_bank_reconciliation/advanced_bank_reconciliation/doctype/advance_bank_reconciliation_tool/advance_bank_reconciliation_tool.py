@@ -3,11 +3,32 @@
 import json
 
 import frappe
+from advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache import (
+	get_cached_account_balance,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.change_feed import bump_change_versions
+from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import (
+	clear_journal_entries,
+	recompute_clearance_dates,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot import (
+	get_cleared_amount,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_reconciliation_job.abr_reconciliation_job import (
+	get_or_create_reconciliation_job,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_validation_sweep.abr_validation_sweep import (
+	start_validation_sweep,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.party_titles import get_party_titles
+from advanced_bank_reconciliation.advanced_bank_reconciliation.validation_queue import request_validation
 from advanced_bank_reconciliation.api.permission import (
 	assert_company_access,
 	assert_party_access,
 )
+from advanced_bank_reconciliation.utils.locks import ABRLock, LockLostError
 from advanced_bank_reconciliation.utils.logger import get_logger
+from advanced_bank_reconciliation.utils.progress import ProgressReporter
 from erpnext import get_default_cost_center
 from erpnext.accounts.doctype.bank_transaction.bank_transaction import (
 	get_total_allocated_amount,
@@ -25,49 +46,16 @@ from frappe.utils import cint, create_batch, flt, getdate
 
 logger = get_logger()
 
+# How long a request keeps a Bank Transaction locked while its bulk job waits
+# in the queue; the job adopts the lock and renews it once it starts.
+BULK_ENQUEUE_LOCK_TTL = 600
+# RQ timeout of a bulk reconciliation job, the longest a reconciliation runs
+BULK_RECONCILIATION_TIMEOUT = 3600
+
 class AdvanceBankReconciliationTool(Document):
 	pass
 
 
-def _get_party_display_value(doctype, docname, display_cache=None, meta_cache=None):
-	"""Resolve a human-readable display value for a linked party-like document."""
-	if not doctype or not docname:
-		return ""
-
-	cache_key = (doctype, docname)
-	if display_cache is not None and cache_key in display_cache:
-		return display_cache[cache_key]
-
-	title_field_map = {
-		"Customer": "customer_name",
-		"Supplier": "supplier_name",
-		"Employee": "employee_name",
-	}
-
-	fieldname = title_field_map.get(doctype)
-	if not fieldname:
-		try:
-			meta = meta_cache.get(doctype) if meta_cache is not None else None
-			if meta is None:
-				meta = frappe.get_meta(doctype)
-				if meta_cache is not None:
-					meta_cache[doctype] = meta
-			fieldname = meta.title_field or "name"
-		except Exception:
-			fieldname = "name"
-
-	try:
-		display_value = frappe.db.get_value(doctype, docname, fieldname)
-	except Exception:
-		display_value = None
-
-	display_value = display_value or docname
-	if display_cache is not None:
-		display_cache[cache_key] = display_value
-
-	return display_value
-
-
 def _get_je_linked_party_reference(accounts, bank_account):
 	"""Find the non-bank-side party source for a Journal Entry allocation."""
 	for account in accounts:
@@ -144,13 +132,10 @@ def _add_party_display_to_reconciled_transactions(transactions):
 		):
 			purchase_invoices[row.name] = row
 
-	display_cache = {}
-	meta_cache = {}
-
 	bank_gl_account_cache = {}
+	party_references = []
 
 	for transaction in transactions:
-		transaction["party_display"] = ""
 		payment_document = transaction.get("payment_document")
 		docname = transaction.get("payment_entry")
 
@@ -177,12 +162,11 @@ def _add_party_display_to_reconciled_transactions(transactions):
 			party_type = "Supplier"
 			party = purchase_invoices[docname].get("supplier")
 
-		transaction["party_display"] = _get_party_display_value(
-			party_type,
-			party,
-			display_cache=display_cache,
-			meta_cache=meta_cache,
-		)
+		party_references.append((party_type, party))
+
+	party_titles = get_party_titles(party_references)
+	for transaction, reference in zip(transactions, party_references, strict=True):
+		transaction["party_display"] = party_titles.get(reference, "")
 
 
 @frappe.whitelist()
@@ -306,8 +290,12 @@ def get_reconciled_bank_transactions(bank_account, from_date=None, to_date=None)
 	return transactions
 
 @frappe.whitelist()
-def get_account_balance(bank_account, till_date):
-	# returns account balance till the specified date
+def get_account_balance(bank_account, till_date, company=None):
+	# returns account balance till the specified date, see balance_cache
+	return get_cached_account_balance(bank_account, till_date)
+
+
+def compute_account_balance(bank_account, till_date):
 	account = frappe.db.get_value("Bank Account", bank_account, "account")
 	filters = frappe._dict({"account": account, "report_date": till_date, "include_pos_transactions": 1})
 	data = get_entries(filters)
@@ -752,39 +740,24 @@ def start_auto_reconcile(
 
 	reconciled, partially_reconciled = set(), set()
 	for transaction in bank_transactions:
-		linked_payments = get_linked_payments(
-			transaction.name,
-			["payment_entry", "journal_entry"],
-			from_date,
-			to_date,
-			filter_by_reference_date,
-			from_reference_date,
-			to_reference_date,
-		)
-
-		if not linked_payments:
+		# Skip transactions a bulk reconciliation or rule run is working on
+		lock = ABRLock(f"bank_transaction:{transaction.name}")
+		if not lock.acquire(renew=False):
+			logger.info("Skipping auto reconcile of %s: it is locked by another process", transaction.name)
 			continue
-
-		# Convert tuple format to dict format for processing
-		# linked_payments returns tuples: (rank, doctype, name, paid_amount, ...)
-		vouchers = list(
-			map(
-				lambda entry: {
-					"payment_doctype": entry[1],  # doctype
-					"payment_name": entry[2],      # name
-					"amount": entry[3],            # paid_amount
-				},
-				linked_payments,
+		try:
+			_auto_reconcile_transaction(
+				transaction,
+				from_date,
+				to_date,
+				filter_by_reference_date,
+				from_reference_date,
+				to_reference_date,
+				reconciled,
+				partially_reconciled,
 			)
-		)
-
-		updated_transaction = reconcile_vouchers(transaction.name, json.dumps(vouchers))
-
-		if updated_transaction.status == "Reconciled":
-			reconciled.add(updated_transaction.name)
-		elif flt(transaction.unallocated_amount) != flt(updated_transaction.unallocated_amount):
-			# Partially reconciled (status = Unreconciled & unallocated amount changed)
-			partially_reconciled.add(updated_transaction.name)
+		finally:
+			lock.release()
 
 	alert_message, indicator = get_auto_reconcile_message(partially_reconciled, reconciled)
 	frappe.msgprint(title=_("Auto Reconciliation"), msg=alert_message, indicator=indicator)
@@ -792,6 +765,53 @@ def start_auto_reconcile(
 	frappe.flags.auto_reconcile_vouchers = False
 
 
+def _auto_reconcile_transaction(
+	transaction,
+	from_date,
+	to_date,
+	filter_by_reference_date,
+	from_reference_date,
+	to_reference_date,
+	reconciled,
+	partially_reconciled,
+):
+	"""Match and reconcile one Bank Transaction, recording the outcome in the
+	`reconciled` / `partially_reconciled` sets."""
+	linked_payments = get_linked_payments(
+		transaction.name,
+		["payment_entry", "journal_entry"],
+		from_date,
+		to_date,
+		filter_by_reference_date,
+		from_reference_date,
+		to_reference_date,
+	)
+
+	if not linked_payments:
+		return
+
+	# Convert tuple format to dict format for processing
+	# linked_payments returns tuples: (rank, doctype, name, paid_amount, ...)
+	vouchers = list(
+		map(
+			lambda entry: {
+				"payment_doctype": entry[1],  # doctype
+				"payment_name": entry[2],      # name
+				"amount": entry[3],            # paid_amount
+			},
+			linked_payments,
+		)
+	)
+
+	updated_transaction = reconcile_vouchers(transaction.name, json.dumps(vouchers))
+
+	if updated_transaction.status == "Reconciled":
+		reconciled.add(updated_transaction.name)
+	elif flt(transaction.unallocated_amount) != flt(updated_transaction.unallocated_amount):
+		# Partially reconciled (status = Unreconciled & unallocated amount changed)
+		partially_reconciled.add(updated_transaction.name)
+
+
 def get_auto_reconcile_message(partially_reconciled, reconciled):
 	"""Returns alert message and indicator for auto reconciliation depending on result state."""
 	alert_message, indicator = "", "blue"
@@ -1759,7 +1779,7 @@ def create_payment_entries_for_invoices(bank_transaction_name, invoices, auto_re
 
 
 @frappe.whitelist()
-def create_payment_entries_bulk(bank_transaction_name, invoices, regular_vouchers=None):
+def create_payment_entries_bulk(bank_transaction_name, invoices, regular_vouchers=None, group_by_party=None):
 	"""
 	Unified enqueue for reconciliation via background job (small or large).
 	Performs synchronous pre-validation, then queues the job and returns job_id.
@@ -1768,6 +1788,9 @@ def create_payment_entries_bulk(bank_transaction_name, invoices, regular_voucher
 		bank_transaction_name: Bank Transaction to reconcile against
 		invoices: list of dicts {doctype, name, allocated_amount}
 		regular_vouchers: optional list of dicts {payment_doctype, payment_name, amount}
+		group_by_party: create one Payment Entry per (party_type, party, payment_type)
+			instead of one per invoice. Defaults to the "Group payment entries by
+			party" setting.
 	"""
 	import json
 
@@ -1778,6 +1801,10 @@ def create_payment_entries_bulk(bank_transaction_name, invoices, regular_voucher
 		regular_vouchers = json.loads(regular_vouchers)
 	elif regular_vouchers is None:
 		regular_vouchers = []
+	if group_by_party is None:
+		group_by_party = frappe.get_single_value("Advance Bank Reconciliation Settings", "group_payment_entries_by_party")
+	elif isinstance(group_by_party, str):
+		group_by_party = group_by_party.lower() in ["true", "1", "yes"]
 
 	if not invoices and not regular_vouchers:
 		frappe.throw(_("No vouchers selected for reconciliation"))
@@ -1848,32 +1875,26 @@ def create_payment_entries_bulk(bank_transaction_name, invoices, regular_voucher
 		seen.add(key)
 		deduped_invoices.append(inv)
 
-	# Apply a short-lived lock to avoid duplicate enqueues for the same BT
-	lock_key = f"abr:recon:lock:{bank_transaction_name}"
-	cache = frappe.cache()
-	if cache.get_value(lock_key):
+	# Lock the BT to avoid duplicate enqueues; the job adopts the lock and releases it
+	lock = ABRLock(f"bank_transaction:{bank_transaction_name}", ttl=BULK_ENQUEUE_LOCK_TTL)
+	if not lock.acquire(renew=False):
 		frappe.throw(_("Another reconciliation is already in progress for this Bank Transaction. Please wait."))
-	cache.set_value(lock_key, "1", expires_in_sec=60)  # short enqueue lock; job will release
 
 	# Generate a unique job ID for tracking progress
 	job_id = frappe.generate_hash(length=10)
 
 	try:
-		# Enqueue the background job
-		frappe.enqueue(
-			method=process_bulk_reconciliation,
-			queue="long",
-			timeout=3600,  # 1 hour timeout
-			# If reconcile_unpaid_invoices_in_background is True, then the job will be executed immediately
-			now=not reconcile_unpaid_invoices_in_background,
-			job_name=f"bulk_reconciliation_{bank_transaction_name}_{job_id}",
-			bank_transaction_name=bank_transaction_name,
-			invoices=deduped_invoices,
-			regular_vouchers=regular_vouchers or [],
-			job_id=job_id,
-			_job_id=job_id,
-			user=frappe.session.user
+		# Persist the selection first so the job can be resumed if its worker dies
+		job = get_or_create_reconciliation_job(
+			job_id,
+			bank_transaction_name,
+			deduped_invoices,
+			regular_vouchers or [],
+			frappe.session.user,
+			group_by_party=bool(group_by_party),
 		)
+		# If reconcile_unpaid_invoices_in_background is unset, the job is executed immediately
+		enqueue_bulk_reconciliation(job, now=not reconcile_unpaid_invoices_in_background, lock_token=lock.token)
 
 		return {
 			"status": "completed" if not reconcile_unpaid_invoices_in_background else "queued",
@@ -1885,121 +1906,178 @@ def create_payment_entries_bulk(bank_transaction_name, invoices, regular_voucher
 		}
 	except Exception as e:
 		# Release lock if enqueue fails
-		cache.delete_value(lock_key)
+		lock.release()
 		logger.error("Failed to enqueue bulk reconciliation for %s: %s", bank_transaction_name, str(e), exc_info=True)
 		frappe.throw(_("Failed to start bulk reconciliation: {0}").format(str(e)))
 
 
-def process_bulk_reconciliation(bank_transaction_name, invoices, regular_vouchers, _job_id, user):
+def enqueue_bulk_reconciliation(job, now=False, lock_token=None):
+	"""Enqueue process_bulk_reconciliation for a persisted ABR Reconciliation Job.
+
+	`lock_token` hands the caller's Bank Transaction lock over to the job.
+	"""
+	frappe.enqueue(
+		method=process_bulk_reconciliation,
+		queue="long",
+		timeout=BULK_RECONCILIATION_TIMEOUT,
+		now=now,
+		# A background run must not start before the job record it reads is committed
+		enqueue_after_commit=not now,
+		job_name=f"bulk_reconciliation_{job.bank_transaction}_{job.job_id}",
+		bank_transaction_name=job.bank_transaction,
+		invoices=job.get_invoices(),
+		regular_vouchers=job.get_regular_vouchers(),
+		job_id=job.job_id,
+		_job_id=job.job_id,
+		user=job.user,
+		group_by_party=bool(job.group_by_party),
+		lock_token=lock_token,
+	)
+
+
+def process_bulk_reconciliation(
+	bank_transaction_name, invoices, regular_vouchers, _job_id, user, group_by_party=False, lock_token=None
+):
 	"""
 	Process bulk reconciliation in background with batching and progress updates.
 	This function handles large numbers of invoices without timing out.
+
+	With group_by_party, invoices sharing (party_type, party, payment_type)
+	are settled by one Payment Entry per group instead of one per invoice.
+
+	Progress is recorded on the ABR Reconciliation Job in the same transaction
+	as each batch of Payment Entries. If the worker dies, the job is picked up
+	again (see abr_reconciliation_job.resume_interrupted_jobs), skips the
+	committed batches and links the Payment Entries they created.
+
+	The Bank Transaction lock taken by create_payment_entries_bulk is adopted
+	through `lock_token` (a resumed job acquires it afresh) and renewed while
+	the job runs. Every commit is fenced on still holding it.
+
+	Progress is reported per invoice through a ProgressReporter, which
+	coalesces the realtime events and keeps the latest state in Redis for
+	get_progress_snapshot.
 	"""
+	from rq.timeouts import JobTimeoutException
+
 	frappe.set_user(user)
 	logger = get_logger()
 
+	job = get_or_create_reconciliation_job(
+		_job_id, bank_transaction_name, invoices, regular_vouchers, user, group_by_party
+	)
+	if not job.is_active():
+		logger.info("Reconciliation job %s is already %s, nothing to do", job.name, job.phase)
+		return
+
+	lock = ABRLock(f"bank_transaction:{bank_transaction_name}")
+	if not lock.adopt(lock_token) and not lock.acquire(wait=30):
+		# Left active: the scheduler retries once the other holder is done
+		logger.warning(
+			"Reconciliation job %s could not lock %s; another reconciliation holds it",
+			job.name,
+			bank_transaction_name,
+		)
+		return
+
+	job.start_attempt()
+	frappe.db.commit()
+
+	invoices = job.get_invoices()
+	regular_vouchers = job.get_regular_vouchers()
+	group_by_party = bool(job.group_by_party)
+
 	total_invoices = len(invoices)
 	batch_size = 100  # Process 100 invoices at a time to avoid DB transaction issues
-	processed = 0
-	failed = 0
-	all_vouchers = []
+	# Resume counters and Payment Entries from batches committed by an earlier attempt
+	processed = cint(job.processed_invoices)
+	failed = cint(job.failed_invoices)
+	all_vouchers = job.get_created_vouchers()
 	# Keep the first per-invoice failure so we can surface it on the
 	# completion event. The background logger already has the full trace;
 	# the UI toast previously only said "No payment entries were created",
 	# which hides the actual validation reason.
-	first_error = None
+	first_error = job.get_first_error()
+	progress = ProgressReporter(_job_id, total_invoices, user=user)
 
 	try:
 		validate_selection_against_unallocated_amount = frappe.get_single_value("Advance Bank Reconciliation Settings", "validate_selection_against_unallocated_amount")
 		# Send initial progress update
-		publish_progress(_job_id, 0, total_invoices, "Starting bulk reconciliation...")
+		progress.update(0, "Starting bulk reconciliation...", force=True)
 
 		bank_transaction = frappe.get_doc("Bank Transaction", bank_transaction_name)
 
 		# Re-validate available unallocated amount at job start
 		if flt(bank_transaction.unallocated_amount) <= 0:
 			raise Exception("Bank Transaction has no unallocated amount to reconcile")
-		
-		# Process invoices in batches
-		for batch_start in range(0, total_invoices, batch_size):
-			batch_end = min(batch_start + batch_size, total_invoices)
-			batch = invoices[batch_start:batch_end]
-			
-			# Process this batch
-			batch_vouchers = []
-			for invoice_data in batch:
-				try:
-					invoice_name = invoice_data.get("name")
-					invoice_type = invoice_data.get("doctype")
-					allocated_amount = flt(invoice_data.get("allocated_amount", 0))
-					
-					if not invoice_name or not invoice_type or allocated_amount == 0:
-						continue
-					
-					# Determine the actual doctype (remove 'Unpaid ' prefix)
-					actual_doctype = invoice_type.replace("Unpaid ", "")
-					
-					# Get the invoice document
-					invoice_doc = frappe.get_doc(actual_doctype, invoice_name)
-					
-					# Determine payment type based on invoice type and allocated amount
-					if actual_doctype == "Sales Invoice":
-						payment_type = "Pay" if allocated_amount < 0 else "Receive"
-						party_type = "Customer"
-						party = invoice_doc.customer
-					else:  # Purchase Invoice
-						payment_type = "Receive" if allocated_amount < 0 else "Pay"
-						party_type = "Supplier"
-						party = invoice_doc.supplier
-					
-					# Create payment entry
-					payment_entry = create_payment_entry_for_invoice(
-						invoice_doc,
-						bank_transaction,
-						allocated_amount,
-						payment_type,
-						party_type,
-						party,
-					)
-					
-					batch_vouchers.append({
-						"payment_doctype": "Payment Entry",
-						"payment_name": payment_entry.name,
-						"amount": allocated_amount,
-					})
-					
-					processed += 1
-					
-				except Exception as e:
-					logger.exception("Error processing invoice %s: %s", invoice_data.get("name"), str(e))
-					failed += 1
-					if first_error is None:
-						first_error = {
-							"invoice": invoice_data.get("name"),
-							"message": str(e),
-						}
-					continue
-			
-			# Commit this batch
+
+		if job.phase != "Reconciling":
+			job.set_phase("Creating Payment Entries")
+
+			# Each unit becomes one Payment Entry: a single invoice, or every
+			# invoice of one party when grouping is enabled.
+			if group_by_party:
+				units = _group_invoices_by_party(invoices)
+			else:
+				units = [[invoice_data] for invoice_data in invoices]
+
+			committed_units = cint(job.committed_units)
+			if committed_units:
+				logger.info(
+					"Resuming reconciliation job %s after %s committed units (%s payment entries)",
+					job.name,
+					committed_units,
+					len(all_vouchers),
+				)
+			invoices_done = sum(len(unit) for unit in units[:committed_units])
+
+			# Process units in batches of roughly batch_size invoices
+			for batch in _batch_units(units[committed_units:], batch_size):
+				# Process this batch
+				batch_vouchers = []
+				for unit in batch:
+					try:
+						voucher = _create_payment_entry_for_unit(unit, bank_transaction)
+						if voucher:
+							batch_vouchers.append(voucher)
+							processed += len(unit)
+
+					except (JobTimeoutException, LockLostError):
+						raise
+					except Exception as e:
+						unit_names = ", ".join(str(invoice_data.get("name")) for invoice_data in unit)
+						logger.exception("Error processing invoice %s: %s", unit_names, str(e))
+						failed += len(unit)
+						if first_error is None:
+							first_error = {
+								"invoice": unit_names,
+								"message": str(e),
+							}
+
+					invoices_done += len(unit)
+					progress.update(invoices_done, f"Processed {invoices_done} of {total_invoices} invoices...")
+
+				# Commit this batch together with the job's record of it
+				lock.assert_held()
+				job.record_batch(batch_vouchers, len(batch), processed, failed, first_error)
+				frappe.db.commit()
+				all_vouchers.extend(batch_vouchers)
+
+				# Small delay to prevent overwhelming the system
+				import time
+				time.sleep(0.1)
+
+			job.set_phase("Reconciling")
 			frappe.db.commit()
-			all_vouchers.extend(batch_vouchers)
-			
-			# Send progress update
-			publish_progress(
-				_job_id, 
-				batch_end, 
-				total_invoices, 
-				f"Processed {batch_end} of {total_invoices} invoices..."
-			)
-			
-			# Small delay to prevent overwhelming the system
-			import time
-			time.sleep(0.1)
-		
+
+		# Vouchers linked by an earlier attempt must not be allocated twice
+		all_vouchers = _exclude_linked_vouchers(bank_transaction_name, all_vouchers)
+		regular_vouchers = _exclude_linked_vouchers(bank_transaction_name, regular_vouchers)
+
 		# If there were no invoices to convert to PEs but we have regular vouchers,
 		# reconcile those directly.
 		if not all_vouchers and regular_vouchers:
-			publish_progress(_job_id, total_invoices, total_invoices, "Reconciling selected vouchers...")
+			progress.update(total_invoices, "Reconciling selected vouchers...", force=True)
 
 			# Final safety check against current unallocated amount
 			current_bt = frappe.get_doc("Bank Transaction", bank_transaction_name)
@@ -2013,10 +2091,11 @@ def process_bulk_reconciliation(bank_transaction_name, invoices, regular_voucher
 				)
 
 			updated_transaction = reconcile_vouchers(bank_transaction_name, json.dumps(regular_vouchers))
+			lock.assert_held()
+			job.set_phase("Completed")
 			frappe.db.commit()
 
-			publish_completion(
-				_job_id,
+			progress.complete(
 				success=True,
 				message="Successfully reconciled selected vouchers with bank transaction",
 				processed=processed,
@@ -2027,7 +2106,8 @@ def process_bulk_reconciliation(bank_transaction_name, invoices, regular_voucher
 
 		# Now reconcile all created payment entries with the bank transaction
 		if all_vouchers:
-			publish_progress(_job_id, total_invoices, total_invoices, "Reconciling payment entries...")
+			progress.update(total_invoices, "Reconciling payment entries...", force=True)
+			created_count = len(all_vouchers)
 
 			# Add regular vouchers if any
 			if regular_vouchers:
@@ -2052,13 +2132,18 @@ def process_bulk_reconciliation(bank_transaction_name, invoices, regular_voucher
 				)
 
 			updated_transaction = reconcile_vouchers(bank_transaction_name, json.dumps(all_vouchers))
+			lock.assert_held()
+			job.set_phase("Completed")
 			frappe.db.commit()
 			
 			# Send completion notification
-			publish_completion(
-				_job_id,
+			if group_by_party:
+				completion_message = f"Successfully created {created_count} payment entries for {processed} invoices and reconciled bank transaction"
+			else:
+				completion_message = f"Successfully created {processed} payment entries and reconciled bank transaction"
+			progress.complete(
 				success=True,
-				message=f"Successfully created {processed} payment entries and reconciled bank transaction",
+				message=completion_message,
 				processed=processed,
 				failed=failed,
 				bank_transaction=updated_transaction.name
@@ -2069,61 +2154,211 @@ def process_bulk_reconciliation(bank_transaction_name, invoices, regular_voucher
 					f"No payment entries were created. First failure on {first_error['invoice']}: {first_error['message']}"
 				)
 			raise Exception("No payment entries were created")
-			
+
+	except (JobTimeoutException, LockLostError) as e:
+		# The worker is being stopped or lost its lock, not the reconciliation
+		# refused: keep the committed batches so the scheduler can resume the job.
+		frappe.db.rollback()
+		logger.error("Bulk reconciliation job %s interrupted: %s", _job_id, str(e))
+		progress.flush()
+		job.reload()
+		job.db_set("error", str(e) or "Job timed out")
+		frappe.db.commit()
+		raise
+
 	except Exception as e:
 		frappe.db.rollback()
 		logger.error("Bulk reconciliation failed: %s", str(e), exc_info=True)
 		
-		# Try to delete any partially created payment entries
-		cleanup_failed_reconciliation(all_vouchers)
+		# Cancel the payment entries committed for this job. Only the job's own
+		# entries are touched; regular vouchers selected by the user stay as
+		# they were.
+		job.reload()
+		cleanup_failed_reconciliation(job.get_created_vouchers())
+		job.set_phase("Failed", error=str(e))
+		frappe.db.commit()
 		
 		# Send failure notification
-		publish_completion(
-			_job_id,
+		progress.complete(
 			success=False,
 			message=f"Bulk reconciliation failed: {str(e)}",
 			processed=processed,
-			failed=failed
+			failed=failed,
+			bank_transaction=None,
 		)
 		raise
 	finally:
-		# Always release the enqueue lock (if any)
+		# Always release the Bank Transaction lock; a lost lock is left alone
 		try:
-			lock_key = f"abr:recon:lock:{bank_transaction_name}"
-			frappe.cache().delete_value(lock_key)
+			lock.release()
 		except Exception:
-			pass
+			logger.warning("Failed to release lock for %s", bank_transaction_name, exc_info=True)
 
+		# The job's batches were committed over its whole run, later than the
+		# change feed's overlap covers: make open listings reload
+		try:
+			bump_change_versions([frappe.db.get_value("Bank Transaction", bank_transaction_name, "bank_account")])
+		except Exception:
+			logger.warning("Failed to bump the change version for %s", bank_transaction_name, exc_info=True)
 
-def publish_progress(job_id, current, total, message):
-	"""Publish progress update via realtime"""
-	frappe.publish_realtime(
-		event="bulk_reconciliation_progress",
-		message={
-			"job_id": job_id,
-			"current": current,
-			"total": total,
-			"percentage": int((current / total) * 100) if total > 0 else 0,
-			"message": message
-		},
-		user=frappe.session.user
-	)
 
+def _exclude_linked_vouchers(bank_transaction_name, vouchers):
+	"""Drop vouchers that are already allocated to the Bank Transaction."""
+	if not vouchers:
+		return []
 
-def publish_completion(job_id, success, message, processed=0, failed=0, bank_transaction=None):
-	"""Publish completion notification"""
-	frappe.publish_realtime(
-		event="bulk_reconciliation_complete",
-		message={
-			"job_id": job_id,
-			"success": success,
-			"message": message,
-			"processed": processed,
-			"failed": failed,
-			"bank_transaction": bank_transaction
-		},
-		user=frappe.session.user
-	)
+	linked = {
+		(row.payment_document, row.payment_entry)
+		for row in frappe.get_all(
+			"Bank Transaction Payments",
+			filters={"parent": bank_transaction_name, "parenttype": "Bank Transaction"},
+			fields=["payment_document", "payment_entry"],
+		)
+	}
+	return [
+		voucher
+		for voucher in vouchers
+		if (voucher.get("payment_doctype"), voucher.get("payment_name")) not in linked
+	]
+
+
+def _get_invoice_payment_details(invoice_doctype, allocated_amount):
+	"""Return (payment_type, party_type) for settling `allocated_amount` of an
+	invoice from the bank."""
+	if invoice_doctype == "Sales Invoice":
+		# For negative amounts (returns), money goes out (Pay), otherwise money comes in (Receive)
+		return ("Pay" if allocated_amount < 0 else "Receive"), "Customer"
+
+	# Purchase Invoice: for negative amounts (returns), money comes in (Receive), otherwise money goes out (Pay)
+	return ("Receive" if allocated_amount < 0 else "Pay"), "Supplier"
+
+
+def _group_invoices_by_party(invoices):
+	"""Split invoice selections into groups that can share one Payment Entry.
+
+	Invoices are grouped by (party_type, party, payment_type) and by their
+	receivable/payable account, since a Payment Entry posts to a single party
+	account. Groups keep the order of their first invoice, and invoices keep
+	their selection order within a group.
+	"""
+	names_by_doctype = {}
+	for invoice_data in invoices:
+		invoice_type = invoice_data.get("doctype")
+		if invoice_data.get("name") and invoice_type:
+			names_by_doctype.setdefault(invoice_type.replace("Unpaid ", ""), set()).add(invoice_data.get("name"))
+
+	party_fields = {
+		"Sales Invoice": ("customer", "debit_to"),
+		"Purchase Invoice": ("supplier", "credit_to"),
+	}
+	invoice_parties = {}
+	for doctype, names in names_by_doctype.items():
+		if doctype not in party_fields:
+			continue
+		party_field, account_field = party_fields[doctype]
+		for row in frappe.get_all(
+			doctype,
+			filters={"name": ["in", list(names)]},
+			fields=["name", f"{party_field} as party", f"{account_field} as party_account"],
+		):
+			invoice_parties[(doctype, row.name)] = row
+
+	groups = {}
+	for invoice_data in invoices:
+		invoice_type = (invoice_data.get("doctype") or "").replace("Unpaid ", "")
+		allocated_amount = flt(invoice_data.get("allocated_amount", 0))
+		details = invoice_parties.get((invoice_type, invoice_data.get("name")))
+		if not details:
+			# Unknown or incomplete selections are kept on their own so the
+			# per-invoice path reports them exactly as before.
+			groups[("invoice", len(groups))] = [invoice_data]
+			continue
+
+		payment_type, party_type = _get_invoice_payment_details(invoice_type, allocated_amount)
+		key = (party_type, details.party, payment_type, details.party_account)
+		groups.setdefault(key, []).append(invoice_data)
+
+	return list(groups.values())
+
+
+def _batch_units(units, batch_size):
+	"""Yield lists of units holding about `batch_size` invoices each.
+
+	A unit larger than batch_size still forms a single batch because its
+	Payment Entry has to be created in one transaction.
+	"""
+	batch = []
+	batch_invoices = 0
+	for unit in units:
+		if batch and batch_invoices + len(unit) > batch_size:
+			yield batch
+			batch = []
+			batch_invoices = 0
+		batch.append(unit)
+		batch_invoices += len(unit)
+	if batch:
+		yield batch
+
+
+def _create_payment_entry_for_unit(unit, bank_transaction):
+	"""Create the Payment Entry for one unit of invoice selections and return
+	the voucher row to reconcile, or None when nothing was selected."""
+	invoice_allocations = []
+	payment_details = None
+	for invoice_data in unit:
+		invoice_name = invoice_data.get("name")
+		invoice_type = invoice_data.get("doctype")
+		allocated_amount = flt(invoice_data.get("allocated_amount", 0))
+
+		if not invoice_name or not invoice_type or allocated_amount == 0:
+			continue
+
+		# Determine the actual doctype (remove 'Unpaid ' prefix)
+		actual_doctype = invoice_type.replace("Unpaid ", "")
+
+		# Get the invoice document
+		invoice_doc = frappe.get_doc(actual_doctype, invoice_name)
+
+		payment_type, party_type = _get_invoice_payment_details(actual_doctype, allocated_amount)
+		party = invoice_doc.customer if party_type == "Customer" else invoice_doc.supplier
+		details = (payment_type, party_type, party)
+		if payment_details and details != payment_details:
+			frappe.throw(
+				_("Invoice {0} cannot share a Payment Entry with {1}").format(
+					invoice_name, invoice_allocations[0][0].name
+				)
+			)
+		payment_details = details
+		invoice_allocations.append((invoice_doc, allocated_amount))
+
+	if not invoice_allocations:
+		return None
+
+	payment_type, party_type, party = payment_details
+	if len(invoice_allocations) == 1:
+		invoice_doc, allocated_amount = invoice_allocations[0]
+		payment_entry = create_payment_entry_for_invoice(
+			invoice_doc,
+			bank_transaction,
+			allocated_amount,
+			payment_type,
+			party_type,
+			party,
+		)
+	else:
+		payment_entry = create_payment_entry_for_invoice_group(
+			invoice_allocations,
+			bank_transaction,
+			payment_type,
+			party_type,
+			party,
+		)
+
+	return {
+		"payment_doctype": "Payment Entry",
+		"payment_name": payment_entry.name,
+		"amount": sum(allocated_amount for _invoice, allocated_amount in invoice_allocations),
+	}
 
 
 def cleanup_failed_reconciliation(vouchers):
@@ -2301,10 +2536,57 @@ def _normalise_pe_to_target_invoice(pe, invoice_doc, allocated_amount):
 
 def create_payment_entry_for_invoice(invoice_doc, bank_transaction, allocated_amount, payment_type, party_type, party):
 	"""Create a payment entry for an unpaid invoice."""
-	from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+	bank_account_doc = frappe.get_doc("Bank Account", bank_transaction.bank_account)
+
+	payment_entry = _build_invoice_payment_entry(
+		invoice_doc, allocated_amount, payment_type, bank_account_doc
+	)
+	_submit_bank_payment_entry(payment_entry, bank_transaction)
+
+	return payment_entry
+
+
+def create_payment_entry_for_invoice_group(invoice_allocations, bank_transaction, payment_type, party_type, party):
+	"""Create a single payment entry settling several invoices of one party.
+
+	`invoice_allocations` is a list of (invoice_doc, allocated_amount) pairs
+	that share party, party account and payment direction. Each invoice is
+	normalised on its own through _normalise_pe_to_target_invoice, so payment
+	term cascading, over-allocation guards and signed caps behave exactly as
+	they do for one-invoice payment entries; the resulting reference rows are
+	then merged onto the first invoice's payment entry.
+	"""
+	if not invoice_allocations:
+		frappe.throw(_("No invoices given for the grouped payment entry"))
 
-	# Get the bank account from bank transaction
 	bank_account_doc = frappe.get_doc("Bank Account", bank_transaction.bank_account)
+
+	first_invoice, first_amount = invoice_allocations[0]
+	payment_entry = _build_invoice_payment_entry(
+		first_invoice, first_amount, payment_type, bank_account_doc
+	)
+
+	for invoice_doc, allocated_amount in invoice_allocations[1:]:
+		invoice_entry = _build_invoice_payment_entry(
+			invoice_doc, allocated_amount, payment_type, bank_account_doc
+		)
+		for ref in invoice_entry.references:
+			payment_entry.append("references", ref.as_dict(no_default_fields=True))
+
+	placed = sum(flt(ref.allocated_amount) for ref in payment_entry.references)
+	payment_entry.paid_amount = abs(placed)
+	payment_entry.received_amount = abs(placed)
+
+	_submit_bank_payment_entry(payment_entry, bank_transaction)
+
+	return payment_entry
+
+
+def _build_invoice_payment_entry(invoice_doc, allocated_amount, payment_type, bank_account_doc):
+	"""Return an unsaved payment entry for `allocated_amount` of one invoice,
+	posted against the bank account's GL account."""
+	from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+
 	bank_gl_account = bank_account_doc.account
 
 	# Pass party_amount so ERPNext sizes the PE references to the partial
@@ -2331,6 +2613,10 @@ def create_payment_entry_for_invoice(invoice_doc, bank_transaction, allocated_am
 	# to the caller's allocation. See helper for the full rationale.
 	_normalise_pe_to_target_invoice(payment_entry, invoice_doc, allocated_amount)
 
+	return payment_entry
+
+
+def _submit_bank_payment_entry(payment_entry, bank_transaction):
 	# Set reference details from bank transaction. Fall back to the Bank
 	# Transaction name when both reference_number and description are empty,
 	# because ERPNext's Payment Entry validation rejects a Bank-type PE with
@@ -2350,232 +2636,38 @@ def create_payment_entry_for_invoice(invoice_doc, bank_transaction, allocated_am
 	payment_entry.insert()
 	payment_entry.submit()
 
-	return payment_entry
-
 
 @frappe.whitelist()
 def get_cleared_balance(bank_account, from_date, till_date):
-	print("Calculating cleared balance", bank_account, from_date, till_date)
+	"""Opening balance at `from_date` plus everything cleared up to
+	`till_date`, read from the daily cleared-balance snapshots."""
 	opening_balance = get_account_balance(bank_account, from_date)
-
-	bank_transaction = frappe.qb.DocType("Bank Transaction")
-	bt_payments = frappe.qb.DocType("Bank Transaction Payments")
-	payment_entry = frappe.qb.DocType("Payment Entry")
-
-	payment_entries = frappe.db.sql(
-		"""
-		select
-			btp.payment_document,
-			pe.name as payment_entry,
-			CASE 
-				WHEN pe.payment_type = 'Receive' AND pe.paid_to = %(account)s THEN pe.received_amount
-				ELSE 0 
-			END as debit,
-			CASE 
-				WHEN pe.payment_type = 'Pay' AND pe.paid_from = %(account)s THEN pe.paid_amount
-				ELSE 0 
-			END as credit,
-			pe.posting_date, 
-			ifnull(pe.party,if(pe.paid_from=%(account)s,pe.paid_to,pe.paid_from)) as against_account, 
-			pe.clearance_date,
-			if(pe.paid_to=%(account)s, pe.paid_to_account_currency, pe.paid_from_account_currency) as account_currency
-		from `tabBank Transaction` as bt
-		inner join `tabBank Transaction Payments` as btp on bt.name = btp.parent
-		inner join `tabPayment Entry` as pe on btp.payment_entry = pe.name
-		where
-			bt.bank_account = %(account)s
-			and bt.docstatus = 1
-			and bt.unallocated_amount = 0.0
-			and bt.date <= %(till_date)s
-			and bt.date >= %(from_date)s
-			and btp.payment_document = "Payment Entry"
-		""",
-		{
-			"account": bank_account,
-			"from_date": from_date,
-			"till_date": till_date,
-		},
-		as_dict=True
-	)
-
-	journal_entries = frappe.db.sql(
-		"""
-		select
-			btp.payment_document,
-			je.name as payment_entry,
-			jea.debit_in_account_currency as debit,
-			jea.credit_in_account_currency as credit,
-			je.cheque_no as reference_no, 
-			je.cheque_date as ref_date, 
-			je.clearance_date, 
-			jea.account_currency
-
-		from `tabBank Transaction` as bt
-		inner join `tabBank Transaction Payments` as btp on bt.name = btp.parent
-		inner join `tabJournal Entry` as je on btp.payment_entry = je.name
-		inner join `tabJournal Entry Account` as jea on je.name = jea.parent
-		where
-			bt.bank_account = %(account)s
-			and bt.docstatus = 1
-			and bt.unallocated_amount = 0.0
-			and bt.date <= %(till_date)s
-			and bt.date >= %(from_date)s
-			and btp.payment_document = "Journal Entry"
-			and jea.account = %(account)s
-			and ifnull(je.is_opening, 'No') = 'No'
-		""",
-		{
-			"account": bank_account,
-			"from_date": from_date,
-			"till_date": till_date,
-		},
-		as_dict=True
-	)
-
-	# query = (
-	# 	frappe.qb.from_(bank_transaction)
-	# 	.select(
-			
-	# 	)
-	# 	.inner_join(bt_payments).on(bank_transaction.name == bt_payments.parent)
-	# 	.inner_join(payment_entry).on(bt_payments.payment_entry == payment_entry.name)
-	# 	.where(bank_transaction.bank_account == bank_account)
-	# 	.where(bank_transaction.docstatus == 1)
-	# 	.where(bank_transaction.unallocated_amount == 0.0)
-	# 	.where(bank_transaction.date <= till_date)
-	# 	.where(bank_transaction.date >= from_date)
-	# 	.where(bt_payments.payment_document == "Payment Entry")
-	# )
- 
-	total_debit, total_credit = 0.0, 0.0
-	for d in payment_entries:
-		total_debit += flt(d.debit)
-		total_credit += flt(d.credit)
-	
-	for d in journal_entries:
-		total_debit += flt(d.debit)
-		total_credit += flt(d.credit)
-
-	print("debit and credit", total_debit, total_credit)
-	
-	cleared_balance = opening_balance + total_debit - total_credit
-	return cleared_balance
+	return flt(opening_balance) + get_cleared_amount(bank_account, from_date, till_date)
 
 
 @frappe.whitelist()
-def validate_bank_transactions(from_date, to_date, company, bank_account):
+def validate_bank_transactions(from_date, to_date, company, bank_account, dry_run=False):
+	"""Recompute clearance dates for everything reconciled against `bank_account`
+	in the period. See clearance.recompute_clearance_dates."""
 	logger.info(f"Validating bank transactions from {from_date} to {to_date} for {company} and {bank_account}")
 
-	bank_transaction = frappe.qb.DocType("Bank Transaction")
-	bt_payment = frappe.qb.DocType("Bank Transaction Payments")
-	payment_entry = frappe.qb.DocType("Payment Entry")
-
-	# Get the bank account's GL account for filtering
-	bank_gl_account = frappe.db.get_value("Bank Account", bank_account, "account")
-	
-	# Use SQL query to get the correct payment amount based on payment type
-	entries = frappe.db.sql(
-		"""
-		SELECT 
-			bt.name,
-			bt.date,
-			bt.deposit,
-			bt.withdrawal,
-			bt.unallocated_amount,
-			bt.party_type,
-			bt.party,
-			btp.payment_document,
-			btp.payment_entry,
-			btp.allocated_amount,
-			pe.payment_type,
-			CASE 
-				WHEN pe.payment_type = 'Receive' AND pe.paid_to = %(bank_gl_account)s THEN pe.received_amount
-				WHEN pe.payment_type = 'Pay' AND pe.paid_from = %(bank_gl_account)s THEN pe.paid_amount
-				ELSE 0 
-			END as payment_amount
-		FROM `tabBank Transaction` as bt
-		INNER JOIN `tabBank Transaction Payments` as btp ON bt.name = btp.parent
-		INNER JOIN `tabPayment Entry` as pe ON btp.payment_entry = pe.name
-		WHERE 
-			bt.company = %(company)s
-			AND bt.bank_account = %(bank_account)s
-			AND bt.date >= %(from_date)s
-			AND bt.date <= %(to_date)s
-			AND bt.docstatus = 1
-			AND btp.payment_document = 'Payment Entry'
-			AND (pe.clearance_date IS NULL OR pe.clearance_date != bt.date)
-		ORDER BY bt.date
-		""",
-		{
-			"bank_gl_account": bank_gl_account,
-			"company": company,
-			"bank_account": bank_account,
-			"from_date": from_date,
-			"to_date": to_date,
-		},
-		as_dict=True
-	)
-
-	logger.info(f"Found {len(entries)} entries with incorrect clearance date")
-	for entry in entries:
-		if entry.deposit > 0.0:
-			if entry.payment_type == "Receive" and entry.allocated_amount == entry.payment_amount:
-				logger.info(f"Setting clearance date for {entry.payment_entry}. Payment type {entry.payment_type}, Allocated amount {entry.allocated_amount}, Payment amount {entry.payment_amount}, Deposit {entry.deposit}")
-				frappe.db.set_value("Payment Entry", entry.payment_entry, "clearance_date", entry.date)
-			elif entry.payment_type == "Pay" and entry.allocated_amount == -entry.payment_amount:
-				logger.info(f"Setting clearance date for {entry.payment_entry}. Payment type {entry.payment_type}, Allocated amount {entry.allocated_amount}, Payment amount {entry.payment_amount}, Deposit {entry.deposit}")
-				frappe.db.set_value("Payment Entry", entry.payment_entry, "clearance_date", entry.date)
-		else:
-			if entry.payment_type == "Receive" and entry.allocated_amount == -entry.payment_amount:
-				logger.info(f"Setting clearance date for {entry.payment_entry}. Payment type {entry.payment_type}, Allocated amount {entry.allocated_amount}, Payment amount {entry.payment_amount}, Withdrawal {entry.withdrawal}")
-				frappe.db.set_value("Payment Entry", entry.payment_entry, "clearance_date", entry.date)
-			elif entry.payment_type == "Pay" and entry.allocated_amount == entry.payment_amount:
-				logger.info(f"Setting clearance date for {entry.payment_entry}. Payment type {entry.payment_type}, Allocated amount {entry.allocated_amount}, Payment amount {entry.payment_amount}, Withdrawal {entry.withdrawal}")
-				frappe.db.set_value("Payment Entry", entry.payment_entry, "clearance_date", entry.date)
-
-	jle_allocations = frappe.db.sql(
-		"""
-		select 
-					bt.name,
-					btp.payment_entry,
-					IF(bt.deposit > 0.0, btp.allocated_amount, -btp.allocated_amount) as allocated_amount
-			from `tabBank Transaction` as bt
-					inner join `tabBank Transaction Payments` as btp on bt.name = btp.parent
-			where btp.payment_document = "Journal Entry"
-							and bt.bank_account = %(bank_account)s
-							and bt.docstatus = 1
-							and bt.date <= %(to_date)s
-							and bt.date >= %(from_date)s
-		""",
-		{
-			"bank_account": bank_account,
-			"from_date": from_date,
-			"to_date": to_date
-		},
-		as_dict=True
-	)
-	logger.info(f"Found {len(jle_allocations)} journal entry allocations")
+	if frappe.db.get_value("Bank Account", bank_account, "company") != company:
+		frappe.throw(_("Bank Account {0} does not belong to company {1}").format(bank_account, company))
 
-	jle_names = [d.payment_entry for d in jle_allocations]
-	for jle_name in jle_names:
-		clear_journal_entry(jle_name)
+	result = recompute_clearance_dates(bank_account, from_date, to_date, dry_run=cint(dry_run))
+	logger.info("Clearance recompute summary for %s: %s", bank_account, result["summary"])
 
-	return {"success": True}
+	return {"success": True, **result}
 
 
 @frappe.whitelist()
 def validate_bank_transaction_async(bank_transaction_name):
 	"""
-	Validate a single bank transaction asynchronously using frappe.enqueue
+	Validate a single bank transaction in the background. Requests for the
+	same transaction are coalesced, see validation_queue.
 	"""
 	try:
-		frappe.enqueue(
-			"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool.validate_single_bank_transaction",
-			bank_transaction_name=bank_transaction_name,
-			queue='long',
-			timeout=300,
-			job_name="validate_bank_transaction_%s" % bank_transaction_name
-		)
+		request_validation(bank_transaction_name)
 		logger.info("Enqueued validation job for bank transaction %s", bank_transaction_name)
 		return {"success": True, "message": "Validation queued for bank transaction %s" % bank_transaction_name}
 	except Exception as e:
@@ -2584,365 +2676,47 @@ def validate_bank_transaction_async(bank_transaction_name):
 
 
 @frappe.whitelist()
-def batch_validate_unvalidated_transactions(bank_account, from_date=None, to_date=None, limit=50):
+def batch_validate_unvalidated_transactions(bank_account, from_date=None, to_date=None, limit=200):
 	"""
-	Find and validate bank transactions that might have missed automatic validation
-	This is useful for maintenance and catching up on transactions that weren't validated
+	Re-validate every reconciled bank transaction of the account in the period.
+	Starts (or resumes) an ABR Validation Sweep, which walks the period in
+	chunks of `limit` transactions in background jobs and records a watermark
+	after each chunk.
 	"""
 	try:
-		try:
-			limit = int(limit)
-		except (ValueError, TypeError):
-			limit = 50
 		logger.info("Starting batch validation for bank account %s", bank_account)
-		
-		# Get company for the bank account
-		company = frappe.db.get_value("Bank Account", bank_account, "company")
-		bank_gl_account = frappe.db.get_value("Bank Account", bank_account, "account")
-		
-		if not company or not bank_gl_account:
+
+		if not frappe.db.get_value("Bank Account", bank_account, "account"):
 			return {"success": False, "error": "Invalid bank account %s" % bank_account}
-		
+
 		# Set default date range if not provided
 		if not from_date:
 			from_date = frappe.utils.add_days(frappe.utils.today(), -30)  # Last 30 days
 		if not to_date:
 			to_date = frappe.utils.today()
-		
-		# Find bank transactions with payment entries that don't have clearance dates set
-		unvalidated_transactions = frappe.db.sql(
-			f"""
-			SELECT DISTINCT bt.name
-			FROM `tabBank Transaction` bt
-			INNER JOIN `tabBank Transaction Payments` btp ON bt.name = btp.parent
-			INNER JOIN `tabPayment Entry` pe ON btp.payment_entry = pe.name
-			WHERE 
-				bt.bank_account = %(bank_account)s
-				AND bt.company = %(company)s
-				AND bt.docstatus = 1
-				AND bt.unallocated_amount = 0.0
-				AND bt.date >= %(from_date)s
-				AND bt.date <= %(to_date)s
-				AND btp.payment_document = 'Payment Entry'
-				AND (pe.clearance_date IS NULL OR pe.clearance_date != bt.date)
-				AND ((bt.deposit > 0 AND pe.payment_type = 'Receive' AND pe.paid_to = %(bank_gl_account)s)
-					OR (bt.withdrawal > 0 AND pe.payment_type = 'Pay' AND pe.paid_from = %(bank_gl_account)s))
-			LIMIT {limit}
-			""",
-			{
-				"bank_account": bank_account,
-				"company": company,
-				"bank_gl_account": bank_gl_account,
-				"from_date": from_date,
-				"to_date": to_date,
-			},
-			as_dict=True
-		)
-		
-		# Also find journal entry transactions that might need validation
-		unvalidated_je_transactions = frappe.db.sql(
-			f"""
-			SELECT DISTINCT bt.name
-			FROM `tabBank Transaction` bt
-			INNER JOIN `tabBank Transaction Payments` btp ON bt.name = btp.parent
-			INNER JOIN `tabJournal Entry` je ON btp.payment_entry = je.name
-			WHERE 
-				bt.bank_account = %(bank_account)s
-				AND bt.company = %(company)s
-				AND bt.docstatus = 1
-				AND bt.unallocated_amount = 0.0
-				AND bt.date >= %(from_date)s
-				AND bt.date <= %(to_date)s
-				AND btp.payment_document = 'Journal Entry'
-				AND (je.clearance_date IS NULL OR je.clearance_date != bt.date)
-			LIMIT {limit}
-			""",
-			{
-				"bank_account": bank_account,
-				"company": company,
-				"from_date": from_date,
-				"to_date": to_date,
-			},
-			as_dict=True
-		)
-		
-		# Find invoice transactions that might need validation
-		unvalidated_invoice_transactions = frappe.db.sql(
-			f"""
-			SELECT DISTINCT bt.name
-			FROM `tabBank Transaction` bt
-			INNER JOIN `tabBank Transaction Payments` btp ON bt.name = btp.parent
-			WHERE 
-				bt.bank_account = %(bank_account)s
-				AND bt.company = %(company)s
-				AND bt.docstatus = 1
-				AND bt.unallocated_amount = 0.0
-				AND bt.date >= %(from_date)s
-				AND bt.date <= %(to_date)s
-				AND btp.payment_document IN ('Sales Invoice', 'Purchase Invoice')
-			LIMIT {limit}
-			""",
-			{
-				"bank_account": bank_account,
-				"company": company,
-				"from_date": from_date,
-				"to_date": to_date,
-			},
-			as_dict=True
-		)
-		
-		# Combine all lists and remove duplicates
-		all_transactions = list({t['name']: t for t in (unvalidated_transactions + unvalidated_je_transactions + unvalidated_invoice_transactions)}.values())
-		
-		logger.info("Found %s unvalidated transactions for batch processing", len(all_transactions))
-		
-		if not all_transactions:
-			return {"success": True, "message": "No unvalidated transactions found", "processed_count": 0}
-		
-		# Process transactions in batches using frappe.enqueue
-		processed_count = 0
-		for transaction in all_transactions:
-			try:
-				result = validate_bank_transaction_async(transaction['name'])
-				if result.get("success"):
-					processed_count += 1
-				else:
-					logger.error("Failed to queue validation for transaction %s", transaction['name'])
-			except Exception as e:
-				logger.error("Error processing transaction %s: %s", transaction['name'], str(e), exc_info=True)
-				continue
-		
+
+		sweep = start_validation_sweep(bank_account, from_date, to_date, chunk_size=limit)
 		return {
-			"success": True, 
-			"message": "Queued validation for %s transactions" % processed_count, 
-			"processed_count": processed_count,
-			"total_found": len(all_transactions)
+			"success": True,
+			"message": "Validation sweep {0} queued; {1} transactions validated so far".format(
+				sweep.name, sweep.processed_transactions
+			),
+			"sweep": sweep.name,
+			"processed_count": sweep.processed_transactions,
 		}
-		
+
 	except Exception as e:
 		logger.error("Error in batch validation: %s", str(e), exc_info=True)
 		return {"success": False, "error": str(e)}
 
 
-
-def validate_single_bank_transaction(bank_transaction_name):
-	"""
-	Validate and set clearance dates for a single bank transaction
-	This function is designed to be called asynchronously via frappe.enqueue
-	"""
-	try:
-		logger.info("Starting validation for bank transaction: %s", bank_transaction_name)
-		
-		# Load the bank transaction document
-		bank_transaction = frappe.get_doc("Bank Transaction", bank_transaction_name)
-		
-		if bank_transaction.docstatus != 1:
-			logger.info("Bank transaction %s is not submitted, skipping validation", bank_transaction_name)
-			return
-			
-		# Get bank account's GL account for Sales Invoice validation
-		bank_gl_account = frappe.db.get_value("Bank Account", bank_transaction.bank_account, "account")
-		
-		clearance_date_set = False
-		
-		# Iterate through all payment entries in the bank transaction
-		for payment_entry in bank_transaction.payment_entries:
-			try:
-				logger.info("Processing %s: %s", payment_entry.payment_document, payment_entry.payment_entry)
-				
-				# Load the actual payment document
-				payment_doc = frappe.get_doc(payment_entry.payment_document, payment_entry.payment_entry)
-				
-				if payment_entry.payment_document == "Payment Entry":
-					# Validate payment entry clearance logic
-					should_set_clearance = validate_payment_entry_clearance(
-						bank_transaction, payment_entry, payment_doc, bank_gl_account
-					)
-					
-					if should_set_clearance and (not payment_doc.clearance_date or getdate(payment_doc.clearance_date) != getdate(bank_transaction.date)):
-						payment_doc.db_set("clearance_date", bank_transaction.date)
-						logger.info("Set clearance date for Payment Entry %s to %s", payment_doc.name, bank_transaction.date)
-						clearance_date_set = True
-				
-				elif payment_entry.payment_document == "Journal Entry":
-					# Handle journal entry clearance
-					clear_journal_entry(payment_doc.name)
-					clearance_date_set = True
-				
-				elif payment_entry.payment_document == "Sales Invoice":
-					# Handle Sales Invoice - set clearance date on Sales Invoice Payment child table
-					for sales_payment in payment_doc.payments:
-						if sales_payment.account == bank_gl_account:
-							if should_clear_invoice(
-								"Sales Invoice",
-								payment_doc.name,
-								sales_payment.amount,
-								bank_gl_account,
-							):
-								if not sales_payment.clearance_date or getdate(sales_payment.clearance_date) != getdate(bank_transaction.date):
-									frappe.db.set_value("Sales Invoice Payment", sales_payment.name, "clearance_date", bank_transaction.date)
-									logger.info("Set clearance date for Sales Invoice Payment %s to %s", sales_payment.name, bank_transaction.date)
-									clearance_date_set = True
-							else:
-								logger.info(
-									"Deferring clearance_date for Sales Invoice Payment %s: cumulative allocation has not reached amount %s",
-									sales_payment.name, sales_payment.amount,
-								)
-
-				elif payment_entry.payment_document == "Purchase Invoice":
-					# Handle Purchase Invoice - set clearance date directly on the document
-					if hasattr(payment_doc, 'clearance_date'):
-						if should_clear_invoice(
-							"Purchase Invoice",
-							payment_doc.name,
-							payment_doc.paid_amount,
-							bank_gl_account,
-						):
-							if not payment_doc.clearance_date or getdate(payment_doc.clearance_date) != getdate(bank_transaction.date):
-								payment_doc.db_set("clearance_date", bank_transaction.date)
-								logger.info("Set clearance date for Purchase Invoice %s to %s", payment_doc.name, bank_transaction.date)
-								clearance_date_set = True
-						else:
-							logger.info(
-								"Deferring clearance_date for Purchase Invoice %s: cumulative allocation has not reached paid_amount %s",
-								payment_doc.name, payment_doc.paid_amount,
-							)
-			
-			except Exception as e:
-				logger.error("Error processing %s %s: %s", payment_entry.payment_document, payment_entry.payment_entry, str(e), exc_info=True)
-				continue
-		
-		if clearance_date_set:
-			logger.info("Successfully validated bank transaction %s", bank_transaction_name)
-		else:
-			logger.info("No clearance dates needed to be set for bank transaction %s", bank_transaction_name)
-			
-		# Commit the changes
-		frappe.db.commit()
-		
-	except Exception as e:
-		logger.error("Error validating bank transaction %s: %s", bank_transaction_name, str(e), exc_info=True)
-		frappe.db.rollback()
-		raise
-
-
-def validate_payment_entry_clearance(bank_transaction, payment_entry, payment_doc, bank_gl_account):
-	"""
-	Validate whether a payment entry should have its clearance date set
-	Based on payment type, direction, and allocated vs payment amounts
-	"""
-	try:
-		# Get the payment amount based on payment type and bank account
-		if payment_doc.payment_type == "Receive" and payment_doc.paid_to == bank_gl_account:
-			payment_amount = payment_doc.received_amount
-		elif payment_doc.payment_type == "Pay" and payment_doc.paid_from == bank_gl_account:
-			payment_amount = payment_doc.paid_amount
-		else:
-			return False
-		
-		# Check if allocated amount matches payment amount and direction
-		if bank_transaction.deposit > 0.0:
-			# Bank deposit (money coming in)
-			if payment_doc.payment_type == "Receive" and (payment_entry.allocated_amount == payment_amount or payment_entry.allocated_amount == -payment_amount):
-				# For Receive transactions with deposits, handle both positive and negative allocated amounts
-				# Positive: normal receipt coming in
-				# Negative: purchase return/refund coming in (allocated amount is negative but payment amount is positive)
-				return True
-			elif payment_doc.payment_type == "Pay" and payment_entry.allocated_amount == -payment_amount:
-				return True
-		else:
-			# Bank withdrawal (money going out)  
-			if payment_doc.payment_type == "Receive" and payment_entry.allocated_amount == -payment_amount:
-				return True
-			elif payment_doc.payment_type == "Pay" and (payment_entry.allocated_amount == payment_amount or payment_entry.allocated_amount == -payment_amount):
-				# For Pay transactions with withdrawals, handle both positive and negative allocated amounts
-				# Positive: normal payment going out
-				# Negative: sales return/refund going out (allocated amount is negative but payment amount is positive)
-				return True
-		
-		return False
-		
-	except Exception as e:
-		logger.error("Error validating payment entry clearance for %s: %s", payment_doc.name, str(e), exc_info=True)
-		return False
-
-
-
-
 def clear_journal_entry(journal_entry_name):
-	# First we need to get the allocations for this payment entry in the bank transactions	
+	"""Set or reset the clearance date of one Journal Entry from its Bank
+	Transaction allocations. Use clear_journal_entries for many entries."""
 	try:
-		bt_payments = frappe.db.sql(
-			"""
-			select 
-						bt.date,
-						ba.account,
-						IF(bt.deposit > 0.0, btp.allocated_amount, -btp.allocated_amount) as allocated_amount
-				from `tabBank Transaction` as bt
-						inner join `tabBank Account` as ba on bt.bank_account = ba.name 
-						inner join `tabBank Transaction Payments` as btp on bt.name = btp.parent
-				where btp.payment_document = "Journal Entry"
-							and btp.payment_entry = %(journal_entry)s
-							and bt.docstatus = 1
-				order by bt.date asc
-			""",
-			{
-				"journal_entry": journal_entry_name
-			},
-			as_dict=True
-		)
-		
-		journal_entry = frappe.get_doc("Journal Entry", journal_entry_name)
-		clearance_status = {}
-		clearance_date = None
-		skip = False
-		for acc in journal_entry.accounts:
-			account_type = frappe.get_value("Account", acc.account, "account_type")
-			if account_type != "Bank":
-				continue
-
-			# check if the account is a bank account for do the reconciliation
-			bank_account = frappe.db.count("Bank Account", {"account": acc.account, "company": journal_entry.company})
-			if bank_account == 0:
-				logger.warning("Bank reconciliation is not enabled for account %s in %s. Skipping...", acc.account, journal_entry_name)
-				continue
-
-			if acc.account in clearance_status:
-				logger.warn("Account %s found twice in the same journal entry. Skipping...", acc.account)
-				skip = True
-				break
-
-			clearance_status[acc.account] = False
-
-			allocated_amount = 0.0
-			for bt in bt_payments:
-				if bt.account == acc.account:
-					allocated_amount += bt.allocated_amount
-					if not clearance_date or getdate(bt.date) > getdate(clearance_date):
-						clearance_date = bt.date
-
-			if acc.debit_in_account_currency > 0 and allocated_amount == acc.debit_in_account_currency:
-				clearance_status[acc.account] = True
-			elif acc.credit_in_account_currency > 0 and allocated_amount == -acc.credit_in_account_currency:
-				clearance_status[acc.account] = True
-		
-		if skip:
-			logger.info("Skipping journal entry %s", journal_entry_name)
-			return
-		
-		if all(clearance_status.values()):
-			if not journal_entry.clearance_date or getdate(journal_entry.clearance_date) != getdate(clearance_date):
-				logger.info("Clearing Journal entry %s: %s", journal_entry.name, clearance_date)
-				frappe.db.set_value("Journal Entry", journal_entry.name, "clearance_date", clearance_date)
-			else:
-				logger.info("Journal entry %s is already cleared", journal_entry.name)
-		elif journal_entry.clearance_date:
-				logger.info("Resetting clearance date for %s: %s", journal_entry.name, clearance_date)
-				frappe.db.set_value("Journal Entry", journal_entry.name, "clearance_date", None)
-		else:
-			logger.info("Some accounts are not cleared for %s: %s", journal_entry_name, clearance_date)
-			logger.info("Allocated amounts %s", bt_payments)
-			
+		changes = clear_journal_entries([journal_entry_name])
+		for change in changes:
+			logger.info("Clearance date for Journal Entry %s: %s -> %s", change["name"], change["from"], change["to"])
 	except Exception as e:
 		logger.error("Error clearing journal entry %s: %s", journal_entry_name, str(e), exc_info=True)
 		raise
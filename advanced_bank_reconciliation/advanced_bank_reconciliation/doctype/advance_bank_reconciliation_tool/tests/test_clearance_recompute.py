@@ -0,0 +1,160 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Tests for the set-based clearance recompute engine."""
+import json
+from unittest.mock import call, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate, nowdate
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import (
+	BANK_GL_ACCOUNTS_CACHE_KEY,
+	clear_journal_entries,
+	get_reconciled_bank_gl_accounts,
+	recompute_clearance_dates,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	create_payment_entry_for_invoice,
+	reconcile_vouchers,
+)
+
+from .fixtures import (
+	TEST_BANK_GL_ACCOUNT,
+	TEST_COMPANY,
+	create_test_bank_transaction,
+	create_test_sales_invoice,
+	setup_abr_test_data,
+)
+
+CLEARANCE_MODULE = "advanced_bank_reconciliation.advanced_bank_reconciliation.clearance"
+
+
+def _reconcile(bank_transaction_name, payment_entry_name, amount, payment_doctype="Payment Entry"):
+	vouchers = [{"payment_doctype": payment_doctype, "payment_name": payment_entry_name, "amount": amount}]
+	return reconcile_vouchers(bank_transaction_name, json.dumps(vouchers))
+
+
+def _create_bank_journal_entry(amount, date):
+	expense_account = frappe.db.get_value(
+		"Account", {"company": TEST_COMPANY, "root_type": "Expense", "is_group": 0}, "name"
+	)
+	je = frappe.get_doc(
+		{
+			"doctype": "Journal Entry",
+			"company": TEST_COMPANY,
+			"posting_date": date,
+			"cheque_no": "_ABR-JE",
+			"cheque_date": date,
+			"accounts": [
+				{"account": TEST_BANK_GL_ACCOUNT, "debit_in_account_currency": amount},
+				{"account": expense_account, "credit_in_account_currency": amount},
+			],
+		}
+	)
+	je.insert(ignore_permissions=True)
+	je.submit()
+	return je
+
+
+class TestClearanceRecompute(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+
+	def _reconciled_payment_entry(self, invoice_amount, deposit, date):
+		si = create_test_sales_invoice(outstanding=invoice_amount)
+		bt = create_test_bank_transaction(self.bank_account, deposit=deposit, date=date)
+		pe = create_payment_entry_for_invoice(si, bt, invoice_amount, "Receive", "Customer", si.customer)
+		_reconcile(bt.name, pe.name, deposit)
+		return pe, bt
+
+	def _recompute(self, date, dry_run=False):
+		return recompute_clearance_dates(self.bank_account, date, date, dry_run=dry_run)
+
+	def test_missing_clearance_date_is_set_to_bank_date(self):
+		date = add_days(nowdate(), -3)
+		pe, bt = self._reconciled_payment_entry(80, 80, date)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", None)
+
+		result = self._recompute(date)
+
+		self.assertIn(
+			{"doctype": "Payment Entry", "name": pe.name, "from": None, "to": str(getdate(bt.date))},
+			result["changes"],
+		)
+		self.assertEqual(getdate(frappe.db.get_value("Payment Entry", pe.name, "clearance_date")), getdate(bt.date))
+
+	def test_partly_allocated_manually_cleared_payment_entry_keeps_its_date(self):
+		date = add_days(nowdate(), -4)
+		pe, _bt = self._reconciled_payment_entry(100, 40, date)
+		# e.g. cleared through ERPNext's Bank Clearance tool
+		manual_date = add_days(date, 1)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", manual_date)
+
+		result = self._recompute(date)
+
+		self.assertNotIn(pe.name, [change["name"] for change in result["changes"]])
+		self.assertEqual(getdate(frappe.db.get_value("Payment Entry", pe.name, "clearance_date")), getdate(manual_date))
+
+	def test_partly_allocated_payment_entry_is_not_cleared(self):
+		date = add_days(nowdate(), -4)
+		pe, _bt = self._reconciled_payment_entry(100, 40, date)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", None)
+
+		result = self._recompute(date)
+
+		self.assertNotIn(pe.name, [change["name"] for change in result["changes"]])
+		self.assertIsNone(frappe.db.get_value("Payment Entry", pe.name, "clearance_date"))
+
+	def test_repair_invalidates_only_the_affected_bank_account_balances(self):
+		date = add_days(nowdate(), -4)
+		pe, _bt = self._reconciled_payment_entry(60, 60, date)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", None)
+
+		with patch(f"{CLEARANCE_MODULE}.invalidate_account_balances") as invalidate:
+			self._recompute(date)
+
+		self.assertEqual(invalidate.call_args_list, [call(self.bank_account)])
+
+	def test_dry_run_reports_without_writing(self):
+		date = add_days(nowdate(), -5)
+		pe, _bt = self._reconciled_payment_entry(60, 60, date)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", None)
+
+		result = self._recompute(date, dry_run=True)
+
+		self.assertIn(pe.name, [change["name"] for change in result["changes"]])
+		self.assertIsNone(frappe.db.get_value("Payment Entry", pe.name, "clearance_date"))
+
+	def test_correct_dates_produce_no_changes(self):
+		date = add_days(nowdate(), -6)
+		self._reconciled_payment_entry(50, 50, date)
+		self._recompute(date)
+
+		self.assertEqual(self._recompute(date)["changes"], [])
+
+	def test_journal_entries_are_cleared_in_one_batch(self):
+		date = add_days(nowdate(), -7)
+		entries = []
+		for amount in (30, 45):
+			je = _create_bank_journal_entry(amount, date)
+			bt = create_test_bank_transaction(self.bank_account, deposit=amount, date=date)
+			_reconcile(bt.name, je.name, amount, payment_doctype="Journal Entry")
+			frappe.db.set_value("Journal Entry", je.name, "clearance_date", None)
+			entries.append(je.name)
+
+		changes = clear_journal_entries(entries)
+
+		self.assertEqual(sorted(change["name"] for change in changes), sorted(entries))
+		for name in entries:
+			self.assertEqual(getdate(frappe.db.get_value("Journal Entry", name, "clearance_date")), getdate(date))
+
+	def test_bank_gl_account_map_is_invalidated_on_bank_account_update(self):
+		self.assertIn(TEST_BANK_GL_ACCOUNT, get_reconciled_bank_gl_accounts(TEST_COMPANY))
+		self.assertIsNotNone(frappe.cache().hget(BANK_GL_ACCOUNTS_CACHE_KEY, TEST_COMPANY))
+
+		frappe.get_doc("Bank Account", self.bank_account).save(ignore_permissions=True)
+
+		self.assertIsNone(frappe.cache().hget(BANK_GL_ACCOUNTS_CACHE_KEY, TEST_COMPANY))
@@ -0,0 +1,154 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Tests for party-grouped Payment Entries in bulk reconciliation.
+
+With group_by_party, create_payment_entries_bulk settles every selected
+invoice of one (party_type, party, payment_type) with a single Payment
+Entry carrying one reference row per invoice, instead of one Payment
+Entry per invoice.
+"""
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	_batch_units,
+	_group_invoices_by_party,
+	create_payment_entries_bulk,
+	create_payment_entry_for_invoice_group,
+)
+
+from .fixtures import (
+	TEST_COMPANY,
+	create_test_bank_transaction,
+	create_test_purchase_invoice,
+	create_test_sales_invoice,
+	setup_abr_test_data,
+)
+
+
+def _selection(invoice, allocated_amount):
+	return {
+		"doctype": f"Unpaid {invoice.doctype}",
+		"name": invoice.name,
+		"allocated_amount": allocated_amount,
+	}
+
+
+class TestGroupedPaymentEntries(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+		# Run create_payment_entries_bulk synchronously in tests.
+		cls._orig_bg = frappe.db.get_single_value(
+			"Advance Bank Reconciliation Settings", "reconcile_unpaid_invoices_in_background"
+		)
+		frappe.db.set_single_value(
+			"Advance Bank Reconciliation Settings", "reconcile_unpaid_invoices_in_background", 0
+		)
+		frappe.db.commit()
+
+	@classmethod
+	def tearDownClass(cls):
+		frappe.db.set_single_value(
+			"Advance Bank Reconciliation Settings",
+			"reconcile_unpaid_invoices_in_background",
+			cls._orig_bg,
+		)
+		frappe.db.commit()
+		super().tearDownClass()
+
+	def test_invoices_are_grouped_by_party_and_direction(self):
+		si1 = create_test_sales_invoice(outstanding=100)
+		si2 = create_test_sales_invoice(outstanding=50)
+		credit_note = create_test_sales_invoice(outstanding=20, is_return=1)
+		pi = create_test_purchase_invoice(outstanding=70)
+
+		groups = _group_invoices_by_party(
+			[
+				_selection(si1, 100),
+				_selection(pi, 70),
+				_selection(si2, 50),
+				_selection(credit_note, -20),
+			]
+		)
+
+		self.assertEqual(
+			[[row["name"] for row in group] for group in groups],
+			[[si1.name, si2.name], [pi.name], [credit_note.name]],
+		)
+
+	def test_batches_never_split_a_group(self):
+		units = [[{"name": "a"}] * 3, [{"name": "b"}] * 5, [{"name": "c"}]]
+		self.assertEqual(
+			[[len(unit) for unit in batch] for batch in _batch_units(units, 4)],
+			[[3], [5], [1]],
+		)
+
+	def test_group_creates_one_payment_entry_per_party(self):
+		si1 = create_test_sales_invoice(outstanding=100)
+		si2 = create_test_sales_invoice(outstanding=60)
+		si3 = create_test_sales_invoice(outstanding=40)
+		bt = create_test_bank_transaction(self.bank_account, deposit=200)
+
+		create_payment_entries_bulk(
+			bank_transaction_name=bt.name,
+			invoices=[_selection(si1, 100), _selection(si2, 60), _selection(si3, 40)],
+			group_by_party=1,
+		)
+
+		bt.reload()
+		self.assertEqual(len(bt.payment_entries), 1)
+		self.assertAlmostEqual(flt(bt.unallocated_amount), 0.0, places=2)
+
+		pe = frappe.get_doc("Payment Entry", bt.payment_entries[0].payment_entry)
+		self.assertEqual(pe.docstatus, 1)
+		self.assertAlmostEqual(flt(pe.paid_amount), 200.0, places=2)
+		self.assertEqual(
+			sorted(ref.reference_name for ref in pe.references),
+			sorted([si1.name, si2.name, si3.name]),
+		)
+		for invoice in (si1, si2, si3):
+			self.assertAlmostEqual(
+				flt(frappe.db.get_value("Sales Invoice", invoice.name, "outstanding_amount")),
+				0.0,
+				places=2,
+			)
+
+	def test_group_applies_partial_allocation_per_invoice(self):
+		si1 = create_test_sales_invoice(outstanding=100)
+		si2 = create_test_sales_invoice(outstanding=80)
+		bt = create_test_bank_transaction(self.bank_account, deposit=130)
+
+		pe = create_payment_entry_for_invoice_group(
+			[(si1, 100), (si2, 30)],
+			bt,
+			"Receive",
+			"Customer",
+			si1.customer,
+		)
+
+		allocations = {ref.reference_name: flt(ref.allocated_amount) for ref in pe.references}
+		self.assertEqual(allocations, {si1.name: 100.0, si2.name: 30.0})
+		self.assertAlmostEqual(flt(pe.paid_amount), 130.0, places=2)
+		self.assertFalse(pe.deductions)
+		self.assertAlmostEqual(
+			flt(frappe.db.get_value("Sales Invoice", si2.name, "outstanding_amount")),
+			50.0,
+			places=2,
+		)
+
+	def test_group_rejects_over_allocation_of_any_invoice(self):
+		si1 = create_test_sales_invoice(outstanding=100)
+		si2 = create_test_sales_invoice(outstanding=10)
+		bt = create_test_bank_transaction(self.bank_account, deposit=125)
+
+		with self.assertRaises(frappe.ValidationError):
+			create_payment_entry_for_invoice_group(
+				[(si1, 100), (si2, 25)],
+				bt,
+				"Receive",
+				"Customer",
+				si1.customer,
+			)
@@ -22,7 +22,9 @@ from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_b
 	get_linked_payments,
 	reconcile_vouchers,
 	unreconcile_bank_transaction,
-	validate_single_bank_transaction,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import (
+	recompute_clearance_for_transactions,
 )
 
 from .fixtures import (
@@ -1763,7 +1765,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		)
 		bt = create_test_bank_transaction(self.bank_account, deposit=31.22)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, -31.22)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		pi.reload()
 		self.assertFalse(pi.clearance_date, "Partial allocation must not set clearance_date")
@@ -1772,7 +1774,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		"""After a partial allocation and synchronous validation, the refund PI
 		must still appear in get_linked_payments results (not prematurely hidden).
 
-		Calls validate_single_bank_transaction synchronously so the deferral logic
+		Calls recompute_clearance_for_transactions synchronously so the deferral logic
 		runs in-process; the test is not vacuously true due to async skipping.
 		"""
 		pi = create_test_purchase_invoice(
@@ -1785,7 +1787,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		bt = create_test_bank_transaction(self.bank_account, deposit=31.22)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, -31.22)
 		# Run clearance-date deferral synchronously (not via background queue).
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		# Partial allocation (gap=0.05 > tolerance) must leave clearance_date unset.
 		pi.reload()
@@ -1818,19 +1820,19 @@ class TestClearanceDateDeferral(FrappeTestCase):
 
 		bt1 = create_test_bank_transaction(self.bank_account, deposit=31.22)
 		_reconcile_invoice(bt1.name, "Purchase Invoice", pi.name, -31.22)
-		validate_single_bank_transaction(bt1.name)
+		recompute_clearance_for_transactions([bt1.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date, "After BT1 (partial), clearance_date must be unset")
 
 		bt2 = create_test_bank_transaction(self.bank_account, deposit=0.01)
 		_reconcile_invoice(bt2.name, "Purchase Invoice", pi.name, -0.01)
-		validate_single_bank_transaction(bt2.name)
+		recompute_clearance_for_transactions([bt2.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date, "After BT2 (still partial), clearance_date must be unset")
 
 		bt3 = create_test_bank_transaction(self.bank_account, deposit=0.04)
 		_reconcile_invoice(bt3.name, "Purchase Invoice", pi.name, -0.04)
-		validate_single_bank_transaction(bt3.name)
+		recompute_clearance_for_transactions([bt3.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"After BT3 (cumulative=-31.27 covers paid_amount), clearance_date must be set")
@@ -1848,7 +1850,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		)
 		bt = create_test_bank_transaction(self.bank_account, deposit=31.27)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, -31.27)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
@@ -1863,7 +1865,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		)
 		bt = create_test_bank_transaction(self.bank_account, withdrawal=75.0)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, 75.0)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		pi.reload()
 		self.assertFalse(pi.clearance_date,
@@ -1878,7 +1880,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		)
 		bt = create_test_bank_transaction(self.bank_account, withdrawal=150.0)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, 150.0)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
@@ -1902,7 +1904,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 
 		bt = create_test_bank_transaction(self.bank_account, withdrawal=30.0)
 		_reconcile_invoice(bt.name, "Sales Invoice", si.name, -30.0)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		sip_clearance = frappe.db.get_value(
 			"Sales Invoice Payment",
@@ -1930,7 +1932,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 
 		bt = create_test_bank_transaction(self.bank_account, withdrawal=50.0)
 		_reconcile_invoice(bt.name, "Sales Invoice", si.name, -50.0)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		sip_clearance = frappe.db.get_value(
 			"Sales Invoice Payment",
@@ -1953,7 +1955,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		)
 		bt = create_test_bank_transaction(self.bank_account, deposit=31.27)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, -31.27)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		pi.reload()
 		self.assertTrue(pi.clearance_date, "Pre-condition: clearance_date should be set")
@@ -1968,7 +1970,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		paid_amount, clearance_date must be preserved.
 
 		Setup: a paid refund PI of -31.27. Reconcile BT1 (-15.00), BT2 (-16.27)
-		-- together they exactly cover. validate_single_bank_transaction after BT2
+		-- together they exactly cover. recompute_clearance_for_transactions after BT2
 		sets clearance_date. Then reconcile a redundant BT3 (-0.10), putting total
 		allocation at -31.37 (over by 0.10, within tolerance). Validate; clearance_date
 		must remain set.
@@ -1988,14 +1990,14 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		# BT1 covers half, BT2 covers the rest exactly.
 		bt1 = create_test_bank_transaction(self.bank_account, deposit=15.00)
 		_reconcile_invoice(bt1.name, "Purchase Invoice", pi.name, -15.00)
-		validate_single_bank_transaction(bt1.name)
+		recompute_clearance_for_transactions([bt1.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date,
 			"Pre-condition: after BT1 alone (partial), clearance_date must be unset")
 
 		bt2 = create_test_bank_transaction(self.bank_account, deposit=16.27)
 		_reconcile_invoice(bt2.name, "Purchase Invoice", pi.name, -16.27)
-		validate_single_bank_transaction(bt2.name)
+		recompute_clearance_for_transactions([bt2.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"Pre-condition: after BT1+BT2 cumulative=-31.27 covers paid_amount, clearance_date must be set")
@@ -2003,7 +2005,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 		# BT3 is a redundant over-allocation of -0.10 (total becomes -31.37).
 		bt3 = create_test_bank_transaction(self.bank_account, deposit=0.10)
 		_reconcile_invoice(bt3.name, "Purchase Invoice", pi.name, -0.10)
-		validate_single_bank_transaction(bt3.name)
+		recompute_clearance_for_transactions([bt3.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"Pre-condition: after BT3, clearance_date must still be set")
@@ -2037,21 +2039,21 @@ class TestClearanceDateDeferral(FrappeTestCase):
 
 		bt_small1 = create_test_bank_transaction(self.bank_account, deposit=0.04)
 		_reconcile_invoice(bt_small1.name, "Purchase Invoice", pi.name, -0.04)
-		validate_single_bank_transaction(bt_small1.name)
+		recompute_clearance_for_transactions([bt_small1.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date,
 			"After BT($0.04): cumulative=-0.04, far below threshold, clearance_date must be None")
 
 		bt_small2 = create_test_bank_transaction(self.bank_account, deposit=0.01)
 		_reconcile_invoice(bt_small2.name, "Purchase Invoice", pi.name, -0.01)
-		validate_single_bank_transaction(bt_small2.name)
+		recompute_clearance_for_transactions([bt_small2.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date,
 			"After BT($0.01): cumulative=-0.05, still below threshold, clearance_date must be None")
 
 		bt_large = create_test_bank_transaction(self.bank_account, deposit=31.22)
 		_reconcile_invoice(bt_large.name, "Purchase Invoice", pi.name, -31.22)
-		validate_single_bank_transaction(bt_large.name)
+		recompute_clearance_for_transactions([bt_large.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"After BT($31.22): cumulative=-31.27 covers paid_amount, clearance_date must be set")
@@ -2080,14 +2082,14 @@ class TestClearanceDateDeferral(FrappeTestCase):
 
 		bt_large = create_test_bank_transaction(self.bank_account, deposit=31.22)
 		_reconcile_invoice(bt_large.name, "Purchase Invoice", pi.name, -31.22)
-		validate_single_bank_transaction(bt_large.name)
+		recompute_clearance_for_transactions([bt_large.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date,
 			"After BT($31.22): cumulative=-31.22, well below paid_amount, must NOT clear")
 
 		bt_small1 = create_test_bank_transaction(self.bank_account, deposit=0.04)
 		_reconcile_invoice(bt_small1.name, "Purchase Invoice", pi.name, -0.04)
-		validate_single_bank_transaction(bt_small1.name)
+		recompute_clearance_for_transactions([bt_small1.name])
 		pi.reload()
 		self.assertFalse(pi.clearance_date,
 			"After BT($0.04): cumulative=-31.26, one cent short; clearance must remain unset "
@@ -2095,7 +2097,7 @@ class TestClearanceDateDeferral(FrappeTestCase):
 
 		bt_small2 = create_test_bank_transaction(self.bank_account, deposit=0.01)
 		_reconcile_invoice(bt_small2.name, "Purchase Invoice", pi.name, -0.01)
-		validate_single_bank_transaction(bt_small2.name)
+		recompute_clearance_for_transactions([bt_small2.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"After BT($0.01): cumulative=-31.27 exactly, clearance must be set")
@@ -2130,7 +2132,7 @@ class TestClearanceDateOnCancel(FrappeTestCase):
 		)
 		bt = create_test_bank_transaction(self.bank_account, deposit=31.27)
 		_reconcile_invoice(bt.name, "Purchase Invoice", pi.name, -31.27)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"Pre-condition: clearance_date should be set after full match")
@@ -2159,7 +2161,7 @@ class TestClearanceDateOnCancel(FrappeTestCase):
 
 		bt = create_test_bank_transaction(self.bank_account, withdrawal=50.0)
 		_reconcile_invoice(bt.name, "Sales Invoice", si.name, -50.0)
-		validate_single_bank_transaction(bt.name)
+		recompute_clearance_for_transactions([bt.name])
 
 		sip_clearance_before = frappe.db.get_value(
 			"Sales Invoice Payment",
@@ -2193,7 +2195,7 @@ class TestClearanceDateOnCancel(FrappeTestCase):
 		)
 		bt1 = create_test_bank_transaction(self.bank_account, deposit=31.27)
 		_reconcile_invoice(bt1.name, "Purchase Invoice", pi.name, -31.27)
-		validate_single_bank_transaction(bt1.name)
+		recompute_clearance_for_transactions([bt1.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"Pre-condition: clearance_date set after BT1 covers paid_amount")
@@ -2201,7 +2203,7 @@ class TestClearanceDateOnCancel(FrappeTestCase):
 		# BT2 is a redundant over-allocation of -0.10 (within tolerance band).
 		bt2 = create_test_bank_transaction(self.bank_account, deposit=0.10)
 		_reconcile_invoice(bt2.name, "Purchase Invoice", pi.name, -0.10)
-		validate_single_bank_transaction(bt2.name)
+		recompute_clearance_for_transactions([bt2.name])
 		pi.reload()
 		self.assertTrue(pi.clearance_date,
 			"Pre-condition: clearance_date still set after BT2 over-allocates")
@@ -0,0 +1,133 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Tests for coalesced background validation of Bank Transactions."""
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.validation_queue import (
+	ATTEMPTS_KEY,
+	MAX_VALIDATION_ATTEMPTS,
+	PARKED_KEY,
+	PENDING_KEY,
+	drain_validation_queue,
+	get_validation_queue_stats,
+	request_validation,
+	reset_validation_queue_stats,
+)
+
+from .fixtures import TEST_COMPANY, create_test_bank_transaction, setup_abr_test_data
+
+QUEUE_MODULE = "advanced_bank_reconciliation.advanced_bank_reconciliation.validation_queue"
+
+
+def _pending():
+	cache = frappe.cache()
+	return {frappe.safe_decode(name) for name in cache.execute_command("SMEMBERS", cache.make_key(PENDING_KEY))}
+
+
+class TestValidationQueue(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+
+	def setUp(self):
+		for key in (PENDING_KEY, ATTEMPTS_KEY, PARKED_KEY):
+			frappe.cache().delete(frappe.cache().make_key(key))
+		reset_validation_queue_stats()
+		frappe.flags.abr_validation_drain_pending = False
+
+	def test_repeated_requests_are_coalesced(self):
+		bt = create_test_bank_transaction(self.bank_account, deposit=10)
+
+		with patch("frappe.enqueue") as enqueue:
+			for _ in range(3):
+				request_validation(bt.name)
+			frappe.db.commit()
+
+		self.assertEqual(_pending(), {bt.name})
+		self.assertEqual(enqueue.call_count, 1)
+		stats = get_validation_queue_stats()
+		self.assertEqual((stats["requested"], stats["queued"], stats["pending"]), (3, 1, 1))
+
+	def test_drain_validates_pending_transactions_in_one_batch(self):
+		first = create_test_bank_transaction(self.bank_account, deposit=10)
+		second = create_test_bank_transaction(self.bank_account, deposit=20)
+		with patch("frappe.enqueue"):
+			for name in (first.name, second.name, first.name):
+				request_validation(name)
+			frappe.db.commit()
+
+		with patch(f"{QUEUE_MODULE}.recompute_clearance_for_transactions", return_value=[]) as recompute:
+			drain_validation_queue()
+
+		recompute.assert_called_once()
+		self.assertEqual(sorted(recompute.call_args.args[0]), sorted([first.name, second.name]))
+		self.assertEqual(_pending(), set())
+		stats = get_validation_queue_stats()
+		self.assertEqual(stats["runs"], 1)
+		self.assertEqual(stats["coalesce_ratio"], 1.5)
+
+	def test_failed_batch_stays_pending(self):
+		bt = create_test_bank_transaction(self.bank_account, deposit=10)
+		with patch("frappe.enqueue"):
+			request_validation(bt.name)
+			frappe.db.commit()
+
+		with patch(
+			f"{QUEUE_MODULE}.recompute_clearance_for_transactions",
+			side_effect=frappe.ValidationError,
+		) as recompute:
+			drain_validation_queue()
+
+		recompute.assert_called_once()
+		self.assertEqual(_pending(), {bt.name})
+		stats = get_validation_queue_stats()
+		self.assertEqual((stats["failed"], stats["validated"]), (1, 0))
+
+	def test_failed_batch_retries_transactions_one_at_a_time(self):
+		good = create_test_bank_transaction(self.bank_account, deposit=10)
+		bad = create_test_bank_transaction(self.bank_account, deposit=20)
+		with patch("frappe.enqueue"):
+			request_validation(good.name)
+			request_validation(bad.name)
+			frappe.db.commit()
+
+		def recompute(names):
+			if bad.name in names:
+				raise frappe.ValidationError
+			return []
+
+		with patch(f"{QUEUE_MODULE}.recompute_clearance_for_transactions", side_effect=recompute) as mocked:
+			drain_validation_queue()
+
+		self.assertEqual(mocked.call_count, 3)
+		self.assertEqual(_pending(), {bad.name})
+		stats = get_validation_queue_stats()
+		self.assertEqual((stats["failed"], stats["validated"]), (1, 1))
+
+	def test_transaction_is_parked_after_repeated_failures(self):
+		bt = create_test_bank_transaction(self.bank_account, deposit=10)
+		with patch("frappe.enqueue"):
+			request_validation(bt.name)
+			frappe.db.commit()
+
+		with patch(
+			f"{QUEUE_MODULE}.recompute_clearance_for_transactions",
+			side_effect=frappe.ValidationError,
+		):
+			for _ in range(MAX_VALIDATION_ATTEMPTS):
+				drain_validation_queue()
+
+		self.assertEqual(_pending(), set())
+		self.assertEqual(get_validation_queue_stats()["parked"], 1)
+
+		with patch("frappe.enqueue"):
+			request_validation(bt.name)
+			frappe.db.commit()
+		with patch(f"{QUEUE_MODULE}.recompute_clearance_for_transactions", return_value=[]):
+			drain_validation_queue()
+
+		self.assertEqual(get_validation_queue_stats()["parked"], 0)
@@ -105,6 +105,7 @@ frappe.ui.form.on('Bank Statement Importer', {
 				const particularsField = validInHeaders(bank_mapping.custom_particulars);
 				const codeField = validInHeaders(bank_mapping.custom_code);
 				const otherPartyField = validInHeaders(bank_mapping.bank_party_name);
+				const balanceField = validInHeaders(bank_mapping.abr_statement_balance);
 
 				// Identify any saved mapping entries that pointed at columns not in the current file.
 				const fieldLabels = {
@@ -116,6 +117,7 @@ frappe.ui.form.on('Bank Statement Importer', {
 					custom_particulars: __('Particulars'),
 					custom_code: __('Code'),
 					bank_party_name: __('Other Party'),
+					abr_statement_balance: __('Balance'),
 				};
 				const staleMappings = [];
 				for (const k of Object.keys(fieldLabels)) {
@@ -144,6 +146,7 @@ frappe.ui.form.on('Bank Statement Importer', {
 					"particulars_select",
 					"code_select",
 					"other_party_select",
+					"balance_select",
 				];
 				for (const fieldname of resetMappingSelections) {
 					frm.doc[fieldname] = "";
@@ -161,6 +164,7 @@ frappe.ui.form.on('Bank Statement Importer', {
 				frm.set_df_property("particulars_select", "options", options);
 				frm.set_df_property("code_select", "options", options);
 				frm.set_df_property("other_party_select", "options", options);
+				frm.set_df_property("balance_select", "options", options);
 
 				// Check if deposit and withdrawal use the same field
 				// This happens when both depositField and withdrawalField exist and point to the same file column
@@ -214,6 +218,9 @@ frappe.ui.form.on('Bank Statement Importer', {
 				if (otherPartyField) {
 					frm.set_value('other_party_select', otherPartyField);
 				}
+				if (balanceField) {
+					frm.set_value('balance_select', balanceField);
+				}
 
 				// Set date format from bank
 				if (bank_mapping.date_format) {
@@ -233,6 +240,7 @@ frappe.ui.form.on('Bank Statement Importer', {
 				frm.refresh_field("particulars_select");
 				frm.refresh_field("code_select");
 				frm.refresh_field("other_party_select");
+				frm.refresh_field("balance_select");
 			}
 		}).then((r) => {
 			if (r.message === true) {
@@ -258,6 +266,7 @@ frappe.ui.form.on('Bank Statement Importer', {
 				let data_len = data.message?.length || 0;
 				const rows = [];
 				let duplicates = 0;
+				let balance_issues = 0;
 				for (let i = 0; i < data_len; i++) {
 					const row = data.message[i];
 					if (i > 0) {
@@ -265,6 +274,9 @@ frappe.ui.form.on('Bank Statement Importer', {
 						if (row.length > 7 && row[7] == 1) {
 							duplicates += 1;
 						}
+						if (row.length > 12 && row[12]) {
+							balance_issues += 1;
+						}
 					}
 				}
 
@@ -327,6 +339,20 @@ frappe.ui.form.on('Bank Statement Importer', {
 						width: 150,
 					}
 				];
+				if (data.message?.[0]?.length > 12) {
+					columns.push(
+						{
+							name: __("Balance"),
+							editable: false,
+							width: 120,
+						},
+						{
+							name: __("Balance Check"),
+							editable: false,
+							width: 250,
+						}
+					);
+				}
 				const datatable_options = {
 					columns: columns,
 					data: rows,
@@ -342,6 +368,13 @@ frappe.ui.form.on('Bank Statement Importer', {
 						message: __(`Duplicate records(${duplicates}) found. Please check and confirm the records prior to submission.`)
 					});
 				}
+				if (balance_issues > 0) {
+					frappe.msgprint({
+						title: __('Balance Check'),
+						indicator: 'orange',
+						message: __('The running balance does not match the statement lines on {0} row(s). See the Balance Check column: lines may be missing or duplicated in the file.', [balance_issues])
+					});
+				}
 			}
 		}).then((r) => {
 			if (r.message === true) {
@@ -369,6 +402,8 @@ frappe.ui.form.on('Bank Statement Importer', {
 					particulars_select: frm.doc.particulars_select,
 					code_select: frm.doc.code_select,
 					other_party_select: frm.doc.other_party_select,
+					balance_select: frm.doc.balance_select,
+					ignore_balance_check: frm.doc.ignore_balance_check,
 				}
 			},
 			btn: frm.page.btn_primary,
@@ -4,6 +4,7 @@ import json
 import logging
 import os
 from datetime import datetime
+from itertools import accumulate
 
 import frappe
 from frappe import _
@@ -15,6 +16,9 @@ from frappe.utils.xlsxutils import (
     read_xlsx_file_from_attached_file,
 )
 
+from advanced_bank_reconciliation.advanced_bank_reconciliation.change_feed import bump_change_versions
+from advanced_bank_reconciliation.utils.locks import ABRLock
+
 logger = frappe.logger("bank_rec", allow_site=True)
 logger.setLevel(logging.INFO)
 
@@ -66,8 +70,13 @@ BANK_MAPPING_FIELD_ORDER = [
     "custom_particulars",
     "custom_code",
     "bank_party_name",
+    "abr_statement_balance",
 ]
 
+# Optional columns appended by build_table when a balance column is mapped
+BALANCE_COLUMN = 11
+BALANCE_CHECK_COLUMN = 12
+
 
 class BankStatementImporter(Document):
     pass
@@ -246,6 +255,9 @@ def get_selected_bank_mapping(importer_data):
     if importer_data.get("other_party_select"):
         selected_mapping["bank_party_name"] = importer_data.get("other_party_select")
 
+    if importer_data.get("balance_select"):
+        selected_mapping["abr_statement_balance"] = importer_data.get("balance_select")
+
     return selected_mapping
 
 
@@ -312,6 +324,7 @@ def normalize_mapping_for_headers(mapping, data_headers):
         ("particulars_select", _("Particulars")),
         ("code_select", _("Code")),
         ("other_party_select", _("Other Party")),
+        ("balance_select", _("Balance")),
     ):
         fields_to_validate.append((select_key, label, False))
 
@@ -383,6 +396,9 @@ def build_table(mapping, data_headers, data_body):
     matching = True
 
     mapping = normalize_mapping_for_headers(mapping, data_headers)
+    has_balance = bool(mapping.get("balance_select"))
+    if has_balance:
+        tbl_header.extend(["Balance", "Balance Check"])
 
     for data_row in data_body:
         # Skip empty rows
@@ -473,11 +489,78 @@ def build_table(mapping, data_headers, data_body):
             )
         tbl_row.append(other_party_value)
 
+        # Running balance, checked below once every row is parsed
+        if has_balance:
+            balance_value = data_row[data_headers.index(mapping["balance_select"])]
+            tbl_row.append(
+                parse_amount(balance_value) if str(balance_value or "").strip() else None
+            )
+            tbl_row.append("")
+
         tbl.append(tbl_row)
 
+    if has_balance:
+        for index, issue in verify_running_balance(tbl[1:]).items():
+            tbl[index + 1][BALANCE_CHECK_COLUMN] = describe_balance_issue(issue)
+
     return tbl
 
 
+def verify_running_balance(rows):
+    """Check a statement's running balance against its own amounts.
+
+    `rows` are build_table rows in file order; rows without a balance still
+    count towards it. Every stated balance is compared with the first one
+    plus the cumulative deposits minus withdrawals since, in one pass, and
+    a row is flagged where that drift changes: a "Gap" when lines are
+    missing (or amounts are wrong), a "Duplicate" when the row repeats the
+    previous line and the bank's balance does not include it. Statements
+    listed newest first are checked in both orders and the better fit wins.
+
+    Returns {row index: {"type": ..., "difference": ...}}.
+    """
+    if sum(1 for row in rows if _row_balance(row) is not None) < 2:
+        return {}
+
+    forward = _balance_issues(rows, range(len(rows)))
+    backward = _balance_issues(rows, range(len(rows) - 1, -1, -1))
+    return forward if len(forward) <= len(backward) else backward
+
+
+def describe_balance_issue(issue):
+    if issue["type"] == "Duplicate":
+        return _("Duplicate: repeats the previous line, which the balance does not include")
+    return _("Gap: balance is off by {0}, a line may be missing").format(issue["difference"])
+
+
+def _balance_issues(rows, order):
+    order = list(order)
+    nets = [flt(rows[index][1]) - flt(rows[index][2]) for index in order]
+    # Drift of each stated balance from opening + cumulative amounts
+    drift = [
+        (index, flt(_row_balance(rows[index]) - running, 2))
+        for index, running in zip(order, accumulate(nets))
+        if _row_balance(rows[index]) is not None
+    ]
+
+    issues = {}
+    for (previous_index, previous_drift), (index, current_drift) in zip(drift, drift[1:]):
+        step = flt(current_drift - previous_drift, 2)
+        if not step:
+            continue
+
+        net = flt(rows[index][1]) - flt(rows[index][2])
+        if step == flt(-net, 2) and rows[index][:5] == rows[previous_index][:5]:
+            issues[index] = {"type": "Duplicate", "difference": step}
+        else:
+            issues[index] = {"type": "Gap", "difference": step}
+    return issues
+
+
+def _row_balance(row):
+    return row[BALANCE_COLUMN] if len(row) > BALANCE_COLUMN else None
+
+
 def parse_date(date_str, format):
     if not date_str:
         return None
@@ -565,8 +648,41 @@ def get_last_transaction(bank_account):
 @frappe.whitelist()
 def publish_records(data_import, importer_data=None):
     import_success = False
+    dataset = (json.loads(data_import))[1:]
+    parsed_importer_data = parse_json_if_required(importer_data)
+
+    # Re-check the running balance server-side; the preview may be stale
+    balance_issues = verify_running_balance(dataset)
+    if balance_issues and not is_truthy(parsed_importer_data.get("ignore_balance_check")):
+        frappe.throw(
+            _(
+                "The statement's running balance does not match its lines on {0} row(s), "
+                "first at row {1}: {2}. Fix the file, or tick Ignore Balance Check to import anyway."
+            ).format(
+                len(balance_issues),
+                min(balance_issues) + 1,
+                describe_balance_issue(balance_issues[min(balance_issues)]),
+            ),
+            title=_("Balance Check Failed"),
+        )
+
+    # One import per bank account at a time, so a double submit cannot
+    # insert the statement twice. Each account is locked on its own, in
+    # sorted order, so imports sharing any account exclude each other.
+    import_locks = []
+    bank_accounts = sorted({item[5] for item in dataset if len(item) > 5 and item[5]})
+    for bank_account in bank_accounts:
+        import_lock = ABRLock(f"statement_import:{bank_account}")
+        if not import_lock.acquire():
+            _release_locks(import_locks)
+            frappe.throw(
+                _("A statement import is already running for {0}. Please wait for it to finish.").format(
+                    bank_account
+                )
+            )
+        import_locks.append(import_lock)
+
     try:
-        dataset = (json.loads(data_import))[1:]
         logger.info("Importing %s bank transactions", len(dataset))
         for item in dataset:
             bank_transaction_dict = {
@@ -600,6 +716,9 @@ def publish_records(data_import, importer_data=None):
             if other_party:
                 bank_transaction_dict["bank_party_name"] = str(other_party)
 
+            if len(item) > BALANCE_COLUMN and item[BALANCE_COLUMN] is not None:
+                bank_transaction_dict["abr_statement_balance"] = flt(item[BALANCE_COLUMN])
+
             bank_transaction = frappe.new_doc("Bank Transaction")
             bank_transaction.update(bank_transaction_dict)
             flip_amount_for_credit_card(bank_transaction)
@@ -607,12 +726,16 @@ def publish_records(data_import, importer_data=None):
             bank_transaction.submit()
         logger.info("Bank transactions submitted successfully")
         import_success = True
+        # The rows commit with the request, possibly long after they were
+        # saved: make open listings reload instead of missing them
+        frappe.db.after_commit.add(lambda: bump_change_versions(bank_accounts))
     except Exception as e:
         logger.error("Publish records error: %s", str(e), exc_info=True)
         frappe.db.rollback()
+    finally:
+        _release_locks(import_locks)
 
     # Save bank mapping independently of import outcome
-    parsed_importer_data = parse_json_if_required(importer_data)
     if is_truthy(parsed_importer_data.get("save_mapping_for_future_use")):
         try:
             save_bank_mapping_for_future_use(parsed_importer_data)
@@ -625,3 +748,8 @@ def publish_records(data_import, importer_data=None):
             )
 
     return import_success
+
+
+def _release_locks(locks):
+    for lock in reversed(locks):
+        lock.release()
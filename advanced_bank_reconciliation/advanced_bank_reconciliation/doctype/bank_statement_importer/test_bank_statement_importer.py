@@ -15,7 +15,27 @@ from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.bank_stat
     parse_date,
     parse_json_if_required,
     publish_records,
+    verify_running_balance,
 )
+from advanced_bank_reconciliation.utils.locks import ABRLock
+
+
+def statement_row(day, deposit, withdrawal, balance, description="Line"):
+    return [
+        f"2026-08-{day:02d}",
+        deposit,
+        withdrawal,
+        description,
+        f"REF-{day}",
+        "_Test Bank Account",
+        "NZD",
+        0,
+        "",
+        "",
+        "",
+        balance,
+        "",
+    ]
 
 
 class TestBankStatementImporter(FrappeTestCase):
@@ -157,5 +177,79 @@ class TestBankStatementImporter(FrappeTestCase):
                 ["Date", "Amount", "Description", "Reference Number"],
             )
 
+    def test_running_balance_that_adds_up_has_no_issues(self):
+        rows = [
+            statement_row(1, 100, 0, 1100),
+            statement_row(2, 0, 40, 1060),
+            statement_row(3, 0, 0, None),
+            statement_row(4, 15, 0, 1075),
+        ]
+        self.assertEqual(verify_running_balance(rows), {})
+
+    def test_running_balance_flags_missing_line(self):
+        rows = [
+            statement_row(1, 100, 0, 1100),
+            statement_row(2, 0, 40, 1060),
+            # a 25 withdrawal between these two lines is missing from the file
+            statement_row(4, 10, 0, 1045),
+            statement_row(5, 5, 0, 1050),
+        ]
+        issues = verify_running_balance(rows)
+        self.assertEqual(list(issues), [2])
+        self.assertEqual(issues[2]["type"], "Gap")
+        self.assertEqual(issues[2]["difference"], -25)
+
+    def test_running_balance_flags_duplicated_line(self):
+        rows = [
+            statement_row(1, 100, 0, 1100),
+            statement_row(2, 0, 40, 1060),
+            statement_row(2, 0, 40, 1060),
+            statement_row(3, 20, 0, 1080),
+        ]
+        issues = verify_running_balance(rows)
+        self.assertEqual(list(issues), [2])
+        self.assertEqual(issues[2]["type"], "Duplicate")
+
+    def test_running_balance_accepts_newest_first_statements(self):
+        rows = [
+            statement_row(3, 20, 0, 1080),
+            statement_row(2, 0, 40, 1060),
+            statement_row(1, 100, 0, 1100),
+        ]
+        self.assertEqual(verify_running_balance(rows), {})
+
+    def test_publish_records_rejects_statement_with_balance_gap(self):
+        header = ["Date", "Deposit", "Withdrawal", "Description", "Reference Number", "Bank Account",
+                  "Currency", "Is Duplicated", "Particulars", "Code", "Other Party", "Balance", "Balance Check"]
+        dataset = [
+            header,
+            statement_row(1, 100, 0, 1100),
+            statement_row(2, 0, 40, 1060),
+            statement_row(3, 20, 0, 1000),
+        ]
+
+        with patch.object(frappe, "new_doc") as new_doc:
+            with self.assertRaises(frappe.ValidationError):
+                publish_records(json.dumps(dataset))
+        new_doc.assert_not_called()
+
+    def test_publish_records_locks_each_bank_account(self):
+        header = ["Date", "Deposit", "Withdrawal", "Description", "Reference Number", "Bank Account",
+                  "Currency", "Is Duplicated", "Particulars", "Code", "Other Party", "Balance", "Balance Check"]
+        other_account_row = statement_row(2, 0, 40, 1060)
+        other_account_row[5] = "_Test Bank Account 2"
+        dataset = [header, statement_row(1, 100, 0, 1100), other_account_row]
+
+        # A single-account import holding the lock blocks a multi-account
+        # import that includes the same account
+        with ABRLock("statement_import:_Test Bank Account"), patch.object(frappe, "new_doc") as new_doc:
+            with self.assertRaisesRegex(frappe.ValidationError, "already running for _Test Bank Account"):
+                publish_records(json.dumps(dataset), json.dumps({"ignore_balance_check": 1}))
+        new_doc.assert_not_called()
+
+        other_lock = ABRLock("statement_import:_Test Bank Account 2")
+        self.assertTrue(other_lock.acquire(renew=False))
+        other_lock.release()
+
     def convert_date(self, date_str, date_format):
         return parse_date(date_str, date_format)
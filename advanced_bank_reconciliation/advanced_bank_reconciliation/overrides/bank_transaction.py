@@ -3,6 +3,9 @@ import logging
 import frappe
 from frappe.utils import flt
 
+from advanced_bank_reconciliation.advanced_bank_reconciliation.validation_queue import (
+    request_validation,
+)
 from advanced_bank_reconciliation.utils.logger import (
     get_logger,
 )
@@ -204,20 +207,18 @@ class ExtendedBankTransaction(BankTransaction):
             )
 
     def trigger_background_validation(self):
-        """Trigger background validation when bank transaction is updated with payment entries"""
+        """Request a background clearance validation of this transaction.
+
+        Requests are coalesced per transaction and validated in batches, see
+        validation_queue.
+        """
         logger = get_logger()
         try:
             # Only trigger validation if this transaction has payment entries
             if self.payment_entries:
-                frappe.enqueue(
-                    "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool.validate_single_bank_transaction",
-                    bank_transaction_name=self.name,
-                    queue="long",
-                    timeout=300,
-                    job_name="validate_bank_transaction_%s" % self.name,
-                )
+                request_validation(self.name)
                 logger.info(
-                    "Triggered background validation for bank transaction %s", self.name
+                    "Requested background validation for bank transaction %s", self.name
                 )
         except Exception as e:
             logger.error(
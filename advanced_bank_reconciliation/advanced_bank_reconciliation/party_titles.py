@@ -0,0 +1,117 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Batched display titles of party-like documents.
+
+get_party_titles resolves the titles of many (doctype, name) pairs with one
+IN query per doctype. Resolved titles are kept in a Redis hash per doctype,
+each entry stamped with its expiry, so renames show up within
+PARTY_TITLE_TTL seconds without any invalidation hooks.
+"""
+
+import json
+import time
+
+import frappe
+
+PARTY_TITLE_CACHE_PREFIX = "abr:party_title:"
+PARTY_TITLE_TTL = 600
+
+TITLE_FIELDS = {
+	"Customer": "customer_name",
+	"Supplier": "supplier_name",
+	"Employee": "employee_name",
+}
+
+
+def get_party_titles(parties):
+	"""Titles of the given (doctype, name) pairs as {(doctype, name): title}.
+	Documents without a title, or that cannot be read, fall back to their
+	name. Pairs with an empty doctype or name are skipped."""
+	names_by_doctype = {}
+	for doctype, name in parties:
+		if doctype and name:
+			names_by_doctype.setdefault(doctype, set()).add(name)
+
+	titles = {}
+	for doctype, names in names_by_doctype.items():
+		names = sorted(names)
+		cached = _read_cached_titles(doctype, names)
+		missing = [name for name in names if name not in cached]
+		if missing:
+			resolved = _query_titles(doctype, missing)
+			if resolved is not None:
+				_write_cached_titles(doctype, resolved)
+			cached.update(resolved or {})
+
+		for name in names:
+			titles[(doctype, name)] = cached.get(name) or name
+
+	return titles
+
+
+def get_party_title(doctype, name):
+	if not doctype or not name:
+		return ""
+	return get_party_titles([(doctype, name)])[(doctype, name)]
+
+
+def clear_party_titles(doctype=None):
+	if doctype:
+		frappe.cache().delete_value(_cache_key(doctype))
+	else:
+		frappe.cache().delete_keys(PARTY_TITLE_CACHE_PREFIX)
+
+
+def get_title_field(doctype):
+	fieldname = TITLE_FIELDS.get(doctype)
+	if fieldname:
+		return fieldname
+	return frappe.get_meta(doctype).title_field or "name"
+
+
+def _query_titles(doctype, names):
+	"""{name: title} for the names that exist, or None when the doctype or
+	its title field cannot be read (nothing is cached then)."""
+	try:
+		fieldname = get_title_field(doctype)
+		if fieldname == "name":
+			rows = frappe.get_all(doctype, filters={"name": ["in", names]}, pluck="name")
+			return {name: name for name in rows}
+
+		rows = frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["name", fieldname])
+	except Exception:
+		return None
+
+	return {row.name: row.get(fieldname) or row.name for row in rows}
+
+
+def _read_cached_titles(doctype, names):
+	cache = frappe.cache()
+	values = cache.execute_command("HMGET", cache.make_key(_cache_key(doctype)), *names)
+	now = time.time()
+
+	titles = {}
+	for name, value in zip(names, values or [], strict=False):
+		if not value:
+			continue
+		expires_at, title = json.loads(value)
+		if expires_at > now:
+			titles[name] = title
+	return titles
+
+
+def _write_cached_titles(doctype, titles):
+	if not titles:
+		return
+
+	cache = frappe.cache()
+	key = cache.make_key(_cache_key(doctype))
+	expires_at = time.time() + PARTY_TITLE_TTL
+	pipe = cache.pipeline()
+	pipe.hset(key, mapping={name: json.dumps([expires_at, title]) for name, title in titles.items()})
+	pipe.expire(key, PARTY_TITLE_TTL)
+	pipe.execute()
+
+
+def _cache_key(doctype):
+	return f"{PARTY_TITLE_CACHE_PREFIX}{doctype}"
@@ -0,0 +1,84 @@
+// Copyright (c) 2026, HighFlyer and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["ABR Clearance Audit"] = {
+	filters: [
+		{
+			fieldname: "company",
+			label: __("Company"),
+			fieldtype: "Link",
+			options: "Company",
+			default: frappe.defaults.get_user_default("Company"),
+			reqd: 1,
+		},
+		{
+			fieldname: "bank_account",
+			label: __("Bank Account"),
+			fieldtype: "Link",
+			options: "Bank Account",
+			reqd: 1,
+			get_query: function () {
+				return {
+					filters: {
+						company: frappe.query_report.get_filter_value("company"),
+						is_company_account: 1,
+					},
+				};
+			},
+		},
+		{
+			fieldname: "from_date",
+			label: __("From Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.add_months(frappe.datetime.get_today(), -1),
+			reqd: 1,
+		},
+		{
+			fieldname: "to_date",
+			label: __("To Date"),
+			fieldtype: "Date",
+			default: frappe.datetime.get_today(),
+			reqd: 1,
+		},
+	],
+
+	onload: function (report) {
+		// Repairing is limited to the roles the endpoint allows
+		if (!frappe.user.has_role(["Accounts Manager", "System Manager"])) {
+			return;
+		}
+
+		report.page.add_inner_button(__("Repair All"), function () {
+			const filters = report.get_values();
+			if (!filters) {
+				return;
+			}
+
+			frappe.confirm(
+				__("Set every clearance date in this period to its expected value?"),
+				function () {
+					frappe.call({
+						method: "advanced_bank_reconciliation.advanced_bank_reconciliation.report.abr_clearance_audit.abr_clearance_audit.repair_clearance_dates",
+						args: {
+							company: filters.company,
+							bank_account: filters.bank_account,
+							from_date: filters.from_date,
+							to_date: filters.to_date,
+						},
+						freeze: true,
+						freeze_message: __("Repairing clearance dates..."),
+						callback: function (r) {
+							if (r.message) {
+								frappe.show_alert({
+									message: __("Repaired {0} clearance dates", [r.message.repaired]),
+									indicator: "green",
+								});
+								report.refresh();
+							}
+						},
+					});
+				}
+			);
+		});
+	},
+};
@@ -0,0 +1,136 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import (
+	recompute_clearance_dates,
+)
+from advanced_bank_reconciliation.api.permission import assert_company_access
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	_validate_filters(filters)
+
+	result = recompute_clearance_dates(filters.bank_account, filters.from_date, filters.to_date, dry_run=True)
+	data = [_audit_row(change) for change in result["changes"]]
+	return get_columns(), data, None, None, get_report_summary(result["summary"])
+
+
+@frappe.whitelist(methods=["POST"])
+def repair_clearance_dates(bank_account, from_date, to_date, company=None):
+	"""Write the expected clearance dates for the audited period.
+
+	The diff is recomputed rather than taken from the client, so the repair
+	applies exactly what is wrong at the time it runs.
+	"""
+	frappe.only_for(("Accounts Manager", "System Manager"))
+	filters = frappe._dict(bank_account=bank_account, from_date=from_date, to_date=to_date, company=company)
+	_validate_filters(filters)
+
+	result = recompute_clearance_dates(bank_account, from_date, to_date)
+	return {"repaired": len(result["changes"]), "summary": result["summary"]}
+
+
+def _validate_filters(filters):
+	if not (filters.bank_account and filters.from_date and filters.to_date):
+		frappe.throw(_("Bank Account, From Date and To Date are required"))
+	company = frappe.db.get_value("Bank Account", filters.bank_account, "company")
+	if filters.company and filters.company != company:
+		frappe.throw(
+			_("Bank Account {0} does not belong to company {1}").format(filters.bank_account, filters.company)
+		)
+	assert_company_access(company)
+
+
+def _audit_row(change):
+	if change["doctype"] == "Sales Invoice Payment":
+		voucher_type, voucher, payment_row = "Sales Invoice", change["parent"], change["name"]
+	else:
+		voucher_type, voucher, payment_row = change["doctype"], change["name"], None
+
+	if not change["from"]:
+		issue = _("Not Cleared")
+	elif not change["to"]:
+		issue = _("Cleared Without Full Allocation")
+	else:
+		issue = _("Wrong Clearance Date")
+
+	return {
+		"voucher_type": voucher_type,
+		"voucher": voucher,
+		"payment_row": payment_row,
+		"stored_clearance_date": change["from"],
+		"expected_clearance_date": change["to"],
+		"issue": issue,
+	}
+
+
+def get_columns():
+	return [
+		{
+			"label": _("Voucher Type"),
+			"fieldname": "voucher_type",
+			"fieldtype": "Link",
+			"options": "DocType",
+			"width": 150,
+		},
+		{
+			"label": _("Voucher"),
+			"fieldname": "voucher",
+			"fieldtype": "Dynamic Link",
+			"options": "voucher_type",
+			"width": 200,
+		},
+		{
+			"label": _("Payment Row"),
+			"fieldname": "payment_row",
+			"fieldtype": "Data",
+			"width": 120,
+		},
+		{
+			"label": _("Stored Clearance Date"),
+			"fieldname": "stored_clearance_date",
+			"fieldtype": "Date",
+			"width": 160,
+		},
+		{
+			"label": _("Expected Clearance Date"),
+			"fieldname": "expected_clearance_date",
+			"fieldtype": "Date",
+			"width": 160,
+		},
+		{
+			"label": _("Issue"),
+			"fieldname": "issue",
+			"fieldtype": "Data",
+			"width": 220,
+		},
+	]
+
+
+def get_report_summary(summary):
+	to_set = sum(counts["set"] for counts in summary.values())
+	to_clear = sum(counts["cleared"] for counts in summary.values())
+	return [
+		{
+			"value": to_set + to_clear,
+			"label": _("Mismatches"),
+			"indicator": "Red" if to_set + to_clear else "Green",
+			"datatype": "Int",
+		},
+		{
+			"value": to_set,
+			"label": _("Dates To Set"),
+			"indicator": "Blue",
+			"datatype": "Int",
+		},
+		{
+			"value": to_clear,
+			"label": _("Dates To Clear"),
+			"indicator": "Orange",
+			"datatype": "Int",
+		},
+	]
@@ -0,0 +1,63 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, nowdate
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	create_payment_entry_for_invoice,
+	reconcile_vouchers,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	TEST_COMPANY,
+	create_test_bank_transaction,
+	create_test_sales_invoice,
+	setup_abr_test_data,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.report.abr_clearance_audit.abr_clearance_audit import (
+	execute,
+	repair_clearance_dates,
+)
+
+
+class TestABRClearanceAudit(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+
+	def test_audit_lists_mismatches_and_repair_fixes_them(self):
+		date = add_days(nowdate(), -50)
+		si = create_test_sales_invoice(outstanding=90)
+		bt = create_test_bank_transaction(self.bank_account, deposit=90, date=date)
+		pe = create_payment_entry_for_invoice(si, bt, 90, "Receive", "Customer", si.customer)
+		reconcile_vouchers(
+			bt.name, json.dumps([{"payment_doctype": "Payment Entry", "payment_name": pe.name, "amount": 90}])
+		)
+		frappe.db.set_value("Payment Entry", pe.name, "clearance_date", None)
+		filters = {"company": TEST_COMPANY, "bank_account": self.bank_account, "from_date": date, "to_date": date}
+
+		_columns, data, _message, _chart, summary = execute(filters)
+
+		row = next(row for row in data if row["voucher"] == pe.name)
+		self.assertEqual(row["voucher_type"], "Payment Entry")
+		self.assertIsNone(row["stored_clearance_date"])
+		self.assertEqual(row["expected_clearance_date"], str(bt.date))
+		self.assertGreaterEqual(summary[0]["value"], 1)
+
+		repair_clearance_dates(self.bank_account, date, date)
+
+		self.assertEqual(str(frappe.db.get_value("Payment Entry", pe.name, "clearance_date")), str(bt.date))
+		self.assertNotIn(pe.name, [row["voucher"] for row in execute(filters)[1]])
+
+	def test_bank_account_must_belong_to_the_company_filter(self):
+		date = nowdate()
+		filters = {"company": "_Test Company 1", "bank_account": self.bank_account, "from_date": date, "to_date": date}
+
+		with self.assertRaisesRegex(frappe.ValidationError, "does not belong to company"):
+			execute(filters)
+		with self.assertRaisesRegex(frappe.ValidationError, "does not belong to company"):
+			repair_clearance_dates(self.bank_account, date, date, company="_Test Company 1")
@@ -38,9 +38,10 @@ def test_single_transaction_validation():
     print(f"Testing with transaction: {transaction_name}")
     
     try:
-        from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import validate_single_bank_transaction
+        from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import recompute_clearance_for_transactions
         
-        validate_single_bank_transaction(transaction_name)
+        recompute_clearance_for_transactions([transaction_name])
+        frappe.db.commit()
         print("✓ Single transaction validation completed successfully")
         return True
         
@@ -0,0 +1,181 @@
+# Copyright (c) 2026, HighFlyer and contributors
+# For license information, please see license.txt
+"""Coalesced background validation of Bank Transactions.
+
+Saving a reconciled Bank Transaction requests a clearance re-validation.
+Requests go into a Redis set, so a transaction saved several times before a
+worker gets to it is validated once, and a single drain job (deduplicated
+by RQ job id) empties the set in batches through
+recompute_clearance_for_transactions. When a batch fails its transactions
+are retried one at a time, and only the ones that still fail go back into
+the set; a transaction that fails MAX_VALIDATION_ATTEMPTS drains in a row is
+parked instead, so one bad row cannot keep the queue busy forever. The
+scheduler re-enqueues the drain when members are left behind, e.g. added
+while a drain was finishing or put back after a failure.
+"""
+
+import frappe
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.clearance import (
+	recompute_clearance_for_transactions,
+)
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+logger = get_logger()
+
+PENDING_KEY = "abr:validation:pending"
+STATS_KEY = "abr:validation:stats"
+ATTEMPTS_KEY = "abr:validation:attempts"
+PARKED_KEY = "abr:validation:parked"
+DRAIN_JOB_ID = "abr_validation_drain"
+DRAIN_BATCH_SIZE = 200
+MAX_VALIDATION_ATTEMPTS = 5
+
+
+def request_validation(bank_transaction_name):
+	"""Queue a clearance re-validation of one Bank Transaction."""
+	cache = frappe.cache()
+	pipe = cache.pipeline()
+	pipe.sadd(cache.make_key(PENDING_KEY), bank_transaction_name)
+	pipe.hincrby(cache.make_key(STATS_KEY), "requested", 1)
+	added, _requested = pipe.execute()
+	if added:
+		cache.hincrby(cache.make_key(STATS_KEY), "queued", 1)
+
+	_enqueue_drain()
+
+
+def enqueue_pending_validations():
+	"""Scheduler safety net: start a drain if requests are waiting."""
+	if frappe.cache().execute_command("SCARD", frappe.cache().make_key(PENDING_KEY)):
+		_enqueue_drain_now()
+
+
+def drain_validation_queue():
+	"""Validate every pending Bank Transaction, DRAIN_BATCH_SIZE at a time.
+
+	A failed batch is retried one transaction at a time so the rest of the
+	batch still gets validated. Transactions that fail on their own are put
+	back in the pending set once the drain ends, for the scheduler safety net
+	to retry, until they have failed MAX_VALIDATION_ATTEMPTS times and are
+	parked in PARKED_KEY."""
+	cache = frappe.cache()
+	pending_key = cache.make_key(PENDING_KEY)
+	failed = []
+
+	try:
+		while True:
+			names = [
+				frappe.safe_decode(name) for name in cache.execute_command("SPOP", pending_key, DRAIN_BATCH_SIZE) or []
+			]
+			if not names:
+				return
+
+			try:
+				changes = recompute_clearance_for_transactions(names)
+				frappe.db.commit()
+			except Exception:
+				frappe.db.rollback()
+				logger.error("Background validation failed for %s bank transactions", len(names), exc_info=True)
+				if len(names) == 1:
+					validated, changes = [], []
+					_record_failure(names[0], failed)
+				else:
+					validated, changes = _validate_one_by_one(names, failed)
+			else:
+				validated = names
+
+			if not validated:
+				continue
+
+			logger.info("Validated %s bank transactions, %s clearance dates changed", len(validated), len(changes))
+			pipe = cache.pipeline()
+			pipe.hdel(cache.make_key(ATTEMPTS_KEY), *validated)
+			pipe.srem(cache.make_key(PARKED_KEY), *validated)
+			pipe.hincrby(cache.make_key(STATS_KEY), "validated", len(validated))
+			pipe.hincrby(cache.make_key(STATS_KEY), "runs", 1)
+			pipe.execute()
+	finally:
+		if failed:
+			# Held back until the drain ends so this run does not pop them again
+			cache.execute_command("SADD", pending_key, *failed)
+
+
+def _validate_one_by_one(names, failed):
+	validated, changes = [], []
+	for name in names:
+		try:
+			changes.extend(recompute_clearance_for_transactions([name]))
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			logger.error("Background validation failed for bank transaction %s", name, exc_info=True)
+			_record_failure(name, failed)
+		else:
+			validated.append(name)
+
+	return validated, changes
+
+
+def _record_failure(name, failed):
+	cache = frappe.cache()
+	attempts = cache.hincrby(cache.make_key(ATTEMPTS_KEY), name, 1)
+	cache.hincrby(cache.make_key(STATS_KEY), "failed", 1)
+	if attempts < MAX_VALIDATION_ATTEMPTS:
+		failed.append(name)
+		return
+
+	# Saving the transaction again requests a fresh validation
+	logger.error("Parking bank transaction %s after %s failed validations", name, attempts)
+	pipe = cache.pipeline()
+	pipe.hdel(cache.make_key(ATTEMPTS_KEY), name)
+	pipe.sadd(cache.make_key(PARKED_KEY), name)
+	pipe.execute()
+
+
+def _enqueue_drain():
+	# Requests made in one transaction share a single enqueue after its commit
+	if frappe.flags.abr_validation_drain_pending:
+		return
+	frappe.flags.abr_validation_drain_pending = True
+	frappe.db.after_commit.add(_enqueue_drain_now)
+	frappe.db.after_rollback.add(_reset_drain_pending)
+
+
+def _enqueue_drain_now():
+	_reset_drain_pending()
+	frappe.enqueue(
+		"advanced_bank_reconciliation.advanced_bank_reconciliation.validation_queue.drain_validation_queue",
+		queue="long",
+		timeout=1800,
+		job_id=DRAIN_JOB_ID,
+		deduplicate=True,
+	)
+
+
+def _reset_drain_pending():
+	frappe.flags.abr_validation_drain_pending = False
+
+
+@frappe.whitelist()
+def get_validation_queue_stats():
+	"""Queue depth and how well validation requests are being coalesced."""
+	frappe.only_for("System Manager")
+
+	cache = frappe.cache()
+	raw = cache.execute_command("HGETALL", cache.make_key(STATS_KEY)) or {}
+	stats = {"requested": 0, "queued": 0, "validated": 0, "failed": 0, "runs": 0}
+	stats.update({frappe.safe_decode(field): int(value) for field, value in raw.items()})
+
+	stats["pending"] = cache.execute_command("SCARD", cache.make_key(PENDING_KEY))
+	stats["parked"] = cache.execute_command("SCARD", cache.make_key(PARKED_KEY))
+	# Requests per validation actually run; 1.0 means nothing was coalesced
+	stats["coalesce_ratio"] = round(stats["requested"] / stats["validated"], 2) if stats["validated"] else 0
+	stats["avg_batch_size"] = round(stats["validated"] / stats["runs"], 1) if stats["runs"] else 0
+	return stats
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_validation_queue_stats():
+	frappe.only_for("System Manager")
+	frappe.cache().delete(frappe.cache().make_key(STATS_KEY))
@@ -1,15 +1,24 @@
+import base64
+import json
+import re
+
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, nowdate
+from frappe.utils import add_to_date, cint, flt, get_datetime, getdate, now_datetime, nowdate
 from frappe.utils.jinja_globals import is_rtl
 
+from advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache import (
+	get_cached_account_balance,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.change_feed import get_change_version
 from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
+	_add_party_display_to_reconciled_transactions,
 	get_abr_default_settings,
-	get_account_balance,
 	get_accounting_dimensions_for_dialog,
 	get_bank_transactions as get_existing_bank_transactions,
 	get_reconciled_bank_transactions,
 )
+from advanced_bank_reconciliation.api.columnar import encode_rows
 from advanced_bank_reconciliation.api.permission import (
 	assert_bank_account_access,
 	assert_bank_transaction_access,
@@ -124,6 +133,359 @@ def _get_bank_account_companies():
 	return sorted({company for company in rows if company})
 
 
+DEFAULT_PAGE_LENGTH = 100
+MAX_PAGE_LENGTH = 500
+
+# Sort keys of the paged listing; every one is tie-broken by name for keyset paging
+TRANSACTION_SORT_EXPRESSIONS = {
+	"date": "bt.date",
+	"amount": "(bt.deposit - bt.withdrawal)",
+	"party": "bt.party",
+}
+# Sort keys whose column may be NULL. They are sorted on the bare column so
+# the (bank_account, party, name) index serves the ORDER BY and the keyset
+# range; MariaDB puts NULLs first ascending and last descending.
+NULLABLE_SORT_KEYS = {"party"}
+
+# Transaction columns of the listing queries, with the linked payments of
+# reconciled transactions aggregated into a JSON array
+_TRANSACTION_COLUMNS = """
+	bt.name, bt.date, bt.deposit, bt.withdrawal, bt.currency, bt.description,
+	bt.bank_account, bt.company, bt.unallocated_amount, bt.reference_number,
+	bt.party_type, bt.party, bt.custom_particulars, bt.custom_code, bt.bank_party_name,
+	CASE WHEN bt.unallocated_amount <= 0 THEN (
+		SELECT JSON_ARRAYAGG(
+			JSON_OBJECT(
+				'payment_document', btp.payment_document,
+				'payment_entry', btp.payment_entry,
+				'allocated_amount', btp.allocated_amount
+			)
+			ORDER BY btp.idx
+		)
+		FROM `tabBank Transaction Payments` btp
+		WHERE btp.parent = bt.name
+	) END AS linked_payments_json
+"""
+
+# Narrative fields of the transaction search, in the column order of the
+# FULLTEXT index created by setup.create_abr_indexes
+TRANSACTION_SEARCH_FIELDS = (
+	"description",
+	"bank_party_name",
+	"custom_particulars",
+	"custom_code",
+	"reference_number",
+	"party",
+)
+TRANSACTION_SEARCH_INDEX = "abr_transaction_search"
+# InnoDB does not index words shorter than innodb_ft_min_token_size (3)
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+# A change feed reaches this many seconds before the last row it delivered,
+# for rows saved earlier by transactions that committed later. Writers that
+# stay uncommitted for longer bump the change version, see change_feed.
+CHANGE_TOKEN_SKEW = 5
+# A change feed longer than this tells the client to reload the listing
+MAX_TRANSACTION_CHANGES = 500
+
+TRANSACTION_STATUS_CONDITIONS = {
+	"unreconciled": "bt.unallocated_amount > 0",
+	"reconciled": "bt.unallocated_amount <= 0",
+	"all": None,
+}
+
+
+def _encode_cursor(sort_value, name):
+	payload = json.dumps([sort_value, name], default=str)
+	return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor):
+	try:
+		sort_value, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+	except Exception:
+		frappe.throw(_("Invalid transaction cursor."))
+	return sort_value, name
+
+
+def _encode_change_token(last_modified, version):
+	payload = json.dumps([last_modified, version], default=str)
+	return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_change_token(token):
+	try:
+		last_modified, version = json.loads(base64.urlsafe_b64decode(token.encode()))
+		return get_datetime(last_modified), cint(version)
+	except Exception:
+		frappe.throw(_("Invalid transaction change token."))
+
+
+def _issue_change_token(bank_account):
+	"""A token for changes made to the account's transactions from now on,
+	starting at the latest modified among them."""
+	version = get_change_version(bank_account)
+	last_modified = frappe.db.sql(
+		"""
+		SELECT MAX(modified)
+		FROM `tabBank Transaction`
+		WHERE bank_account = %s
+		""",
+		(bank_account,),
+	)[0][0]
+	return _encode_change_token(last_modified or now_datetime(), version)
+
+
+def _escape_like(value):
+	return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _get_listing_conditions(
+	status="unreconciled",
+	from_date=None,
+	to_date=None,
+	direction=None,
+	min_amount=None,
+	max_amount=None,
+	search=None,
+	party=None,
+):
+	"""SQL conditions on `bt` and their params for the listing filters, shared
+	by the paged listing and the change feed."""
+	if status not in TRANSACTION_STATUS_CONDITIONS:
+		frappe.throw(_("Unsupported transaction status {0}.").format(status))
+
+	params = {}
+	conditions = ["bt.docstatus = 1"]
+
+	if TRANSACTION_STATUS_CONDITIONS[status]:
+		conditions.append(TRANSACTION_STATUS_CONDITIONS[status])
+	if from_date:
+		conditions.append("bt.date >= %(from_date)s")
+		params["from_date"] = from_date
+	if to_date:
+		conditions.append("bt.date <= %(to_date)s")
+		params["to_date"] = to_date
+	if direction == "deposit":
+		conditions.append("bt.deposit > 0")
+	elif direction == "withdrawal":
+		conditions.append("bt.withdrawal > 0")
+	elif direction:
+		frappe.throw(_("Unsupported direction {0}.").format(direction))
+	# One of deposit and withdrawal is zero, so their sum is the absolute amount
+	if min_amount not in (None, ""):
+		conditions.append("(bt.deposit + bt.withdrawal) >= %(min_amount)s")
+		params["min_amount"] = flt(min_amount)
+	if max_amount not in (None, ""):
+		conditions.append("(bt.deposit + bt.withdrawal) <= %(max_amount)s")
+		params["max_amount"] = flt(max_amount)
+	if search and search.strip():
+		conditions.append(_get_search_condition(search, params))
+	if party == "set":
+		conditions.append("IFNULL(bt.party, '') != ''")
+	elif party == "unset":
+		conditions.append("IFNULL(bt.party, '') = ''")
+	elif party:
+		frappe.throw(_("Unsupported party filter {0}.").format(party))
+
+	return conditions, params
+
+
+def _get_search_condition(search, params):
+	"""Match every word of `search` as a word prefix in TRANSACTION_SEARCH_FIELDS,
+	through the FULLTEXT index. Searches with words the index cannot hold, or
+	sites without the index, match the same word prefixes with REGEXP, so the
+	results do not depend on the length of the words."""
+	words = re.findall(r"\w+", search)
+	if not words:
+		return "1 = 1"
+
+	if min(len(word) for word in words) >= FULLTEXT_MIN_WORD_LENGTH and has_search_index():
+		params["search_terms"] = " ".join(f"+{word}*" for word in words)
+		columns = ", ".join(f"bt.{field}" for field in TRANSACTION_SEARCH_FIELDS)
+		return f"MATCH({columns}) AGAINST (%(search_terms)s IN BOOLEAN MODE)"
+
+	word_conditions = []
+	for index, word in enumerate(words):
+		# A word starts at the beginning of the value or after a non-word character
+		params[f"search_word_{index}"] = f"(^|[^[:alnum:]_]){word}"
+		word_conditions.append(
+			"({0})".format(
+				" OR ".join(f"bt.{field} REGEXP %(search_word_{index})s" for field in TRANSACTION_SEARCH_FIELDS)
+			)
+		)
+	return "({0})".format(" AND ".join(word_conditions))
+
+
+def has_search_index():
+	return frappe.cache().get_value(
+		"abr:transaction_search_index",
+		generator=lambda: bool(
+			frappe.db.sql(
+				"SHOW INDEX FROM `tabBank Transaction` WHERE Key_name = %s", (TRANSACTION_SEARCH_INDEX,)
+			)
+		),
+	)
+
+
+def _get_transaction_page(
+	bank_account,
+	from_date=None,
+	to_date=None,
+	status="unreconciled",
+	page_length=None,
+	cursor=None,
+	sort_by=None,
+	sort_order=None,
+	direction=None,
+	min_amount=None,
+	max_amount=None,
+	search=None,
+	party=None,
+):
+	"""One page of the account's transactions, filtered and sorted in SQL and
+	paged by a keyset cursor over (sort key, name)."""
+	assert_bank_account_access(bank_account)
+	change_token = _issue_change_token(bank_account)
+
+	sort_by = sort_by or "date"
+	sort_order = (sort_order or "asc").lower()
+	if sort_by not in TRANSACTION_SORT_EXPRESSIONS:
+		frappe.throw(_("Unsupported sort key {0}.").format(sort_by))
+	if sort_order not in ("asc", "desc"):
+		frappe.throw(_("Unsupported sort order {0}.").format(sort_order))
+
+	page_length = min(cint(page_length) or DEFAULT_PAGE_LENGTH, MAX_PAGE_LENGTH)
+	sort_expression = TRANSACTION_SORT_EXPRESSIONS[sort_by]
+	conditions, params = _get_listing_conditions(
+		status, from_date, to_date, direction, min_amount, max_amount, search, party
+	)
+	conditions.insert(0, "bt.bank_account = %(bank_account)s")
+	params.update({"bank_account": bank_account, "page_length": page_length + 1})
+
+	if cursor:
+		params["cursor_value"], params["cursor_name"] = _decode_cursor(cursor)
+		conditions.append(
+			_get_keyset_condition(
+				sort_expression, sort_order, params["cursor_value"], sort_by in NULLABLE_SORT_KEYS
+			)
+		)
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT {_TRANSACTION_COLUMNS}, {sort_expression} AS sort_value
+		FROM `tabBank Transaction` bt
+		WHERE {" AND ".join(conditions)}
+		ORDER BY {sort_expression} {sort_order}, bt.name {sort_order}
+		LIMIT %(page_length)s
+		""",
+		params,
+		as_dict=True,
+	)
+
+	next_cursor = None
+	if len(rows) > page_length:
+		rows = rows[:page_length]
+		next_cursor = _encode_cursor(rows[-1].sort_value, rows[-1].name)
+
+	return {
+		"transactions": _listing_rows_to_dtos(rows),
+		"next_cursor": next_cursor,
+		"change_token": change_token,
+	}
+
+
+def _get_keyset_condition(sort_expression, sort_order, cursor_value, nullable=False):
+	"""Rows after the cursor row in (sort key, name) order."""
+	comparison = ">" if sort_order == "asc" else "<"
+	after_name = f"bt.name {comparison} %(cursor_name)s"
+	if not nullable:
+		return f"""({sort_expression} {comparison} %(cursor_value)s
+			OR ({sort_expression} = %(cursor_value)s AND {after_name}))"""
+
+	if cursor_value is None:
+		if sort_order == "asc":
+			return f"(({sort_expression} IS NULL AND {after_name}) OR {sort_expression} IS NOT NULL)"
+		return f"({sort_expression} IS NULL AND {after_name})"
+
+	condition = f"""{sort_expression} {comparison} %(cursor_value)s
+		OR ({sort_expression} = %(cursor_value)s AND {after_name})"""
+	if sort_order == "desc":
+		condition += f" OR {sort_expression} IS NULL"
+	return f"({condition})"
+
+
+def _get_searched_transactions(bank_account, from_date=None, to_date=None, status="unreconciled", search=None):
+	"""Every transaction matching `search`, walked page by page in (date,
+	name) order."""
+	transactions = []
+	cursor = None
+	while True:
+		page = _get_transaction_page(
+			bank_account, from_date, to_date, status, page_length=MAX_PAGE_LENGTH, cursor=cursor, search=search
+		)
+		transactions.extend(page["transactions"])
+		cursor = page["next_cursor"]
+		if not cursor:
+			return transactions
+
+
+def _get_all_transactions(bank_account, from_date=None, to_date=None):
+	"""Unreconciled and reconciled transactions of the period in one query,
+	ordered by (date, name) in the database."""
+	conditions = ""
+	if from_date:
+		conditions += " AND bt.date >= %(from_date)s"
+	if to_date:
+		conditions += " AND bt.date <= %(to_date)s"
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT {_TRANSACTION_COLUMNS}
+		FROM `tabBank Transaction` bt
+		WHERE bt.bank_account = %(bank_account)s
+			AND bt.docstatus = 1
+			{conditions}
+		ORDER BY bt.date, bt.name
+		""",
+		{"bank_account": bank_account, "from_date": from_date, "to_date": to_date},
+		as_dict=True,
+	)
+	return _listing_rows_to_dtos(rows)
+
+
+def _listing_rows_to_dtos(rows):
+	"""DTOs for rows selected with _TRANSACTION_COLUMNS. The party display of
+	a reconciled transaction comes from its first linked payment."""
+	reconciled = []
+	for row in rows:
+		row.linked_payments = [
+			{
+				"payment_document": payment.get("payment_document"),
+				"payment_entry": payment.get("payment_entry"),
+				"allocated_amount": flt(payment.get("allocated_amount")),
+			}
+			for payment in json.loads(row.pop("linked_payments_json", None) or "[]")
+		]
+		if flt(row.unallocated_amount) <= 0:
+			first_payment = row.linked_payments[0] if row.linked_payments else {}
+			row.payment_document = first_payment.get("payment_document")
+			row.payment_entry = first_payment.get("payment_entry")
+			row.allocated_amount = first_payment.get("allocated_amount")
+			reconciled.append(row)
+
+	_add_party_display_to_reconciled_transactions(reconciled)
+	return [
+		{
+			**_transaction_to_dto(
+				row, status="Unreconciled" if flt(row.unallocated_amount) > 0 else "Reconciled"
+			),
+			"linked_payments": row.linked_payments,
+		}
+		for row in rows
+	]
+
+
 def _get_filtered_transactions(bank_account, from_date=None, to_date=None, status="unreconciled"):
 	assert_bank_account_access(bank_account)
 
@@ -138,9 +500,7 @@ def _get_filtered_transactions(bank_account, from_date=None, to_date=None, statu
 			for row in get_reconciled_bank_transactions(bank_account, from_date, to_date)
 		])
 	if status == "all":
-		unreconciled = _get_filtered_transactions(bank_account, from_date, to_date, "unreconciled")
-		reconciled = _get_filtered_transactions(bank_account, from_date, to_date, "reconciled")
-		return sorted(unreconciled + reconciled, key=lambda row: (row.get("date"), row.get("name")))
+		return _get_all_transactions(bank_account, from_date, to_date)
 
 	frappe.throw(_("Unsupported transaction status {0}.").format(status))
 
@@ -234,25 +594,199 @@ def get_statement_summary(bank_account, from_date=None, to_date=None):
 	assert_bank_account_access(bank_account)
 	from_date = _date_or_none(from_date)
 	to_date = _date_or_none(to_date)
-	unreconciled = get_existing_bank_transactions(bank_account, from_date, to_date)
 	cleared_balance_date = to_date or getdate(nowdate())
 
 	return {
 		"bank_account": bank_account,
 		"from_date": from_date,
 		"to_date": to_date,
-		"unreconciled_count": len(unreconciled),
 		"selected_amount": None,
-		"cleared_balance": flt(get_account_balance(bank_account, cleared_balance_date)),
-		"unreconciled_total": sum(abs(flt(row.get("unallocated_amount"))) for row in unreconciled),
+		"cleared_balance": flt(get_cached_account_balance(bank_account, cleared_balance_date)),
+		**_get_transaction_totals(bank_account, from_date, to_date),
+	}
+
+
+def _get_transaction_totals(bank_account, from_date=None, to_date=None):
+	"""Counts and unreconciled totals of the submitted transactions in the
+	period, aggregated in SQL. Unreconciled means unallocated_amount > 0, as
+	in get_bank_transactions."""
+	conditions = ""
+	if from_date:
+		conditions += " AND bt.date >= %(from_date)s"
+	if to_date:
+		conditions += " AND bt.date <= %(to_date)s"
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT
+			bt.status,
+			CASE
+				WHEN bt.deposit > 0 THEN 'deposit'
+				WHEN bt.withdrawal > 0 THEN 'withdrawal'
+				ELSE 'unknown'
+			END AS direction,
+			COUNT(*) AS count,
+			SUM(bt.unallocated_amount > 0) AS unreconciled_count,
+			SUM(CASE WHEN bt.unallocated_amount > 0 THEN bt.unallocated_amount ELSE 0 END) AS unreconciled_total
+		FROM `tabBank Transaction` bt
+		WHERE bt.bank_account = %(bank_account)s
+			AND bt.docstatus = 1
+			{conditions}
+		GROUP BY bt.status, direction
+		""",
+		{"bank_account": bank_account, "from_date": from_date, "to_date": to_date},
+		as_dict=True,
+	)
+
+	status_counts = {}
+	unreconciled_by_direction = {
+		direction: {"count": 0, "total": 0.0} for direction in ("deposit", "withdrawal", "unknown")
+	}
+	for row in rows:
+		status_counts[row.status] = status_counts.get(row.status, 0) + cint(row.count)
+		unreconciled_by_direction[row.direction]["count"] += cint(row.unreconciled_count)
+		unreconciled_by_direction[row.direction]["total"] += flt(row.unreconciled_total)
+
+	return {
+		"transaction_count": sum(status_counts.values()),
+		"unreconciled_count": sum(row["count"] for row in unreconciled_by_direction.values()),
+		"unreconciled_total": sum(row["total"] for row in unreconciled_by_direction.values()),
+		"status_counts": status_counts,
+		"unreconciled_by_direction": unreconciled_by_direction,
 	}
 
 
 @frappe.whitelist()
-def get_transactions(bank_account, from_date=None, to_date=None, status="unreconciled"):
+def get_transactions(
+	bank_account,
+	from_date=None,
+	to_date=None,
+	status="unreconciled",
+	page_length=None,
+	cursor=None,
+	sort_by=None,
+	sort_order=None,
+	direction=None,
+	min_amount=None,
+	max_amount=None,
+	search=None,
+	party=None,
+	format=None,
+):
+	"""Transactions of a bank account in the period.
+
+	With any of the paging, sort or filter arguments, returns one page as
+	{"transactions": [...], "next_cursor": ...}; pass next_cursor back with
+	the same arguments for the following page. Without them, returns the
+	full list. With format=columnar the transactions are sent as a columnar
+	table, see columnar.to_columnar.
+	"""
 	from_date = _date_or_none(from_date)
 	to_date = _date_or_none(to_date)
-	return _get_filtered_transactions(bank_account, from_date, to_date, status or "unreconciled")
+	status = status or "unreconciled"
+
+	if any((page_length, cursor, sort_by, sort_order, direction, min_amount, max_amount, search, party)):
+		page = _get_transaction_page(
+			bank_account,
+			from_date,
+			to_date,
+			status,
+			page_length=page_length,
+			cursor=cursor,
+			sort_by=sort_by,
+			sort_order=sort_order,
+			direction=direction,
+			min_amount=min_amount,
+			max_amount=max_amount,
+			search=search,
+			party=party,
+		)
+		return {**page, "transactions": encode_rows(page["transactions"], format)}
+	return encode_rows(_get_filtered_transactions(bank_account, from_date, to_date, status), format)
+
+
+@frappe.whitelist()
+def get_transaction_changes(
+	bank_account,
+	since_token,
+	from_date=None,
+	to_date=None,
+	status="unreconciled",
+	direction=None,
+	min_amount=None,
+	max_amount=None,
+	search=None,
+	party=None,
+):
+	"""Bank Transactions of the account inserted, modified, reconciled,
+	cancelled or deleted since `since_token`, for a client to merge into a
+	listing loaded with the same filters.
+
+	Returns {"changed": [...], "removed": [...], "change_token": ...,
+	"reset": ...}. Changed rows match the filters; removed names no longer
+	do, or are gone. With reset set the feed was too long and the listing
+	should be reloaded. Pass change_token to the next call.
+	"""
+	assert_bank_account_access(bank_account)
+	last_modified, version = _decode_change_token(since_token)
+	if version != get_change_version(bank_account):
+		# A bulk writer committed rows the feed cannot be trusted to have seen
+		return _reset_transaction_changes(bank_account)
+
+	since = add_to_date(last_modified, seconds=-CHANGE_TOKEN_SKEW)
+	conditions, params = _get_listing_conditions(
+		status or "unreconciled",
+		_date_or_none(from_date),
+		_date_or_none(to_date),
+		direction,
+		min_amount,
+		max_amount,
+		search,
+		party,
+	)
+	params.update({"bank_account": bank_account, "since": since, "limit": MAX_TRANSACTION_CHANGES + 1})
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT {_TRANSACTION_COLUMNS}, bt.modified, ({" AND ".join(conditions)}) AS in_listing
+		FROM `tabBank Transaction` bt
+		WHERE bt.bank_account = %(bank_account)s
+			AND bt.modified >= %(since)s
+		ORDER BY bt.modified, bt.name
+		LIMIT %(limit)s
+		""",
+		params,
+		as_dict=True,
+	)
+	if len(rows) > MAX_TRANSACTION_CHANGES:
+		return _reset_transaction_changes(bank_account)
+
+	deleted = frappe.get_all(
+		"Deleted Document",
+		filters={
+			"deleted_doctype": "Bank Transaction",
+			"creation": [">=", since],
+			# Only this account's transactions; the stored JSON has one key per line
+			"data": ["like", '%"bank_account": {0}%'.format(_escape_like(json.dumps(bank_account)))],
+		},
+		fields=["deleted_name", "creation"],
+	)
+
+	# The next feed starts from the last change delivered, not from now, so
+	# rows committed after this read with an earlier modified are not lost
+	last_modified = max(
+		[last_modified] + [get_datetime(row.modified) for row in rows] + [get_datetime(row.creation) for row in deleted]
+	)
+	return {
+		"changed": _listing_rows_to_dtos([row for row in rows if cint(row.in_listing)]),
+		"removed": [row.name for row in rows if not cint(row.in_listing)] + [row.deleted_name for row in deleted],
+		"change_token": _encode_change_token(last_modified, version),
+		"reset": False,
+	}
+
+
+def _reset_transaction_changes(bank_account):
+	return {"changed": [], "removed": [], "change_token": _issue_change_token(bank_account), "reset": True}
 
 
 @frappe.whitelist()
@@ -1,19 +1,26 @@
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import flt, getdate
 
 from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.advance_bank_reconciliation_tool import (
 	create_journal_entry_bts,
 	get_abr_default_settings,
 )
 from advanced_bank_reconciliation.api.accounting_dimensions import get_accounting_dimension_context
-from advanced_bank_reconciliation.api.bank_rec import _transaction_to_dto, get_transactions
+from advanced_bank_reconciliation.api.bank_rec import (
+	_get_searched_transactions,
+	_transaction_to_dto,
+	get_transactions,
+)
+from advanced_bank_reconciliation.api.columnar import encode_rows
 from advanced_bank_reconciliation.api.matching import _lock_bank_transaction
 from advanced_bank_reconciliation.api.permission import (
 	assert_party_access,
 	assert_bank_account_access,
 	assert_bank_transaction_access,
 	assert_company_access,
+	permission_memo,
+	prime_party_access,
 	require_bank_rec_permission,
 )
 
@@ -37,6 +44,32 @@ def _assert_account(account, company):
 	return doc
 
 
+def _prime_row_parties(rows):
+	"""Check the parties of all rows up front, one read per company, so the
+	per-row assert_party_access calls are answered from the memo."""
+	rows = [row for row in rows if row.get("party_type") and row.get("party")]
+	if not rows:
+		return
+
+	companies = dict(
+		frappe.db.sql(
+			"""
+			SELECT bt.name, IFNULL(NULLIF(bt.company, ''), ba.company)
+			FROM `tabBank Transaction` bt
+			LEFT JOIN `tabBank Account` ba ON ba.name = bt.bank_account
+			WHERE bt.name IN %(names)s
+			""",
+			{"names": tuple(row.get("bank_transaction_name") for row in rows)},
+		)
+	)
+	prime_party_access(
+		[
+			(row.get("party_type"), row.get("party"), companies.get(row.get("bank_transaction_name")))
+			for row in rows
+		]
+	)
+
+
 def _row_error(row, message):
 	return {
 		"bank_transaction": row.get("bank_transaction_name"),
@@ -87,32 +120,44 @@ def _row_success(row, transaction):
 
 
 @frappe.whitelist()
-def get_cash_coding_rows(bank_account, from_date=None, to_date=None):
+def get_cash_coding_rows(bank_account, from_date=None, to_date=None, format=None, search=None):
 	bank_account_doc = assert_bank_account_access(bank_account)
 	company = bank_account_doc.company
 	dimension_context = get_accounting_dimension_context(company)
-	rows = get_transactions(
-		bank_account=bank_account,
-		from_date=from_date,
-		to_date=to_date,
-		status="unreconciled",
-	)
+	if search and search.strip():
+		rows = _get_searched_transactions(
+			bank_account,
+			getdate(from_date) if from_date else None,
+			getdate(to_date) if to_date else None,
+			search=search,
+		)
+	else:
+		rows = get_transactions(
+			bank_account=bank_account,
+			from_date=from_date,
+			to_date=to_date,
+			status="unreconciled",
+		)
 	return {
-		"rows": [
-			{
-				"transaction": row,
-				"account": "",
-				"party_type": row.get("party_type") or "",
-				"party": row.get("party") or "",
-				"cost_center": "",
-				"project": "",
-				"dimensions": {},
-				"reference_number": row.get("reference_number") or "",
-				"notes": "",
-				"suggested_rule": None,
-			}
-			for row in rows
-		],
+		"rows": encode_rows(
+			[
+				{
+					"transaction": row,
+					"account": "",
+					"party_type": row.get("party_type") or "",
+					"party": row.get("party") or "",
+					"cost_center": "",
+					"project": "",
+					"dimensions": {},
+					"reference_number": row.get("reference_number") or "",
+					"notes": "",
+					"suggested_rule": None,
+				}
+				for row in rows
+			],
+			format,
+			nested=("transaction",),
+		),
 		"options": {
 			"accounts": frappe.get_list(
 				"Account",
@@ -142,9 +187,15 @@ def get_cash_coding_rows(bank_account, from_date=None, to_date=None):
 
 @frappe.whitelist()
 def preview_cash_coding(rows):
+	with permission_memo():
+		return _preview_cash_coding(rows)
+
+
+def _preview_cash_coding(rows):
 	require_bank_rec_permission()
 	rows = _parse_rows(rows)
 	results = []
+	_prime_row_parties(rows)
 
 	for row in rows:
 		try:
@@ -183,6 +234,11 @@ def preview_cash_coding(rows):
 
 @frappe.whitelist()
 def submit_cash_coding(rows):
+	with permission_memo():
+		return _submit_cash_coding(rows)
+
+
+def _submit_cash_coding(rows):
 	require_bank_rec_permission()
 	rows = _parse_rows(rows)
 	if not rows:
@@ -191,6 +247,7 @@ def submit_cash_coding(rows):
 	settings = get_abr_default_settings()
 	entry_type = settings.get("default_journal_entry_type") or "Bank Entry"
 	results = []
+	_prime_row_parties(rows)
 
 	for index, row in enumerate(rows):
 		savepoint = "cash_coding_row_{0}".format(index)
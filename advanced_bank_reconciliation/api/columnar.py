@@ -0,0 +1,66 @@
+import datetime
+
+import frappe
+from frappe import _
+
+COLUMNAR_FORMAT = "columnar"
+
+
+def encode_rows(rows, format=None, nested=()):
+	"""Return `rows` as they are, or as a columnar table when the caller asked
+	for format=columnar. See to_columnar."""
+	if format in (None, "", "rows"):
+		return rows
+	if format != COLUMNAR_FORMAT:
+		frappe.throw(_("Unsupported response format {0}.").format(format))
+	return to_columnar(rows, nested)
+
+
+def to_columnar(rows, nested=()):
+	"""Encode a list of dicts as {"format": "columnar", "length": n,
+	"columns": [...]}.
+
+	Each column is {"name": ..., "values": [...]}, or, for text columns with
+	repeated values (currency, bank_account, company, dates),
+	{"name": ..., "dictionary": [...], "codes": [...]} with None codes for
+	empty cells. Dict values under the `nested` keys are flattened into
+	dotted column names ("transaction.name"); other values are sent as they
+	are.
+	"""
+	flat_rows = [_flatten(row, nested) for row in rows]
+	names = list(dict.fromkeys(name for row in flat_rows for name in row))
+
+	return {
+		"format": COLUMNAR_FORMAT,
+		"length": len(flat_rows),
+		"columns": [_encode_column(name, [row.get(name) for row in flat_rows]) for name in names],
+	}
+
+
+def _flatten(row, nested):
+	flat = {}
+	for key, value in row.items():
+		if key in nested and isinstance(value, dict):
+			for child_key, child_value in value.items():
+				flat[f"{key}.{child_key}"] = child_value
+		else:
+			flat[key] = value
+	return flat
+
+
+def _encode_column(name, values):
+	present = [value for value in values if value is not None]
+	if not present or not all(isinstance(value, (str, datetime.date)) for value in present):
+		return {"name": name, "values": values}
+
+	texts = [None if value is None else str(value) for value in values]
+	dictionary = list(dict.fromkeys(text for text in texts if text is not None))
+	if len(dictionary) * 2 > len(values):
+		return {"name": name, "values": values}
+
+	codes = {text: code for code, text in enumerate(dictionary)}
+	return {
+		"name": name,
+		"dictionary": dictionary,
+		"codes": [None if text is None else codes[text] for text in texts],
+	}
@@ -5,6 +5,7 @@ from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_b
 	unreconcile_bank_transaction,
 )
 from advanced_bank_reconciliation.api.bank_rec import _get_filtered_transactions, _transaction_to_dto
+from advanced_bank_reconciliation.api.columnar import encode_rows
 from advanced_bank_reconciliation.api.matching import as_bool, _linked_payment_dto, _lock_bank_transaction
 from advanced_bank_reconciliation.api.permission import (
 	assert_bank_account_access,
@@ -15,7 +16,7 @@ from advanced_bank_reconciliation.api.permission import (
 
 
 @frappe.whitelist()
-def get_matched_transactions(bank_account, from_date=None, to_date=None):
+def get_matched_transactions(bank_account, from_date=None, to_date=None, format=None):
 	assert_bank_account_access(bank_account)
 	rows = _get_filtered_transactions(
 		bank_account=bank_account,
@@ -24,7 +25,7 @@ def get_matched_transactions(bank_account, from_date=None, to_date=None):
 		status="reconciled",
 	)
 
-	return {"rows": rows}
+	return {"rows": encode_rows(rows, format)}
 
 
 @frappe.whitelist()
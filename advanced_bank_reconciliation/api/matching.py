@@ -9,11 +9,13 @@ from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_b
 	reconcile_vouchers,
 )
 from advanced_bank_reconciliation.api.bank_rec import _transaction_to_dto
+from advanced_bank_reconciliation.api.columnar import encode_rows
 from advanced_bank_reconciliation.api.permission import (
 	assert_party_access,
 	assert_bank_transaction_access,
-	assert_voucher_access,
+	assert_vouchers_access,
 	log_unexpected_api_exception,
+	permission_memo,
 	require_bank_rec_permission,
 )
 
@@ -180,6 +182,7 @@ def get_match_candidates(
 	from_reference_date=None,
 	to_reference_date=None,
 	exact_match=False,
+	format=None,
 ):
 	transaction = assert_bank_transaction_access(bank_transaction_name)
 	bank_transaction_date = getdate(transaction.date)
@@ -199,7 +202,7 @@ def get_match_candidates(
 
 	return {
 		"transaction": _transaction_to_dto(transaction.as_dict(), status=transaction.status),
-		"candidates": [_candidate_to_dto(row, transaction) for row in rows],
+		"candidates": encode_rows([_candidate_to_dto(row, transaction) for row in rows], format),
 		"filters": {
 			"document_types": document_types,
 			"from_date": from_date,
@@ -211,7 +214,8 @@ def get_match_candidates(
 @frappe.whitelist()
 def submit_match(bank_transaction_name, vouchers):
 	try:
-		return _submit_match(bank_transaction_name, vouchers)
+		with permission_memo():
+			return _submit_match(bank_transaction_name, vouchers)
 	except Exception as exc:
 		log_unexpected_api_exception(exc, "Bank Rec submit_match failed", rollback=True)
 		raise
@@ -251,8 +255,7 @@ def _submit_match(bank_transaction_name, vouchers):
 	if total - abs(flt(transaction.unallocated_amount)) > 0.01:
 		frappe.throw(_("Selected amount exceeds the unallocated bank transaction amount."))
 
-	for row in normalised_vouchers:
-		assert_voucher_access(row["payment_doctype"], row["payment_name"])
+	assert_vouchers_access([(row["payment_doctype"], row["payment_name"]) for row in normalised_vouchers])
 
 	updated_transaction = reconcile_vouchers(transaction.name, json.dumps(normalised_vouchers))
 	return {
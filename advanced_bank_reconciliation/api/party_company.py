@@ -20,6 +20,10 @@ TEXT_FIELD_TYPES = {
 	"Text Editor",
 }
 
+# Batches of index candidates search_parties reads before it gives up on
+# the index and falls back to a LIKE search
+MAX_INDEX_BATCHES = 3
+
 
 def _get_settings(settings=None):
 	return settings or frappe.get_cached_doc("Advance Bank Reconciliation Settings")
@@ -100,33 +104,126 @@ def assert_party_eligible_for_company(
 	user: str | None = None,
 	settings=None,
 ):
+	"""Assert `user` can read the party and that it is available for
+	`company`. Returns the party's name and company field as a dict."""
 	_require_supported_party_type(party_type)
 	if not party:
 		frappe.throw(_("Party is required when Party Type is set."))
 
-	user = user or frappe.session.user
-	doc = frappe.get_doc(party_type, party)
-	frappe.has_permission(party_type, "read", doc=doc, user=user, throw=True)
+	return assert_parties_eligible_for_company(
+		[(party_type, party)],
+		company,
+		user=user,
+		settings=settings,
+	)[(party_type, party)]
 
-	fieldname = get_party_company_field(party_type, settings=settings)
-	if not fieldname:
-		return doc
-	if not company:
+
+def assert_parties_eligible_for_company(
+	parties,
+	company: str,
+	user: str | None = None,
+	settings=None,
+) -> dict:
+	"""Bulk assert_party_eligible_for_company for (party_type, party) pairs.
+
+	Reads only the name and company field of the parties, with one
+	permission-filtered get_list per party type, instead of loading each
+	document. Every failure is reported in one error: PermissionError when a
+	party cannot be read, else ValidationError. Returns
+	{(party_type, party): {"name": ..., "company": ...}}."""
+	found, unreadable, company_fields = _read_parties(parties, user, settings)
+
+	if unreadable:
+		_throw_party_failures(
+			[
+				_("You are not permitted to access {0} {1}.").format(_(party_type), party)
+				for party_type, party in unreadable
+			],
+			frappe.PermissionError,
+		)
+
+	if any(company_fields.values()) and not company:
 		frappe.throw(_("Company is required when party company filtering is enabled."))
 
-	party_company = frappe.get_cached_value(party_type, party, fieldname)
-	if not party_company or party_company == company:
-		return doc
+	ineligible = [
+		_("{0} {1} is not available for company {2}.").format(party_type, party, company)
+		for (party_type, party), row in found.items()
+		if not _is_available_for_company(row, company_fields[party_type], company)
+	]
+	if ineligible:
+		_throw_party_failures(ineligible, frappe.ValidationError)
 
-	frappe.throw(
-		_("{0} {1} is not available for company {2}.").format(
-			party_type,
-			party,
-			company,
-		)
+	return found
+
+
+def get_eligible_parties(
+	parties,
+	company: str,
+	user: str | None = None,
+	settings=None,
+) -> dict:
+	"""The pairs assert_parties_eligible_for_company would accept, without
+	raising for the others, so bulk callers can check every row at once and
+	still report each failing row on its own."""
+	found, _unreadable, company_fields = _read_parties(parties, user, settings)
+	return {
+		(party_type, party): row
+		for (party_type, party), row in found.items()
+		if not company_fields[party_type]
+		or (company and _is_available_for_company(row, company_fields[party_type], company))
+	}
+
+
+def _read_parties(parties, user, settings):
+	"""Readable parties with their company, the unreadable (party_type, party)
+	pairs, and the company field of each party type."""
+	user = user or frappe.session.user
+	settings = _get_settings(settings)
+
+	names_by_type = {}
+	for party_type, party in parties:
+		_require_supported_party_type(party_type)
+		if not party:
+			frappe.throw(_("Party is required when Party Type is set."))
+		names_by_type.setdefault(party_type, set()).add(party)
+
+	found = {}
+	unreadable = []
+	company_fields = {}
+	for party_type, names in names_by_type.items():
+		fieldname = get_party_company_field(party_type, settings=settings)
+		company_fields[party_type] = fieldname
+		for row in _get_readable_parties(party_type, sorted(names), fieldname, user):
+			found[(party_type, row.name)] = frappe._dict(name=row.name, company=row.get(fieldname) if fieldname else None)
+
+		unreadable.extend((party_type, name) for name in sorted(names) if (party_type, name) not in found)
+
+	return found, unreadable, company_fields
+
+
+def _is_available_for_company(row, fieldname, company):
+	return not fieldname or not row.company or row.company == company
+
+
+def _get_readable_parties(party_type, names, fieldname, user):
+	if not frappe.has_permission(party_type, "read", user=user):
+		return []
+
+	return frappe.get_list(
+		party_type,
+		filters={"name": ["in", names]},
+		fields=list(dict.fromkeys(["name", fieldname or "name"])),
+		limit_page_length=0,
+		user=user,
 	)
 
 
+def _throw_party_failures(messages, exc):
+	if len(messages) == 1:
+		frappe.throw(messages[0], exc)
+	frappe.throw(messages, exc, title=_("Party Access"), as_list=True)
+
+
 def _get_search_fields(meta, searchfield):
 	candidates = ["name"]
 	if meta.title_field:
@@ -198,6 +295,20 @@ def search_parties(
 	if exact_party:
 		query_filters.append([doctype, "name", "=", exact_party])
 
+	if txt and not exact_party:
+		rows = _search_party_index(
+			doctype,
+			txt,
+			int(start),
+			int(page_len),
+			company if mapped_field else None,
+			fields,
+			query_filters,
+			reference_doctype,
+		)
+		if rows is not None:
+			return rows
+
 	or_filters = []
 	if txt:
 		or_filters = [
@@ -217,6 +328,44 @@ def search_parties(
 	)
 
 
+def _search_party_index(doctype, txt, start, page_len, company, fields, query_filters, reference_doctype):
+	"""A page of search_parties from the party search index, or None to fall
+	back to the LIKE search. The index already skips disabled parties and
+	parties of other companies; permissions and the other filters still apply
+	through get_list, which may drop candidates, so more are read until the
+	page is full, at most MAX_INDEX_BATCHES times."""
+	from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index import (
+		CANDIDATES_PER_ROW,
+		search_party_index,
+	)
+
+	batch_size = (start + page_len) * CANDIDATES_PER_ROW
+	rows = []
+	after = None
+	for _batch in range(MAX_INDEX_BATCHES):
+		candidates = search_party_index(doctype, txt, company=company, limit=batch_size, after=after)
+		if candidates is None:
+			return None
+		if candidates:
+			names = [party for party, _score in candidates]
+			batch = frappe.get_list(
+				doctype,
+				fields=fields,
+				filters=[*query_filters, [doctype, "name", "in", names]],
+				limit_page_length=len(names),
+				as_list=True,
+				reference_doctype=reference_doctype,
+			)
+			rank = {name: index for index, name in enumerate(names)}
+			rows.extend(sorted(batch, key=lambda row: rank.get(row[0], len(rank))))
+		if len(rows) >= start + page_len or len(candidates) < batch_size:
+			return rows[start : start + page_len]
+		after = candidates[-1]
+
+	# Most candidates are being filtered out; LIKE pages through get_list directly
+	return None
+
+
 def validate_party_company_settings(settings) -> None:
 	if not settings.get("filter_parties_by_company"):
 		return
@@ -229,26 +378,25 @@ def validate_enabled_bank_rules(settings, limit: int = 20) -> None:
 	if not settings.get("filter_parties_by_company"):
 		return
 
-	rules = frappe.get_all(
-		"ABR Bank Rule",
-		filters={
-			"enabled": 1,
-			"party_type": ["is", "set"],
-			"party": ["is", "set"],
-		},
-		fields=["name", "party_type", "party", "company"],
-		order_by="name",
-	)
-	ineligible_rules = [
-		rule.name
-		for rule in rules
-		if not is_party_eligible_for_company(
-			rule.party_type,
-			rule.party,
-			rule.company,
-			settings=settings,
+	# One join per party type, so the cost does not grow with a query per rule
+	ineligible_rules = []
+	for party_type in SUPPORTED_PARTY_TYPES:
+		fieldname = get_party_company_field(party_type, settings=settings)
+		ineligible_rules.extend(
+			frappe.db.sql_list(
+				f"""
+				SELECT rule.name
+				FROM `tabABR Bank Rule` rule
+				INNER JOIN `tab{party_type}` party ON party.name = rule.party
+				WHERE rule.enabled = 1
+					AND rule.party_type = %(party_type)s
+					AND IFNULL(party.`{fieldname}`, '') != ''
+					AND party.`{fieldname}` != IFNULL(rule.company, '')
+				""",
+				{"party_type": party_type},
+			)
 		)
-	]
+	ineligible_rules.sort()
 	if not ineligible_rules:
 		return
 
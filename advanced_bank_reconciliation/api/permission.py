@@ -1,9 +1,12 @@
+from contextlib import contextmanager
+
 import frappe
 from frappe import _
 
 from advanced_bank_reconciliation.api.party_company import (
 	SUPPORTED_PARTY_TYPES,
 	assert_party_eligible_for_company,
+	get_eligible_parties,
 )
 
 
@@ -26,6 +29,37 @@ ALLOWED_VOUCHER_DOCTYPES = frozenset(
 
 ALLOWED_PARTY_TYPES = SUPPORTED_PARTY_TYPES
 
+# Allowed companies and bank account access per user, kept in Redis until a
+# permission-relevant document changes, see clear_permission_cache
+PERMISSION_CACHE_PREFIX = "abr:permission:"
+PERMISSION_CACHE_TTL = 6 * 60 * 60
+
+
+@contextmanager
+def permission_memo():
+	"""Memoise role checks, allowed companies, bank account and party access
+	per user until the block exits, so bulk endpoints checking many rows of the
+	same accounts query them once. Nested blocks share the outer memo.
+	Failed checks are not memoised."""
+	if getattr(frappe.local, "abr_permission_memo", None) is not None:
+		yield
+		return
+
+	frappe.local.abr_permission_memo = {}
+	try:
+		yield
+	finally:
+		frappe.local.abr_permission_memo = None
+
+
+def _memoised(key, compute):
+	memo = getattr(frappe.local, "abr_permission_memo", None)
+	if memo is None:
+		return compute()
+	if key not in memo:
+		memo[key] = compute()
+	return memo[key]
+
 
 def has_bank_rec_permission(user=None):
 	user = user or frappe.session.user
@@ -34,7 +68,10 @@ def has_bank_rec_permission(user=None):
 	if user == "Administrator":
 		return True
 
-	return bool(ALLOWED_BANK_REC_ROLES.intersection(frappe.get_roles(user)))
+	return _memoised(
+		("bank_rec_role", user),
+		lambda: bool(ALLOWED_BANK_REC_ROLES.intersection(frappe.get_roles(user))),
+	)
 
 
 def require_bank_rec_permission(user=None):
@@ -65,7 +102,18 @@ def log_unexpected_api_exception(exc, title, rollback=False):
 def get_allowed_company_names(user=None):
 	user = user or frappe.session.user
 	require_bank_rec_permission(user)
+	return list(_memoised(("companies", user), lambda: _get_cached_company_names(user)))
+
 
+def _get_cached_company_names(user):
+	companies = _get_cached_decision(user, "companies")
+	if companies is None:
+		companies = _get_allowed_company_names(user)
+		_set_cached_decision(user, "companies", companies)
+	return companies
+
+
+def _get_allowed_company_names(user):
 	if user == "Administrator":
 		return frappe.get_all("Company", pluck="name")
 
@@ -100,16 +148,40 @@ def assert_party_access(party_type=None, party=None, company=None, user=None):
 	if party_type and not party:
 		frappe.throw(_("Party is required when Party Type is set."))
 	if party_type and party:
-		return assert_party_eligible_for_company(
-			party_type,
-			party,
-			company,
-			user=user,
+		return _memoised(
+			("party", user, party_type, party, company),
+			lambda: assert_party_eligible_for_company(
+				party_type,
+				party,
+				company,
+				user=user,
+			),
 		)
 
 	return None
 
 
+def prime_party_access(parties, user=None):
+	"""Check many (party_type, party, company) rows with one party read per
+	company and party type, and memoise the parties that pass for
+	assert_party_access in the enclosing permission_memo block. Parties that
+	fail are not memoised, so assert_party_access still raises each row's
+	own error."""
+	memo = getattr(frappe.local, "abr_permission_memo", None)
+	user = user or frappe.session.user
+	if memo is None or not has_bank_rec_permission(user):
+		return
+
+	by_company = {}
+	for party_type, party, company in parties:
+		if party_type in ALLOWED_PARTY_TYPES and party:
+			by_company.setdefault(company, set()).add((party_type, party))
+
+	for company, pairs in by_company.items():
+		for (party_type, party), row in get_eligible_parties(sorted(pairs), company, user=user).items():
+			memo.setdefault(("party", user, party_type, party, company), row)
+
+
 def assert_bank_account_access(bank_account, user=None):
 	user = user or frappe.session.user
 	require_bank_rec_permission(user)
@@ -117,9 +189,18 @@ def assert_bank_account_access(bank_account, user=None):
 	if not bank_account:
 		raise frappe.PermissionError(_("Bank Account is required."))
 
+	return _memoised(("bank_account", user, bank_account), lambda: _get_bank_account(bank_account, user))
+
+
+def _get_bank_account(bank_account, user):
+	field = f"bank_account:{bank_account}"
+	if _get_cached_decision(user, field):
+		return frappe.get_cached_doc("Bank Account", bank_account)
+
 	doc = frappe.get_doc("Bank Account", bank_account)
 	frappe.has_permission("Bank Account", "read", doc=doc, user=user, throw=True)
 	assert_company_access(doc.company, user=user)
+	_set_cached_decision(user, field, True)
 	return doc
 
 
@@ -162,3 +243,119 @@ def assert_voucher_access(voucher_type, voucher_name, user=None, ptype="read"):
 		assert_company_access(company, user=user)
 
 	return doc
+
+
+def assert_vouchers_access(vouchers, user=None):
+	"""Bulk assert_voucher_access for read access to (voucher_type,
+	voucher_name) pairs: one permission-filtered get_list per voucher type.
+	Cancelled vouchers are refused too. Every failure is reported in one
+	PermissionError. Returns {(voucher_type, voucher_name): row} with the
+	name, company and docstatus of each voucher."""
+	user = user or frappe.session.user
+	require_bank_rec_permission(user)
+
+	failures = []
+	names_by_type = {}
+	for voucher_type, voucher_name in vouchers:
+		if voucher_type not in ALLOWED_VOUCHER_DOCTYPES:
+			failures.append(_("Voucher type {0} is not supported.").format(voucher_type))
+		elif not voucher_name:
+			failures.append(_("Voucher name is required."))
+		else:
+			names_by_type.setdefault(voucher_type, set()).add(voucher_name)
+
+	allowed_companies = set(get_allowed_company_names(user))
+	found = {}
+	for voucher_type, names in names_by_type.items():
+		rows = (
+			frappe.get_list(
+				voucher_type,
+				filters={"name": ["in", sorted(names)]},
+				fields=["name", "company", "docstatus"],
+				user=user,
+			)
+			if frappe.has_permission(voucher_type, "read", user=user)
+			else []
+		)
+		for row in rows:
+			found[(voucher_type, row.name)] = row
+
+		for name in sorted(names):
+			row = found.get((voucher_type, name))
+			if not row:
+				failures.append(_("You are not permitted to access {0} {1}.").format(_(voucher_type), name))
+			elif row.docstatus == 2:
+				failures.append(_("{0} {1} is cancelled.").format(_(voucher_type), name))
+			elif row.company and row.company not in allowed_companies:
+				failures.append(
+					_("You are not permitted to access company {0}.").format(row.company)
+				)
+
+	if failures:
+		frappe.throw(failures, frappe.PermissionError, title=_("Voucher Access"), as_list=True)
+
+	return found
+
+
+def _get_cached_decision(user, field):
+	return frappe.cache().hget(_permission_cache_key(user), field)
+
+
+def _set_cached_decision(user, field, value):
+	cache = frappe.cache()
+	key = _permission_cache_key(user)
+	cache.hset(key, field, value)
+	cache.expire(cache.make_key(key), PERMISSION_CACHE_TTL)
+
+
+def clear_permission_cache(user=None):
+	"""Drop the cached permission decisions of one user, or of all users.
+	Dropped again after commit, so decisions cached from the old state by
+	a concurrent request do not survive, and after rollback, so decisions
+	taken from rolled back changes do not either."""
+	_delete_permission_cache(user)
+	frappe.db.after_commit.add(lambda: _delete_permission_cache(user))
+	frappe.db.after_rollback.add(lambda: _delete_permission_cache(user))
+
+
+def _delete_permission_cache(user):
+	if user:
+		frappe.cache().delete_value(_permission_cache_key(user))
+	else:
+		frappe.cache().delete_keys(PERMISSION_CACHE_PREFIX)
+
+
+def invalidate_user_permission_cache(doc, method=None):
+	"""doc_events hook for User Permission, User, Has Role and DocShare."""
+	if doc.doctype == "DocShare" and doc.everyone:
+		# Shared with everyone: every user's decisions may change
+		clear_permission_cache()
+		return
+
+	if doc.doctype in ("User Permission", "DocShare"):
+		user = doc.user
+	elif doc.doctype == "Has Role":
+		user = doc.parent if doc.parenttype == "User" else None
+	else:
+		user = doc.name
+	if user:
+		clear_permission_cache(user)
+
+
+def invalidate_permission_cache(doc=None, method=None, *args, **kwargs):
+	"""doc_events hook for documents every user's decisions depend on: Bank
+	Account, Company and Custom DocPerm. Also takes the arguments of
+	after_rename."""
+	clear_permission_cache()
+
+
+@frappe.whitelist()
+def flush_permission_cache(user=None):
+	"""Drop the cached permission decisions of `user`, or of all users."""
+	frappe.only_for("System Manager")
+	clear_permission_cache(user)
+	return {"user": user}
+
+
+def _permission_cache_key(user):
+	return f"{PERMISSION_CACHE_PREFIX}{user}"
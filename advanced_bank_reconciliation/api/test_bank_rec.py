@@ -1,14 +1,17 @@
 from unittest.mock import patch
 
 import frappe
+from frappe.share import add_docshare
 from frappe.tests.utils import FrappeTestCase
-from frappe.utils import add_days, flt, nowdate
+from frappe.utils import add_days, add_to_date, flt, get_datetime, nowdate
 
+from advanced_bank_reconciliation.advanced_bank_reconciliation.change_feed import bump_change_versions
 from advanced_bank_reconciliation.api.bank_rec import (
 	get_bank_accounts,
 	get_bank_rules,
 	get_boot,
 	get_statement_summary,
+	get_transaction_changes,
 	get_transaction_context,
 	get_transactions,
 )
@@ -28,6 +31,16 @@ from advanced_bank_reconciliation.api.cash_coding import (
 	preview_cash_coding,
 	submit_cash_coding,
 )
+from advanced_bank_reconciliation.api.permission import (
+	_get_allowed_company_names,
+	assert_bank_account_access,
+	assert_bank_transaction_access,
+	assert_company_access,
+	clear_permission_cache,
+	flush_permission_cache,
+	get_allowed_company_names,
+	permission_memo,
+)
 from advanced_bank_reconciliation.api.matched import (
 	get_matched_transactions,
 	unreconcile_transaction,
@@ -198,6 +211,318 @@ class TestBankRecPhaseOneAPI(FrappeTestCase):
 		self.assertIn("unreconciled_total", summary)
 		self.assertNotIn("difference", summary)
 
+	def test_statement_summary_aggregates_match_transaction_list(self):
+		with self.set_user(self.accounts_user):
+			summary = get_statement_summary(self.bank_account_a)
+			transactions = get_transactions(self.bank_account_a)
+
+		self.assertEqual(summary["unreconciled_count"], len(transactions))
+		self.assertAlmostEqual(
+			summary["unreconciled_total"],
+			sum(abs(flt(row["unallocated_amount"])) for row in transactions),
+		)
+		self.assertEqual(
+			summary["unreconciled_by_direction"]["deposit"]["count"],
+			len([row for row in transactions if row["direction"] == "deposit"]),
+		)
+		self.assertEqual(summary["transaction_count"], sum(summary["status_counts"].values()))
+
+	def test_all_status_listing_is_one_ordered_list(self):
+		with self.set_user(self.accounts_user):
+			unreconciled = get_transactions(self.bank_account_a, status="unreconciled")
+			reconciled = get_transactions(self.bank_account_a, status="reconciled")
+			rows = get_transactions(self.bank_account_a, status="all")
+
+		self.assertEqual(len(rows), len(unreconciled) + len(reconciled))
+		self.assertEqual(
+			[(str(row["date"]), row["name"]) for row in rows],
+			sorted((str(row["date"]), row["name"]) for row in rows),
+		)
+		row = next(row for row in rows if row["name"] == self.bank_transaction_a.name)
+		self.assertEqual(row["status"], "Unreconciled")
+		self.assertEqual(row["linked_payments"], [])
+		for row in rows:
+			if row["status"] == "Reconciled":
+				expected = next(r for r in reconciled if r["name"] == row["name"])
+				self.assertEqual(row["linked_payments"], expected["linked_payments"])
+
+	def test_paged_transactions_walk_the_filtered_list_with_a_cursor(self):
+		description = f"_ABR Paging {frappe.generate_hash(length=8)}"
+		amounts = [(30, 0), (0, 20), (10, 0), (50, 0)]
+		for deposit, withdrawal in amounts:
+			create_test_bank_transaction(
+				self.bank_account_a,
+				deposit=deposit,
+				withdrawal=withdrawal,
+				description=description,
+			)
+		# InnoDB adds rows to the FULLTEXT search index on commit
+		frappe.db.commit()
+
+		names = []
+		cursor = None
+		with self.set_user(self.accounts_user):
+			while True:
+				page = get_transactions(
+					self.bank_account_a,
+					page_length=2,
+					cursor=cursor,
+					sort_by="amount",
+					sort_order="desc",
+					direction="deposit",
+					search=description,
+				)
+				names.extend(row["name"] for row in page["transactions"])
+				self.assertLessEqual(len(page["transactions"]), 2)
+				cursor = page["next_cursor"]
+				if not cursor:
+					break
+
+		amounts_seen = [flt(frappe.db.get_value("Bank Transaction", name, "deposit")) for name in names]
+		self.assertEqual(amounts_seen, [50, 30, 10])
+
+	def test_party_sorted_pages_walk_rows_with_and_without_party(self):
+		description = f"_ABR Party Paging {frappe.generate_hash(length=8)}"
+		created = [
+			create_test_bank_transaction(self.bank_account_a, deposit=deposit, description=description)
+			for deposit in (11, 12, 13)
+		]
+		frappe.db.set_value(
+			"Bank Transaction", created[0].name, {"party_type": "Customer", "party": "_Test Customer"}
+		)
+		frappe.db.set_value("Bank Transaction", created[1].name, "party", "")
+		frappe.db.set_value("Bank Transaction", created[2].name, "party", None)
+		frappe.db.commit()
+
+		for sort_order in ("asc", "desc"):
+			names = []
+			cursor = None
+			with self.set_user(self.accounts_user):
+				while True:
+					page = get_transactions(
+						self.bank_account_a,
+						page_length=1,
+						cursor=cursor,
+						sort_by="party",
+						sort_order=sort_order,
+						search=description,
+					)
+					names.extend(row["name"] for row in page["transactions"])
+					cursor = page["next_cursor"]
+					if not cursor:
+						break
+
+			expected = [created[2].name, created[1].name, created[0].name]
+			self.assertEqual(names, expected if sort_order == "asc" else expected[::-1])
+
+	def test_permission_memo_checks_each_account_once_per_block(self):
+		companies = "advanced_bank_reconciliation.api.permission._get_allowed_company_names"
+		transaction = create_test_bank_transaction(self.bank_account_a, deposit=12)
+
+		with (
+			self.set_user(self.accounts_user),
+			patch("advanced_bank_reconciliation.api.permission._get_cached_decision", return_value=None),
+		):
+			with patch(companies, wraps=_get_allowed_company_names) as get_companies:
+				for _attempt in range(3):
+					assert_bank_transaction_access(transaction.name)
+			self.assertEqual(get_companies.call_count, 3)
+
+			with patch(companies, wraps=_get_allowed_company_names) as get_companies, permission_memo():
+				for _attempt in range(3):
+					assert_bank_transaction_access(transaction.name)
+					self.assertIn(TEST_COMPANY, get_allowed_company_names())
+			self.assertEqual(get_companies.call_count, 1)
+
+			with permission_memo(), self.assertRaises(frappe.PermissionError):
+				assert_company_access(TEST_COMPANY_2)
+
+	def test_permission_decisions_are_cached_until_invalidated(self):
+		companies = "advanced_bank_reconciliation.api.permission._get_allowed_company_names"
+		clear_permission_cache(self.accounts_user)
+
+		with self.set_user(self.accounts_user):
+			with patch(companies, wraps=_get_allowed_company_names) as get_companies:
+				for _attempt in range(3):
+					assert_bank_account_access(self.bank_account_a)
+			self.assertEqual(get_companies.call_count, 1)
+
+		# Saving the user (its roles) drops the user's cached decisions
+		frappe.get_doc("User", self.accounts_user).save(ignore_permissions=True)
+		with self.set_user(self.accounts_user):
+			with patch(companies, wraps=_get_allowed_company_names) as get_companies:
+				assert_bank_account_access(self.bank_account_a)
+			self.assertEqual(get_companies.call_count, 1)
+
+			self.assertRaises(frappe.PermissionError, flush_permission_cache)
+
+		flush_permission_cache(self.accounts_user)
+		with self.set_user(self.accounts_user), patch(companies, wraps=_get_allowed_company_names) as get_companies:
+			get_allowed_company_names()
+		self.assertEqual(get_companies.call_count, 1)
+
+	def test_sharing_a_document_drops_the_users_cached_decisions(self):
+		companies = "advanced_bank_reconciliation.api.permission._get_allowed_company_names"
+		clear_permission_cache(self.accounts_user)
+		with self.set_user(self.accounts_user):
+			assert_bank_account_access(self.bank_account_a)
+
+		share = add_docshare(
+			"Bank Account", self.bank_account_b, self.accounts_user, flags={"ignore_share_permission": True}
+		)
+		with self.set_user(self.accounts_user):
+			with patch(companies, wraps=_get_allowed_company_names) as get_companies:
+				assert_bank_account_access(self.bank_account_a)
+			self.assertEqual(get_companies.call_count, 1)
+
+		frappe.delete_doc("DocShare", share.name, ignore_permissions=True)
+		with self.set_user(self.accounts_user):
+			with patch(companies, wraps=_get_allowed_company_names) as get_companies:
+				assert_bank_account_access(self.bank_account_a)
+			self.assertEqual(get_companies.call_count, 1)
+
+	def test_search_matches_word_prefixes_in_narrative_fields(self):
+		marker = frappe.generate_hash(length=10)
+		by_code = create_test_bank_transaction(self.bank_account_a, deposit=40, description="_ABR Search")
+		frappe.db.set_value(
+			"Bank Transaction", by_code.name, {"custom_code": f"CODE{marker}", "party": f"Party{marker}"}
+		)
+		by_party = create_test_bank_transaction(self.bank_account_a, deposit=45, description="_ABR Search")
+		frappe.db.set_value("Bank Transaction", by_party.name, "bank_party_name", f"Payee {marker} Ltd")
+		frappe.db.commit()
+
+		with self.set_user(self.accounts_user):
+			prefix = get_transactions(self.bank_account_a, search=f"code{marker[:6]}")["transactions"]
+			words = get_transactions(self.bank_account_a, search=f"{marker} ltd")["transactions"]
+			rows = get_cash_coding_rows(self.bank_account_a, search=marker)["rows"]
+			by_party_link = get_transactions(self.bank_account_a, search=f"party{marker[:4]}")["transactions"]
+			# Without the index, the same word prefixes are matched with REGEXP
+			with patch("advanced_bank_reconciliation.api.bank_rec.has_search_index", return_value=False):
+				fallback = get_transactions(self.bank_account_a, search=f"code{marker[:6]}")["transactions"]
+				fallback_party_link = get_transactions(self.bank_account_a, search=f"party{marker[:4]}")[
+					"transactions"
+				]
+				fallback_words = get_transactions(self.bank_account_a, search=marker)["transactions"]
+				mid_word = get_transactions(self.bank_account_a, search=marker[2:])["transactions"]
+
+		self.assertEqual([row["name"] for row in prefix], [by_code.name])
+		self.assertEqual([row["name"] for row in words], [by_party.name])
+		self.assertEqual([row["name"] for row in by_party_link], [by_code.name])
+		self.assertEqual([row["name"] for row in fallback], [by_code.name])
+		self.assertEqual([row["name"] for row in fallback_party_link], [by_code.name])
+		self.assertEqual([row["name"] for row in fallback_words], [by_party.name])
+		self.assertEqual(mid_word, [])
+		self.assertEqual([row["transaction"]["name"] for row in rows], [by_party.name])
+
+	def test_columnar_listing_decodes_to_the_row_listing(self):
+		description = f"_ABR Columnar {frappe.generate_hash(length=8)}"
+		for deposit in (10, 20, 30):
+			create_test_bank_transaction(self.bank_account_a, deposit=deposit, description=description)
+		frappe.db.commit()
+
+		with self.set_user(self.accounts_user):
+			rows = get_transactions(self.bank_account_a, search=description)["transactions"]
+			table = get_transactions(self.bank_account_a, search=description, format="columnar")["transactions"]
+
+		self.assertEqual(table["format"], "columnar")
+		self.assertEqual(table["length"], 3)
+		currency = next(column for column in table["columns"] if column["name"] == "currency")
+		self.assertEqual(len(currency["dictionary"]), 1)
+		self.assertEqual(currency["codes"], [0, 0, 0])
+
+		decoded = [{} for _index in range(table["length"])]
+		for column in table["columns"]:
+			values = column.get("values") or [
+				None if code is None else column["dictionary"][code] for code in column["codes"]
+			]
+			for row, value in zip(decoded, values, strict=True):
+				row[column["name"]] = value
+		self.assertEqual(
+			decoded,
+			[{key: str(value) if key == "date" else value for key, value in row.items()} for row in rows],
+		)
+
+	def test_change_feed_returns_only_rows_changed_since_the_token(self):
+		description = f"_ABR Changes {frappe.generate_hash(length=8)}"
+		unchanged = create_test_bank_transaction(self.bank_account_a, deposit=15, description=description)
+		cancelled = create_test_bank_transaction(self.bank_account_a, deposit=25, description=description)
+		frappe.db.commit()
+
+		with self.set_user(self.accounts_user):
+			page = get_transactions(self.bank_account_a, search=description)
+		self.assertTrue(page["change_token"])
+
+		frappe.db.set_value(
+			"Bank Transaction", unchanged.name, "modified", add_days(frappe.utils.now_datetime(), -1)
+		)
+		cancelled.reload()
+		cancelled.cancel()
+		inserted = create_test_bank_transaction(self.bank_account_a, deposit=35, description=description)
+		frappe.db.commit()
+
+		with self.set_user(self.accounts_user):
+			changes = get_transaction_changes(self.bank_account_a, page["change_token"], search=description)
+
+		self.assertFalse(changes["reset"])
+		self.assertEqual([row["name"] for row in changes["changed"]], [inserted.name])
+		self.assertIn(cancelled.name, changes["removed"])
+		self.assertNotIn(unchanged.name, changes["removed"])
+		self.assertTrue(changes["change_token"])
+
+	def test_change_feed_reports_only_the_accounts_deleted_transactions(self):
+		with self.set_user(self.accounts_user):
+			token = get_transactions(self.bank_account_a, page_length=1)["change_token"]
+
+		deleted = {}
+		for bank_account in (self.bank_account_a, self.bank_account_b):
+			transaction = create_test_bank_transaction(bank_account, deposit=14, do_not_submit=True)
+			frappe.delete_doc("Bank Transaction", transaction.name, ignore_permissions=True)
+			deleted[bank_account] = transaction.name
+
+		with self.set_user(self.accounts_user):
+			changes = get_transaction_changes(self.bank_account_a, token)
+
+		self.assertIn(deleted[self.bank_account_a], changes["removed"])
+		self.assertNotIn(deleted[self.bank_account_b], changes["removed"])
+
+	def test_change_feed_picks_up_rows_committed_after_a_later_one(self):
+		description = f"_ABR Late Commit {frappe.generate_hash(length=8)}"
+		with self.set_user(self.accounts_user):
+			token = get_transactions(self.bank_account_a, search=description)["change_token"]
+
+		delivered = create_test_bank_transaction(self.bank_account_a, deposit=16, description=description)
+		frappe.db.commit()
+		with self.set_user(self.accounts_user):
+			changes = get_transaction_changes(self.bank_account_a, token, search=description)
+		self.assertIn(delivered.name, [row["name"] for row in changes["changed"]])
+
+		# Saved before the delivered row by a transaction that committed after the read
+		late = create_test_bank_transaction(self.bank_account_a, deposit=17, description=description)
+		frappe.db.set_value(
+			"Bank Transaction",
+			late.name,
+			"modified",
+			add_to_date(get_datetime(delivered.modified), seconds=-2),
+			update_modified=False,
+		)
+		frappe.db.commit()
+		with self.set_user(self.accounts_user):
+			changes = get_transaction_changes(self.bank_account_a, changes["change_token"], search=description)
+
+		self.assertFalse(changes["reset"])
+		self.assertIn(late.name, [row["name"] for row in changes["changed"]])
+
+	def test_change_feed_resets_after_a_bulk_write(self):
+		with self.set_user(self.accounts_user):
+			token = get_transactions(self.bank_account_a, page_length=1)["change_token"]
+
+		bump_change_versions([self.bank_account_a])
+
+		with self.set_user(self.accounts_user):
+			changes = get_transaction_changes(self.bank_account_a, token)
+			self.assertTrue(changes["reset"])
+			self.assertFalse(get_transaction_changes(self.bank_account_a, changes["change_token"])["reset"])
+
 	def test_rules_list_is_permission_checked(self):
 		rule = frappe.get_doc(
 			{
@@ -369,6 +694,27 @@ class TestBankRecPhaseTwoAPI(FrappeTestCase):
 		self.assertAlmostEqual(flt(bank_transaction.unallocated_amount), 30.0, places=2)
 		self.assertFalse(bank_transaction.payment_entries)
 
+	def test_submit_match_reports_every_inaccessible_voucher(self):
+		bank_transaction = create_test_bank_transaction(
+			self.bank_account_a,
+			deposit=40,
+			reference_number="_ABR-PHASE2-BULK-ACCESS",
+		)
+
+		with self.assertRaises(frappe.PermissionError) as context:
+			submit_match(
+				bank_transaction.name,
+				[
+					{"voucher_type": "Sales Invoice", "voucher_name": "_ABR-NO-SUCH-SI", "amount": 10},
+					{"voucher_type": "Payment Entry", "voucher_name": "_ABR-NO-SUCH-PE", "amount": 10},
+				],
+			)
+
+		self.assertIn("_ABR-NO-SUCH-SI", str(context.exception))
+		self.assertIn("_ABR-NO-SUCH-PE", str(context.exception))
+		bank_transaction.reload()
+		self.assertFalse(bank_transaction.payment_entries)
+
 	def test_submit_match_rejects_over_allocation(self):
 		bank_transaction = create_test_bank_transaction(
 			self.bank_account_a,
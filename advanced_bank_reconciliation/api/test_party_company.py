@@ -4,12 +4,23 @@ import frappe
 from frappe.tests.utils import FrappeTestCase
 
 from advanced_bank_reconciliation.api.party_company import (
+	MAX_INDEX_BATCHES,
+	assert_parties_eligible_for_company,
 	assert_party_eligible_for_company,
+	get_eligible_parties,
 	get_party_company_field,
 	is_party_eligible_for_company,
 	search_parties,
 )
-from advanced_bank_reconciliation.api.permission import assert_party_access
+from advanced_bank_reconciliation.api.permission import (
+	assert_party_access,
+	permission_memo,
+	prime_party_access,
+)
+
+SEARCH_INDEX_MODULE = (
+	"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index"
+)
 
 
 def enabled_settings():
@@ -78,26 +89,31 @@ class TestPartyCompanyPolicy(FrappeTestCase):
 			)
 
 	def test_assertion_checks_read_permission_before_company_error(self):
-		doc = frappe._dict(name="_Test Customer")
 		with (
-			patch("frappe.get_doc", return_value=doc),
-			patch("frappe.has_permission", side_effect=frappe.PermissionError),
-			patch("frappe.get_cached_value") as get_company,
+			patch("frappe.has_permission", return_value=True),
+			patch("frappe.get_list", return_value=[]),
+			patch(
+				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
+				return_value="company_scope",
+			),
+			patch("frappe.get_doc") as get_doc,
 		):
 			with self.assertRaises(frappe.PermissionError):
 				assert_party_eligible_for_company(
 					"Customer",
-					doc.name,
-					"_Test Company",
+					"_Test Customer",
+					"",
 					settings=enabled_settings(),
 				)
-			get_company.assert_not_called()
+			get_doc.assert_not_called()
 
 	def test_enabled_policy_requires_company(self):
-		doc = frappe._dict(name="_Test Customer")
 		with (
-			patch("frappe.get_doc", return_value=doc),
 			patch("frappe.has_permission", return_value=True),
+			patch(
+				"frappe.get_list",
+				return_value=[frappe._dict(name="_Test Customer", company_scope=None)],
+			),
 			patch(
 				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
 				return_value="company_scope",
@@ -109,11 +125,65 @@ class TestPartyCompanyPolicy(FrappeTestCase):
 			):
 				assert_party_eligible_for_company(
 					"Customer",
-					doc.name,
+					"_Test Customer",
 					"",
 					settings=enabled_settings(),
 				)
 
+	def test_bulk_assertion_reads_each_party_type_once(self):
+		rows = {
+			"Customer": [
+				frappe._dict(name="_Test Customer", company_scope="_Test Company"),
+				frappe._dict(name="_Test Customer 1", company_scope=None),
+			],
+			"Supplier": [frappe._dict(name="_Test Supplier", company_scope="_Test Company 1")],
+		}
+		with (
+			patch("frappe.has_permission", return_value=True),
+			patch("frappe.get_list", side_effect=lambda doctype, **kwargs: rows[doctype]) as get_list,
+			patch(
+				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
+				return_value="company_scope",
+			),
+		):
+			parties = assert_parties_eligible_for_company(
+				[("Customer", "_Test Customer"), ("Customer", "_Test Customer 1")],
+				"_Test Company",
+				settings=enabled_settings(),
+			)
+			with self.assertRaisesRegex(frappe.ValidationError, "_Test Supplier is not available"):
+				assert_parties_eligible_for_company(
+					[("Customer", "_Test Customer"), ("Supplier", "_Test Supplier")],
+					"_Test Company",
+					settings=enabled_settings(),
+				)
+
+		self.assertEqual(get_list.call_count, 3)
+		self.assertEqual(get_list.call_args_list[0].kwargs["fields"], ["name", "company_scope"])
+		self.assertEqual(parties[("Customer", "_Test Customer")].company, "_Test Company")
+		self.assertIsNone(parties[("Customer", "_Test Customer 1")].company)
+
+	def test_eligible_parties_leave_out_failures_without_raising(self):
+		rows = {
+			"Customer": [frappe._dict(name="_Test Customer", company_scope="_Test Company")],
+			"Supplier": [frappe._dict(name="_Test Supplier", company_scope="_Test Company 1")],
+		}
+		with (
+			patch("frappe.has_permission", return_value=True),
+			patch("frappe.get_list", side_effect=lambda doctype, **kwargs: rows[doctype]),
+			patch(
+				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
+				return_value="company_scope",
+			),
+		):
+			parties = get_eligible_parties(
+				[("Customer", "_Test Customer"), ("Customer", "_Unreadable"), ("Supplier", "_Test Supplier")],
+				"_Test Company",
+				settings=enabled_settings(),
+			)
+
+		self.assertEqual(list(parties), [("Customer", "_Test Customer")])
+
 	def test_search_adds_exact_or_blank_mapping_filter(self):
 		meta = frappe._dict(
 			title_field="customer_name",
@@ -155,6 +225,72 @@ class TestPartyCompanyPolicy(FrappeTestCase):
 			get_list.call_args.kwargs["filters"],
 		)
 
+	def test_indexed_search_reads_candidates_until_the_page_is_full(self):
+		meta = frappe._dict(title_field="customer_name", search_fields=None, fields=[])
+		meta.get_field = Mock(return_value=frappe._dict(fieldname="customer_name", fieldtype="Data"))
+		candidates = [(f"C{index}", index) for index in range(1, 13)]
+		# Only every fifth candidate passes the permission and disabled filters
+		allowed = {"C5", "C10"}
+
+		def search_index(*args, limit, after=None, **kwargs):
+			begin = candidates.index(after) + 1 if after else 0
+			return candidates[begin : begin + limit]
+
+		with (
+			patch("frappe.get_meta", return_value=meta),
+			patch(
+				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
+				return_value=None,
+			),
+			patch(
+				"advanced_bank_reconciliation.api.permission.assert_company_access",
+				return_value="_Test Company",
+			),
+			patch(f"{SEARCH_INDEX_MODULE}.search_party_index", side_effect=search_index) as search,
+			patch(
+				"frappe.get_list",
+				side_effect=lambda doctype, filters, **kwargs: [
+					[name, name] for name in reversed(filters[-1][3]) if name in allowed
+				],
+			),
+		):
+			result = search_parties("Customer", "c", "name", 0, 2, {"party_type": "Customer"})
+			self.assertEqual([row[0] for row in result], ["C5", "C10"])
+			self.assertEqual([call.kwargs["after"] for call in search.call_args_list], [None, ("C8", 8)])
+
+			search.reset_mock()
+			result = search_parties("Customer", "c", "name", 0, 5, {"party_type": "Customer"})
+			self.assertEqual([row[0] for row in result], ["C5", "C10"])
+			self.assertEqual(search.call_count, 1)
+
+	def test_indexed_search_falls_back_to_like_when_candidates_keep_being_dropped(self):
+		meta = frappe._dict(title_field="customer_name", search_fields=None, fields=[])
+		meta.get_field = Mock(return_value=frappe._dict(fieldname="customer_name", fieldtype="Data"))
+		with (
+			patch("frappe.get_meta", return_value=meta),
+			patch(
+				"advanced_bank_reconciliation.api.party_company.get_party_company_field",
+				return_value=None,
+			),
+			patch(
+				"advanced_bank_reconciliation.api.permission.assert_company_access",
+				return_value="_Test Company",
+			),
+			patch(
+				f"{SEARCH_INDEX_MODULE}.search_party_index",
+				side_effect=lambda *args, limit, **kwargs: [(f"X{index}", 0) for index in range(limit)],
+			) as search,
+			# No candidate is readable; only the LIKE search finds a row
+			patch(
+				"frappe.get_list",
+				side_effect=lambda doctype, filters, **kwargs: [["C1", "C1"]] if kwargs.get("or_filters") else [],
+			),
+		):
+			result = search_parties("Customer", "c", "name", 0, 2, {"party_type": "Customer"})
+
+		self.assertEqual(result, [["C1", "C1"]])
+		self.assertEqual(search.call_count, MAX_INDEX_BATCHES)
+
 	def test_exact_search_adds_party_name_filter(self):
 		meta = frappe._dict(
 			title_field="customer_name",
@@ -346,3 +482,28 @@ class TestPartyCompanyPermissionIntegration(FrappeTestCase):
 			"_Test Company",
 			user=frappe.session.user,
 		)
+
+	def test_primed_parties_are_checked_once_per_company(self):
+		parties = {("Customer", "_Test Customer"): frappe._dict(name="_Test Customer", company="_Test Company")}
+		with (
+			patch(
+				"advanced_bank_reconciliation.api.permission.get_eligible_parties",
+				return_value=parties,
+			) as get_eligible,
+			patch("advanced_bank_reconciliation.api.permission.assert_party_eligible_for_company") as assert_eligible,
+			permission_memo(),
+		):
+			prime_party_access(
+				[
+					("Customer", "_Test Customer", "_Test Company"),
+					("Customer", "_Test Customer", "_Test Company"),
+					("Customer", None, "_Test Company"),
+				]
+			)
+			for _row in range(3):
+				assert_party_access("Customer", "_Test Customer", company="_Test Company")
+
+		get_eligible.assert_called_once_with(
+			[("Customer", "_Test Customer")], "_Test Company", user=frappe.session.user
+		)
+		assert_eligible.assert_not_called()
@@ -135,26 +135,104 @@ override_doctype_class = {
     "Bank Transaction": "advanced_bank_reconciliation.advanced_bank_reconciliation.overrides.bank_transaction.ExtendedBankTransaction",
 }
 
+# Document Events
+# ---------------
+# Hook on document methods and events
+
+doc_events = {
+    "Bank Account": {
+        "on_update": [
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.clearance.clear_bank_gl_account_cache",
+            "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+        ],
+        "on_trash": [
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.clearance.clear_bank_gl_account_cache",
+            "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+        ],
+    },
+    "Company": {
+        "after_insert": "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+        "after_rename": "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+        "on_trash": "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+    },
+    "Custom DocPerm": {
+        "on_update": "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+        "on_trash": "advanced_bank_reconciliation.api.permission.invalidate_permission_cache",
+    },
+    "User Permission": {
+        "on_update": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+        "on_trash": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+    },
+    # Roles are saved with their User; Has Role covers rows saved on their own
+    "User": {
+        "on_update": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+        "on_trash": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+    },
+    "Has Role": {
+        "on_update": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+        "on_trash": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+    },
+    # A shared Bank Account or Bank Transaction is readable without a User Permission
+    "DocShare": {
+        "on_update": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+        "on_trash": "advanced_bank_reconciliation.api.permission.invalidate_user_permission_cache",
+    },
+    "Customer": {
+        "on_update": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.index_party",
+        "after_rename": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.rename_party",
+        "on_trash": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.remove_party",
+    },
+    "Supplier": {
+        "on_update": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.index_party",
+        "after_rename": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.rename_party",
+        "on_trash": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.remove_party",
+    },
+    "Employee": {
+        "on_update": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.index_party",
+        "after_rename": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.rename_party",
+        "on_trash": "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index.remove_party",
+    },
+    "Account": {
+        "on_update": "advanced_bank_reconciliation.advanced_bank_reconciliation.clearance.clear_bank_gl_account_cache",
+        "on_trash": "advanced_bank_reconciliation.advanced_bank_reconciliation.clearance.clear_bank_gl_account_cache",
+    },
+    "GL Entry": {
+        "after_insert": "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.bump_gl_version",
+        "on_trash": "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.bump_gl_version",
+    },
+    "Bank Transaction": {
+        "on_submit": [
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot.refresh_transaction_snapshot",
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.invalidate_transaction_balances",
+        ],
+        "on_update_after_submit": [
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot.refresh_transaction_snapshot",
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.invalidate_transaction_balances",
+        ],
+        "on_cancel": [
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot.refresh_transaction_snapshot",
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.invalidate_transaction_balances",
+        ],
+    },
+}
+
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"advanced_bank_reconciliation.tasks.all"
-# 	],
-# 	"daily": [
-# 		"advanced_bank_reconciliation.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"advanced_bank_reconciliation.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"advanced_bank_reconciliation.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"advanced_bank_reconciliation.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+    "all": [
+        "advanced_bank_reconciliation.advanced_bank_reconciliation.validation_queue.enqueue_pending_validations",
+    ],
+    "daily": [
+        "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot.reconcile_snapshots",
+    ],
+    "cron": {
+        "*/10 * * * *": [
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_reconciliation_job.abr_reconciliation_job.resume_interrupted_jobs",
+            "advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_validation_sweep.abr_validation_sweep.resume_interrupted_sweeps",
+        ],
+    },
+}
 
 # Testing
 # -------
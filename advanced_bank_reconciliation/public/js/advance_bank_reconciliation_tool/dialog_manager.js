@@ -1,5 +1,8 @@
 frappe.provide("nexwave.accounts.bank_reconciliation");
 
+const BULK_JOB_STORAGE_KEY = "abr_bulk_reconciliation_job";
+const BULK_PROGRESS_SNAPSHOT_METHOD = "advanced_bank_reconciliation.utils.progress.get_progress_snapshot";
+
 nexwave.accounts.bank_reconciliation.DialogManager = class DialogManager {
 	constructor(
 		company,
@@ -30,6 +33,7 @@ nexwave.accounts.bank_reconciliation.DialogManager = class DialogManager {
 		this.filter_by_reference_date = filter_by_reference_date;
 		this.from_reference_date = from_reference_date;
 		this.to_reference_date = to_reference_date;
+		this.resumeBulkProgressDialog();
 	}
 	show_dialog(bank_transaction_name, update_dt_cards) {
 		if (!this.dialog) {
@@ -1007,12 +1011,41 @@ nexwave.accounts.bank_reconciliation.DialogManager = class DialogManager {
 		}
 	}
 	
-	showBulkProgressDialog(jobId, totalInvoices) {
+	resumeBulkProgressDialog() {
+		// Reopen the progress dialog of a job started before the page was reloaded
+		const stored = localStorage.getItem(BULK_JOB_STORAGE_KEY);
+		if (!stored) {
+			return;
+		}
+		let job;
+		try {
+			job = JSON.parse(stored);
+		} catch (e) {
+			localStorage.removeItem(BULK_JOB_STORAGE_KEY);
+			return;
+		}
+		frappe.call({
+			method: BULK_PROGRESS_SNAPSHOT_METHOD,
+			args: { job_id: job.job_id },
+			callback: (r) => {
+				if (r.message && r.message.status === "running") {
+					this.showBulkProgressDialog(job.job_id, r.message.total, r.message);
+				} else {
+					localStorage.removeItem(BULK_JOB_STORAGE_KEY);
+				}
+			},
+			error: () => localStorage.removeItem(BULK_JOB_STORAGE_KEY),
+		});
+	}
+
+	showBulkProgressDialog(jobId, totalInvoices, snapshot) {
 		// Helper function to cleanup event subscriptions
 		const cleanupRealtimeEvents = () => {
 			frappe.realtime.off("bulk_reconciliation_progress");
 			frappe.realtime.off("bulk_reconciliation_complete");
 		};
+		localStorage.setItem(BULK_JOB_STORAGE_KEY, JSON.stringify({ job_id: jobId }));
+		let completed = false;
 
 		// Create progress dialog
 		const progressDialog = new frappe.ui.Dialog({
@@ -1061,62 +1094,97 @@ nexwave.accounts.bank_reconciliation.DialogManager = class DialogManager {
 
 		progressDialog.show();
 
-		// Subscribe to progress updates
-		frappe.realtime.on("bulk_reconciliation_progress", (data) => {
-			if (data.job_id === jobId) {
-				// Update progress bar
-				const progressBar = progressDialog.$body.find(".progress-bar");
-				const progressText = progressDialog.$body.find(".progress-text");
-				const currentCount = progressDialog.$body.find(".current-count");
-				const progressMessage = progressDialog.$body.find(".progress-message");
-
-				progressBar.css("width", data.percentage + "%");
-				progressBar.attr("aria-valuenow", data.percentage);
-				progressText.text(data.percentage + "%");
-				currentCount.text(data.current);
+		const renderProgress = (data) => {
+			const progressBar = progressDialog.$body.find(".progress-bar");
+			const progressText = progressDialog.$body.find(".progress-text");
+			const currentCount = progressDialog.$body.find(".current-count");
+			const progressMessage = progressDialog.$body.find(".progress-message");
+
+			progressBar.css("width", data.percentage + "%");
+			progressBar.attr("aria-valuenow", data.percentage);
+			progressText.text(data.percentage + "%");
+			currentCount.text(data.current);
+			if (data.message) {
 				progressMessage.text(data.message);
 			}
-		});
+		};
 
-		// Subscribe to completion notification
-		frappe.realtime.on("bulk_reconciliation_complete", (data) => {
-			if (data.job_id === jobId) {
-				progressDialog.hide();
+		const handleCompletion = (data) => {
+			if (completed) {
+				return;
+			}
+			completed = true;
+			localStorage.removeItem(BULK_JOB_STORAGE_KEY);
+			progressDialog.hide();
 
-				if (data.success) {
-					frappe.show_alert({
-						message: data.message,
-						indicator: "green"
-					}, 10);
-
-					// Refresh the data table
-					if (this.update_dt_cards) {
-						// Reload the bank transaction
-						frappe.call({
-							method: "frappe.client.get",
-							args: {
-								doctype: "Bank Transaction",
-								name: data.bank_transaction
-							},
-							callback: (r) => {
-								if (r.message) {
-									this.update_dt_cards(r.message);
-								}
+			if (data.success) {
+				frappe.show_alert({
+					message: data.message,
+					indicator: "green"
+				}, 10);
+
+				// Refresh the data table
+				if (this.update_dt_cards) {
+					// Reload the bank transaction
+					frappe.call({
+						method: "frappe.client.get",
+						args: {
+							doctype: "Bank Transaction",
+							name: data.bank_transaction
+						},
+						callback: (r) => {
+							if (r.message) {
+								this.update_dt_cards(r.message);
 							}
-						});
-					}
-				} else {
-					frappe.msgprint({
-						title: __("Bulk Reconciliation Failed"),
-						message: data.message,
-						indicator: "red"
+						}
 					});
 				}
+			} else {
+				frappe.msgprint({
+					title: __("Bulk Reconciliation Failed"),
+					message: data.message,
+					indicator: "red"
+				});
+			}
+
+			// Cleanup is now handled by the hidden.bs.modal event
+			// which fires automatically when progressDialog.hide() is called above
+		};
 
-				// Cleanup is now handled by the hidden.bs.modal event
-				// which fires automatically when progressDialog.hide() is called above
+		// Subscribe to progress updates
+		frappe.realtime.on("bulk_reconciliation_progress", (data) => {
+			if (data.job_id === jobId && !completed) {
+				renderProgress(data);
 			}
 		});
+
+		// Subscribe to completion notification
+		frappe.realtime.on("bulk_reconciliation_complete", (data) => {
+			if (data.job_id === jobId) {
+				handleCompletion(data);
+			}
+		});
+
+		// Catch up on anything published before we subscribed
+		const applySnapshot = (data) => {
+			if (!data || completed) {
+				return;
+			}
+			if (data.status === "running") {
+				renderProgress(data);
+			} else if (data.result) {
+				handleCompletion(data.result);
+			}
+		};
+		if (snapshot) {
+			applySnapshot(snapshot);
+		} else {
+			frappe.call({
+				method: BULK_PROGRESS_SNAPSHOT_METHOD,
+				args: { job_id: jobId },
+				callback: (r) => applySnapshot(r.message),
+			});
+		}
 	}
 	
 	// reconcileAllVouchers removed (handled by background job)
@@ -11,12 +11,32 @@ def after_install():
     create_abr_custom_fields()
     create_property_setters()
     sync_accounting_dimensions()
+    create_abr_indexes()
 
 
 def after_migrate():
     create_abr_custom_fields()
     create_property_setters()
     sync_accounting_dimensions()
+    create_abr_indexes()
+    ensure_party_search_index()
+    enqueue_snapshot_backfill()
+
+
+def enqueue_snapshot_backfill():
+    from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_cleared_balance_snapshot.abr_cleared_balance_snapshot import (
+        enqueue_snapshot_backfill,
+    )
+
+    enqueue_snapshot_backfill()
+
+
+def ensure_party_search_index():
+    from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.abr_party_search_index.abr_party_search_index import (
+        ensure_party_search_index,
+    )
+
+    ensure_party_search_index()
 
 
 def create_abr_custom_fields():
@@ -34,6 +54,44 @@ def create_abr_custom_fields():
         raise
 
 
+def create_abr_indexes():
+    """Indexes ABR queries rely on, on tables owned by other apps."""
+    # Keyset walks of an account's transactions in (date, name) order
+    frappe.db.add_index("Bank Transaction", ["bank_account", "date", "name"], "abr_bank_account_date_name")
+    # Party-sorted pages of the bank-rec transaction listing
+    frappe.db.add_index("Bank Transaction", ["bank_account", "party", "name"], "abr_bank_account_party_name")
+    # Change feed of the bank-rec listing, see get_transaction_changes
+    frappe.db.add_index("Bank Transaction", ["bank_account", "modified"], "abr_bank_account_modified")
+    # GL version probe of cached account balances, answered from the index alone
+    frappe.db.add_index("GL Entry", ["account", "modified"], "abr_account_modified")
+    create_transaction_search_index()
+
+
+def create_transaction_search_index():
+    """FULLTEXT index of the bank-rec transaction search, see
+    api.bank_rec._get_search_condition. InnoDB keeps it up to date."""
+    from advanced_bank_reconciliation.api.bank_rec import (
+        TRANSACTION_SEARCH_FIELDS,
+        TRANSACTION_SEARCH_INDEX,
+    )
+
+    indexed = {
+        row.Column_name
+        for row in frappe.db.sql(
+            "SHOW INDEX FROM `tabBank Transaction` WHERE Key_name = %s", (TRANSACTION_SEARCH_INDEX,), as_dict=True
+        )
+    }
+    if indexed != set(TRANSACTION_SEARCH_FIELDS):
+        # MATCH needs an index over exactly the searched columns
+        if indexed:
+            frappe.db.sql_ddl(f"ALTER TABLE `tabBank Transaction` DROP INDEX `{TRANSACTION_SEARCH_INDEX}`")
+        columns = ", ".join(f"`{field}`" for field in TRANSACTION_SEARCH_FIELDS)
+        frappe.db.sql_ddl(
+            f"ALTER TABLE `tabBank Transaction` ADD FULLTEXT INDEX `{TRANSACTION_SEARCH_INDEX}` ({columns})"
+        )
+    frappe.cache().delete_value("abr:transaction_search_index")
+
+
 def get_custom_fields():
     abr_bank_rule_field = {
         "fieldname": "abr_bank_rule",
@@ -52,6 +110,21 @@ def get_custom_fields():
                 "insert_after": "reference_no",
             }
         ],
+        "Bank Transaction": [
+            {
+                "fieldname": "abr_statement_balance",
+                "fieldtype": "Currency",
+                "label": "Statement Balance",
+                "options": "currency",
+                "read_only": 1,
+                "no_copy": 1,
+                "insert_after": "withdrawal",
+                "description": (
+                    "Running balance on the bank statement after this line, "
+                    "when the statement import mapped a balance column."
+                ),
+            },
+        ],
         "Bank Account": [
             {
                 "fieldname": "is_credit_card",
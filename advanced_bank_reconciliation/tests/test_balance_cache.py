@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import nowdate
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache import (
+	BALANCE_CACHE_PREFIX,
+	BALANCE_CACHE_TTL,
+	bump_gl_version,
+	get_cached_account_balance,
+	get_gl_version,
+	invalidate_account_balances,
+	probe_gl_entries,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	TEST_BANK_GL_ACCOUNT,
+	TEST_COMPANY,
+	create_test_purchase_invoice,
+	setup_abr_test_data,
+)
+
+BALANCE_SOURCE = (
+	"advanced_bank_reconciliation.advanced_bank_reconciliation.doctype."
+	"advance_bank_reconciliation_tool.advance_bank_reconciliation_tool.compute_account_balance"
+)
+VERSION = "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.get_gl_version"
+PROBE = "advanced_bank_reconciliation.advanced_bank_reconciliation.balance_cache.probe_gl_entries"
+
+
+class TestBalanceCache(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.bank_account = setup_abr_test_data(TEST_COMPANY)
+
+	def setUp(self):
+		invalidate_account_balances(self.bank_account)
+
+	def test_balance_is_served_from_cache_until_gl_version_changes(self):
+		with patch(BALANCE_SOURCE, return_value=125.0) as compute, patch(VERSION, return_value="1:a"):
+			self.assertEqual(get_cached_account_balance(self.bank_account, nowdate()), 125.0)
+			self.assertEqual(get_cached_account_balance(self.bank_account, nowdate()), 125.0)
+		self.assertEqual(compute.call_count, 1)
+
+		with patch(BALANCE_SOURCE, return_value=150.0) as compute, patch(VERSION, return_value="2:b"):
+			self.assertEqual(get_cached_account_balance(self.bank_account, nowdate()), 150.0)
+		self.assertEqual(compute.call_count, 1)
+
+	def test_invalidation_forces_recompute(self):
+		with patch(BALANCE_SOURCE, return_value=10.0) as compute, patch(VERSION, return_value="1:a"):
+			get_cached_account_balance(self.bank_account, nowdate())
+			invalidate_account_balances(self.bank_account)
+			get_cached_account_balance(self.bank_account, nowdate())
+		self.assertEqual(compute.call_count, 2)
+
+	def test_hit_within_probe_interval_skips_the_database(self):
+		with patch(BALANCE_SOURCE, return_value=20.0):
+			get_cached_account_balance(self.bank_account, nowdate())
+
+		with patch(BALANCE_SOURCE) as compute, patch(PROBE) as probe:
+			self.assertEqual(get_cached_account_balance(self.bank_account, nowdate()), 20.0)
+		compute.assert_not_called()
+		probe.assert_not_called()
+
+	def test_gl_entry_hook_bumps_the_version(self):
+		gl_account = frappe.db.get_value("Bank Account", self.bank_account, "account")
+		before = get_gl_version(gl_account)
+
+		bump_gl_version(frappe._dict(account=gl_account))
+
+		self.assertGreater(get_gl_version(gl_account), before)
+
+	def test_cached_balances_expire(self):
+		with patch(BALANCE_SOURCE, return_value=30.0):
+			get_cached_account_balance(self.bank_account, nowdate())
+
+		cache = frappe.cache()
+		ttl = cache.execute_command("TTL", cache.make_key(f"{BALANCE_CACHE_PREFIX}{self.bank_account}"))
+		self.assertTrue(0 < ttl <= BALANCE_CACHE_TTL)
+
+	def test_probe_sees_clearance_dates_set_outside_the_app(self):
+		pi = create_test_purchase_invoice(outstanding=40.0, is_paid=1, cash_bank_account=TEST_BANK_GL_ACCOUNT)
+		before = probe_gl_entries(TEST_BANK_GL_ACCOUNT)
+
+		# What ERPNext's Bank Clearance does: no GL Entry is touched
+		frappe.db.set_value("Purchase Invoice", pi.name, "clearance_date", nowdate())
+
+		self.assertNotEqual(probe_gl_entries(TEST_BANK_GL_ACCOUNT), before)
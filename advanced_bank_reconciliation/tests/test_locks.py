@@ -0,0 +1,92 @@
+import time
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from advanced_bank_reconciliation.utils.locks import (
+	LOCK_PREFIX,
+	ABRLock,
+	LockLostError,
+	LockNotAcquiredError,
+	get_lock_metrics,
+)
+
+
+class TestABRLock(FrappeTestCase):
+	def setUp(self):
+		self.name = f"abr_test:{frappe.generate_hash(length=8)}"
+
+	def tearDown(self):
+		frappe.cache().delete(frappe.cache().make_key(LOCK_PREFIX + self.name))
+
+	def test_lock_is_exclusive_until_released(self):
+		first = ABRLock(self.name)
+		second = ABRLock(self.name)
+
+		self.assertTrue(first.acquire(renew=False))
+		self.assertFalse(second.acquire(renew=False))
+
+		first.release()
+		self.assertTrue(second.acquire(renew=False))
+		second.release()
+
+	def test_context_manager_raises_when_busy(self):
+		with ABRLock(self.name):
+			with self.assertRaises(LockNotAcquiredError):
+				with ABRLock(self.name):
+					pass
+
+	def test_fence_increases_with_every_acquisition(self):
+		first = ABRLock(self.name)
+		first.acquire(renew=False)
+		first.release()
+		second = ABRLock(self.name)
+		second.acquire(renew=False)
+		second.release()
+
+		self.assertGreater(second.fence, first.fence)
+
+	def test_expired_holder_cannot_release_new_holder(self):
+		stale = ABRLock(self.name, ttl=1)
+		stale.acquire(renew=False)
+		time.sleep(1.2)
+
+		current = ABRLock(self.name)
+		self.assertTrue(current.acquire(renew=False))
+
+		self.assertFalse(stale.release())
+		self.assertTrue(current.is_held())
+		with self.assertRaises(LockLostError):
+			stale.assert_held()
+		current.release()
+
+	def test_renew_loop_keeps_lock_past_ttl(self):
+		lock = ABRLock(self.name, ttl=1)
+		lock.acquire()
+		try:
+			time.sleep(2.5)
+			self.assertTrue(lock.is_held())
+		finally:
+			lock.release()
+
+	def test_job_adopts_lock_by_token(self):
+		owner = ABRLock(self.name)
+		owner.acquire(renew=False)
+
+		self.assertFalse(ABRLock(self.name).adopt("0:wrong-token", renew=False))
+
+		job_lock = ABRLock(self.name)
+		self.assertTrue(job_lock.adopt(owner.token, renew=False))
+		self.assertEqual(job_lock.fence, owner.fence)
+		self.assertTrue(job_lock.release())
+
+	def test_busy_acquisitions_are_counted(self):
+		kind = self.name.split(":", 1)[0]
+		before = get_lock_metrics().get(kind, {}).get("busy", 0)
+
+		holder = ABRLock(self.name)
+		holder.acquire(renew=False)
+		ABRLock(self.name).acquire(renew=False)
+		holder.release()
+
+		self.assertEqual(get_lock_metrics()[kind]["busy"], before + 1)
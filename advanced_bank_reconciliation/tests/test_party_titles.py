@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from advanced_bank_reconciliation.advanced_bank_reconciliation.doctype.advance_bank_reconciliation_tool.tests.fixtures import (
+	ensure_customer,
+	ensure_supplier,
+)
+from advanced_bank_reconciliation.advanced_bank_reconciliation.party_titles import (
+	clear_party_titles,
+	get_party_titles,
+)
+
+GET_ALL = "advanced_bank_reconciliation.advanced_bank_reconciliation.party_titles.frappe.get_all"
+
+
+class TestPartyTitles(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.customer = ensure_customer()
+		cls.supplier = ensure_supplier()
+
+	def setUp(self):
+		clear_party_titles()
+
+	def test_titles_are_resolved_with_one_query_per_doctype(self):
+		references = [
+			("Customer", self.customer),
+			("Supplier", self.supplier),
+			("Customer", self.customer),
+			("Customer", "_ABR Missing Customer"),
+			(None, None),
+		]
+
+		with patch(GET_ALL, wraps=frappe.get_all) as get_all:
+			titles = get_party_titles(references)
+
+		self.assertEqual(get_all.call_count, 2)
+		self.assertEqual(
+			titles[("Customer", self.customer)],
+			frappe.db.get_value("Customer", self.customer, "customer_name"),
+		)
+		self.assertEqual(
+			titles[("Supplier", self.supplier)],
+			frappe.db.get_value("Supplier", self.supplier, "supplier_name"),
+		)
+		self.assertEqual(titles[("Customer", "_ABR Missing Customer")], "_ABR Missing Customer")
+		self.assertNotIn((None, None), titles)
+
+	def test_resolved_titles_are_served_from_cache(self):
+		get_party_titles([("Customer", self.customer)])
+
+		with patch(GET_ALL) as get_all:
+			titles = get_party_titles([("Customer", self.customer)])
+
+		get_all.assert_not_called()
+		self.assertTrue(titles[("Customer", self.customer)])
+
+	def test_expired_titles_are_resolved_again(self):
+		get_party_titles([("Customer", self.customer)])
+
+		with (
+			patch("advanced_bank_reconciliation.advanced_bank_reconciliation.party_titles.PARTY_TITLE_TTL", 0),
+			patch(GET_ALL, wraps=frappe.get_all) as get_all,
+		):
+			clear_party_titles()
+			get_party_titles([("Customer", self.customer)])
+			get_party_titles([("Customer", self.customer)])
+
+		self.assertEqual(get_all.call_count, 2)
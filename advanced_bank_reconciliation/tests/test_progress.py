@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from advanced_bank_reconciliation.utils.progress import (
+	COMPLETE_EVENT,
+	PROGRESS_EVENT,
+	SNAPSHOT_PREFIX,
+	ProgressReporter,
+	get_progress_snapshot,
+)
+
+
+class TestProgressReporter(FrappeTestCase):
+	def setUp(self):
+		self.job_id = frappe.generate_hash(length=10)
+
+	def tearDown(self):
+		frappe.cache().delete_value(SNAPSHOT_PREFIX + self.job_id)
+
+	def test_updates_are_coalesced_and_final_state_is_flushed(self):
+		reporter = ProgressReporter(self.job_id, 1000, max_per_second=1)
+
+		with patch("frappe.publish_realtime") as publish:
+			for current in range(1, 1001):
+				reporter.update(current, f"Processed {current}")
+			reporter.flush()
+
+		events = [call.kwargs["message"] for call in publish.call_args_list]
+		self.assertLessEqual(len(events), 3)
+		self.assertEqual(events[-1]["current"], 1000)
+		self.assertEqual(events[-1]["percentage"], 100)
+
+	def test_completion_is_never_rate_limited(self):
+		reporter = ProgressReporter(self.job_id, 10, max_per_second=1)
+
+		with patch("frappe.publish_realtime") as publish:
+			reporter.update(5)
+			reporter.complete(success=True, message="Done", processed=10)
+
+		self.assertEqual(
+			[call.kwargs["event"] for call in publish.call_args_list],
+			[PROGRESS_EVENT, COMPLETE_EVENT],
+		)
+
+	def test_snapshot_holds_latest_state(self):
+		reporter = ProgressReporter(self.job_id, 4, max_per_second=0)
+
+		with patch("frappe.publish_realtime"):
+			reporter.update(3, "Processed 3 of 4 invoices...")
+			self.assertEqual(get_progress_snapshot(self.job_id)["status"], "running")
+			self.assertEqual(get_progress_snapshot(self.job_id)["current"], 3)
+
+			reporter.complete(success=False, message="Failed")
+
+		snapshot = get_progress_snapshot(self.job_id)
+		self.assertEqual(snapshot["status"], "failed")
+		self.assertEqual(snapshot["result"]["message"], "Failed")
+
+	def test_snapshot_is_private_to_job_user(self):
+		reporter = ProgressReporter(self.job_id, 1, user="someone-else@example.com")
+		with patch("frappe.publish_realtime"):
+			reporter.update(1)
+
+		with patch("frappe.get_roles", return_value=["Accounts User"]):
+			with self.assertRaises(frappe.PermissionError):
+				get_progress_snapshot(self.job_id)
@@ -0,0 +1,242 @@
+"""Distributed locks for reconciliation work.
+
+A lock is a Redis key written with ``SET NX PX`` whose value is a token made
+of a fencing number (a site-wide counter incremented on every acquisition)
+and a random suffix. Renewal and release are Lua scripts that only act when
+the key still holds the caller's token, so a holder whose lock expired can
+never extend or delete a lock that has since been taken by someone else.
+
+Long-running holders start a renew loop that extends the key every third of
+its TTL. If the worker dies the loop dies with it and the lock expires after
+one TTL instead of staying stuck for the length of the job.
+"""
+
+import threading
+import time
+
+import frappe
+from frappe import _
+
+from advanced_bank_reconciliation.utils.logger import get_logger
+
+LOCK_PREFIX = "abr:lock:"
+FENCE_KEY = "abr:lock:fence"
+METRICS_KEY = "abr:lock:metrics"
+
+DEFAULT_TTL = 60
+POLL_INTERVAL = 0.2
+
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_MAX_SCRIPT = """
+if tonumber(ARGV[2]) > tonumber(redis.call('hget', KEYS[1], ARGV[1]) or '0') then
+    redis.call('hset', KEYS[1], ARGV[1], ARGV[2])
+end
+return 1
+"""
+
+
+class LockNotAcquiredError(frappe.ValidationError):
+    pass
+
+
+class LockLostError(frappe.ValidationError):
+    pass
+
+
+class ABRLock:
+    """A renewable, fenced Redis lock.
+
+    ``name`` is ``"<kind>:<resource>"``, e.g. ``"bank_transaction:ACC-BTN-0001"``;
+    the kind groups lock-wait metrics. Use as a context manager to acquire
+    with renewal, or call acquire/adopt/release directly when ownership is
+    handed from a request to a background job.
+    """
+
+    def __init__(self, name, ttl=DEFAULT_TTL):
+        self.name = name
+        self.kind = name.split(":", 1)[0]
+        self.ttl = ttl
+        self.token = None
+        self.fence = None
+        self.lost = False
+        self._redis = frappe.cache()
+        # Captured here because the renew thread has no frappe.local context
+        self._logger = get_logger()
+        self._key = self._redis.make_key(LOCK_PREFIX + name)
+        self._stop_renewing = None
+        self._renewer = None
+
+    def __enter__(self):
+        self.acquire(raise_if_busy=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def acquire(self, wait=0, renew=True, raise_if_busy=False):
+        """Try to take the lock, polling for up to `wait` seconds.
+
+        Returns True on success. When the lock stays busy, returns False or,
+        with raise_if_busy, raises LockNotAcquiredError.
+        """
+        started = time.monotonic()
+        fence = self._redis.incr(self._redis.make_key(FENCE_KEY))
+        token = f"{fence}:{frappe.generate_hash(length=12)}"
+        contended = False
+
+        while True:
+            if self._redis.set(self._key, token, nx=True, px=int(self.ttl * 1000)):
+                self.token = token
+                self.fence = fence
+                self.lost = False
+                _record_acquisition(self.kind, time.monotonic() - started, contended)
+                if renew:
+                    self.start_renewing()
+                return True
+
+            contended = True
+            if time.monotonic() - started >= wait:
+                _record_contention(self.kind, time.monotonic() - started)
+                if raise_if_busy:
+                    frappe.throw(
+                        _("{0} is locked by another process. Please try again shortly.").format(self.name),
+                        LockNotAcquiredError,
+                    )
+                return False
+            time.sleep(POLL_INTERVAL)
+
+    def adopt(self, token, renew=True):
+        """Take over a lock acquired elsewhere (e.g. by the request that
+        enqueued this job). Returns False when the token no longer owns it."""
+        if not token or not self._redis.eval(_RENEW_SCRIPT, 1, self._key, token, int(self.ttl * 1000)):
+            return False
+
+        self.token = token
+        self.fence = int(str(token).split(":", 1)[0])
+        self.lost = False
+        if renew:
+            self.start_renewing()
+        return True
+
+    def renew(self):
+        """Extend the lock by one TTL. Returns False once the lock is lost."""
+        if not self.token:
+            return False
+        if self._redis.eval(_RENEW_SCRIPT, 1, self._key, self.token, int(self.ttl * 1000)):
+            return True
+        self.lost = True
+        return False
+
+    def is_held(self):
+        if not self.token or self.lost:
+            return False
+        current = self._redis.get(self._key)
+        return current is not None and frappe.safe_decode(current) == self.token
+
+    def assert_held(self):
+        """Raise LockLostError unless this holder still owns the lock. Call
+        before committing work that must not overlap another holder."""
+        if not self.is_held():
+            frappe.throw(
+                _("Lost the lock on {0}; another process may be working on it.").format(self.name),
+                LockLostError,
+            )
+
+    def start_renewing(self):
+        if self._renewer:
+            return
+
+        self._stop_renewing = threading.Event()
+        self._renewer = threading.Thread(
+            target=self._renew_loop,
+            name=f"abr-lock-{self.name}",
+            daemon=True,
+        )
+        self._renewer.start()
+
+    def _renew_loop(self):
+        interval = max(self.ttl / 3, 1)
+        while not self._stop_renewing.wait(interval):
+            try:
+                if not self.renew():
+                    self._logger.warning("Lock %s expired before it could be renewed", self.name)
+                    return
+            except Exception:
+                self._logger.warning("Failed to renew lock %s", self.name, exc_info=True)
+
+    def stop_renewing(self):
+        if self._renewer:
+            self._stop_renewing.set()
+            self._renewer.join(timeout=5)
+            self._renewer = None
+
+    def release(self):
+        """Release the lock if this holder still owns it."""
+        self.stop_renewing()
+        if not self.token:
+            return False
+
+        released = bool(self._redis.eval(_RELEASE_SCRIPT, 1, self._key, self.token))
+        if not released:
+            self._logger.warning("Lock %s was no longer held by token %s at release", self.name, self.token)
+        self.token = None
+        return released
+
+
+def _record_acquisition(kind, waited, contended):
+    counters = {"acquired": 1}
+    if contended:
+        counters["waited"] = 1
+    _record_metrics(kind, waited, counters)
+
+
+def _record_contention(kind, waited):
+    _record_metrics(kind, waited, {"busy": 1})
+
+
+def _record_metrics(kind, waited, counters):
+    waited_ms = int(waited * 1000)
+    key = frappe.cache().make_key(METRICS_KEY)
+    pipe = frappe.cache().pipeline()
+    for counter, amount in counters.items():
+        pipe.hincrby(key, f"{kind}:{counter}", amount)
+    pipe.hincrby(key, f"{kind}:wait_ms", waited_ms)
+    pipe.eval(_MAX_SCRIPT, 1, key, f"{kind}:max_wait_ms", waited_ms)
+    pipe.execute()
+
+
+@frappe.whitelist()
+def get_lock_metrics():
+    """Lock-wait statistics per lock kind since the last reset."""
+    frappe.only_for("System Manager")
+
+    raw = frappe.cache().execute_command("HGETALL", frappe.cache().make_key(METRICS_KEY)) or {}
+    metrics = {}
+    for field, value in raw.items():
+        kind, counter = frappe.safe_decode(field).rsplit(":", 1)
+        metrics.setdefault(kind, {"acquired": 0, "waited": 0, "busy": 0, "wait_ms": 0, "max_wait_ms": 0})
+        metrics[kind][counter] = int(value)
+
+    for values in metrics.values():
+        attempts = values["acquired"] + values["busy"]
+        values["avg_wait_ms"] = round(values["wait_ms"] / attempts, 1) if attempts else 0
+    return metrics
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_lock_metrics():
+    frappe.only_for("System Manager")
+    frappe.cache().delete(frappe.cache().make_key(METRICS_KEY))
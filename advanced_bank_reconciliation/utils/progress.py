@@ -0,0 +1,122 @@
+"""Rate-limited realtime progress for background jobs.
+
+Workers report progress per item; a ProgressReporter forwards at most
+``max_per_second`` of those updates to the browser and always publishes the
+final state. The latest state is also kept in Redis so a page that was
+reloaded mid-job can pick up where the events left off.
+"""
+
+import time
+
+import frappe
+from frappe import _
+
+SNAPSHOT_PREFIX = "abr:progress:"
+SNAPSHOT_TTL = 24 * 60 * 60
+
+DEFAULT_MAX_PER_SECOND = 4
+
+PROGRESS_EVENT = "bulk_reconciliation_progress"
+COMPLETE_EVENT = "bulk_reconciliation_complete"
+
+
+class ProgressReporter:
+    """Coalesce progress updates for one job.
+
+    ``update`` may be called for every item; intermediate updates that arrive
+    faster than ``max_per_second`` are dropped, except for the latest one,
+    which is sent by the next publish or by ``flush``. ``complete`` always
+    publishes.
+    """
+
+    def __init__(
+        self,
+        job_id,
+        total,
+        user=None,
+        max_per_second=DEFAULT_MAX_PER_SECOND,
+        progress_event=PROGRESS_EVENT,
+        complete_event=COMPLETE_EVENT,
+    ):
+        self.job_id = job_id
+        self.total = total
+        self.user = user or frappe.session.user
+        self.min_interval = 1.0 / max_per_second if max_per_second else 0
+        self.progress_event = progress_event
+        self.complete_event = complete_event
+        self.current = 0
+        self.message = None
+        self.published = 0
+        self._last_publish = None
+        self._pending = False
+
+    def update(self, current, message=None, force=False):
+        """Record progress; publish it unless the last publish was too recent."""
+        self.current = current
+        if message is not None:
+            self.message = message
+        self._pending = True
+
+        now = time.monotonic()
+        if force or self._last_publish is None or now - self._last_publish >= self.min_interval:
+            self._publish_progress(now)
+
+    def flush(self):
+        """Publish the latest update if it was held back by the rate limit."""
+        if self._pending:
+            self._publish_progress(time.monotonic())
+
+    def complete(self, success, message, **extra):
+        """Publish the final state. Never rate limited."""
+        self._pending = False
+        payload = {"job_id": self.job_id, "success": success, "message": message, **extra}
+        self._save_snapshot(
+            {
+                **self._progress_payload(),
+                "status": "completed" if success else "failed",
+                "result": payload,
+            }
+        )
+        frappe.publish_realtime(event=self.complete_event, message=payload, user=self.user)
+        self.published += 1
+
+    def _publish_progress(self, now):
+        payload = self._progress_payload()
+        self._save_snapshot({**payload, "status": "running"})
+        frappe.publish_realtime(event=self.progress_event, message=payload, user=self.user)
+        self._last_publish = now
+        self._pending = False
+        self.published += 1
+
+    def _progress_payload(self):
+        return {
+            "job_id": self.job_id,
+            "current": self.current,
+            "total": self.total,
+            "percentage": int((self.current / self.total) * 100) if self.total > 0 else 0,
+            "message": self.message,
+        }
+
+    def _save_snapshot(self, snapshot):
+        snapshot["user"] = self.user
+        frappe.cache().set_value(
+            SNAPSHOT_PREFIX + str(self.job_id),
+            snapshot,
+            expires_in_sec=SNAPSHOT_TTL,
+        )
+
+
+def get_snapshot(job_id):
+    return frappe.cache().get_value(SNAPSHOT_PREFIX + str(job_id))
+
+
+@frappe.whitelist()
+def get_progress_snapshot(job_id):
+    """Latest progress of a background job, or None once it has expired."""
+    snapshot = get_snapshot(job_id)
+    if not snapshot:
+        return None
+
+    if snapshot.get("user") != frappe.session.user and "System Manager" not in frappe.get_roles():
+        frappe.throw(_("Not permitted to view the progress of this job"), frappe.PermissionError)
+    return snapshot
@@ -15,8 +15,11 @@ import type {
   PartySearchResult,
   StatementSummary,
   SubmitMatchResponse,
+  TransactionChanges,
   TransactionContext,
   BankTransaction,
+  TransactionListQuery,
+  TransactionPage,
   TransactionStatusFilter,
   UnreconcileResponse,
   UpdateTransactionResponse,
@@ -48,6 +51,72 @@ const matchedApiPath = "/api/method/advanced_bank_reconciliation.api.matched.";
 const partyCompanyApiPath =
   "/api/method/advanced_bank_reconciliation.api.party_company.";
 
+// Opt-in wire format of the list endpoints, decoded in call()
+const COLUMNAR_FORMAT = "columnar";
+
+interface ColumnarColumn {
+  name: string;
+  values?: unknown[];
+  dictionary?: string[];
+  codes?: Array<number | null>;
+}
+
+interface ColumnarTable {
+  format: typeof COLUMNAR_FORMAT;
+  length: number;
+  columns: ColumnarColumn[];
+}
+
+function isColumnarTable(value: unknown): value is ColumnarTable {
+  return (
+    typeof value === "object" &&
+    value !== null &&
+    (value as ColumnarTable).format === COLUMNAR_FORMAT &&
+    Array.isArray((value as ColumnarTable).columns)
+  );
+}
+
+function decodeColumnarTable(table: ColumnarTable) {
+  const rows = Array.from(
+    { length: table.length },
+    () => ({}) as Record<string, unknown>
+  );
+
+  for (const column of table.columns) {
+    const dictionary = column.dictionary;
+    const values = dictionary
+      ? (column.codes || []).map((code) => (code === null ? null : dictionary[code]))
+      : column.values || [];
+    // Dotted names are fields of a nested object, e.g. "transaction.name"
+    const [key, childKey] = column.name.split(".", 2);
+
+    rows.forEach((row, index) => {
+      if (childKey === undefined) {
+        row[key] = values[index];
+        return;
+      }
+      const child = (row[key] ||= {}) as Record<string, unknown>;
+      child[childKey] = values[index];
+    });
+  }
+
+  return rows;
+}
+
+// Decode columnar tables anywhere in a response object; arrays are data
+// and are not searched
+function decodeColumnar(value: unknown): unknown {
+  if (isColumnarTable(value)) {
+    return decodeColumnarTable(value);
+  }
+  if (typeof value !== "object" || value === null || Array.isArray(value)) {
+    return value;
+  }
+  return Object.fromEntries(
+    Object.entries(value).map(([key, child]) => [key, decodeColumnar(child)])
+  );
+}
+
 function getCsrfToken() {
   return window.csrf_token || "";
 }
@@ -116,7 +185,7 @@ async function call<T>(
     throw new Error(getServerMessage(payload));
   }
 
-  return payload.message as T;
+  return decodeColumnar(payload.message) as T;
 }
 
 export async function getDevBoot() {
@@ -162,7 +231,54 @@ export function getTransactions(params: {
   to_date?: string;
   status?: TransactionStatusFilter;
 }) {
-  return call<BankTransaction[]>(bankRecApiPath, "get_transactions", params);
+  return call<BankTransaction[]>(bankRecApiPath, "get_transactions", {
+    ...params,
+    format: COLUMNAR_FORMAT,
+  });
+}
+
+export function getTransactionPage(
+  params: {
+    bank_account: string;
+    from_date?: string;
+    to_date?: string;
+    status?: TransactionStatusFilter;
+    page_length: number;
+    cursor?: string | null;
+  } & Partial<TransactionListQuery>
+) {
+  return call<TransactionPage>(bankRecApiPath, "get_transactions", {
+    ...params,
+    format: COLUMNAR_FORMAT,
+    search: params.search?.trim() || undefined,
+    direction: params.direction || undefined,
+    party: params.party || undefined,
+    min_amount: params.min_amount || undefined,
+    max_amount: params.max_amount || undefined,
+  });
+}
+
+export function getTransactionChanges(
+  params: {
+    bank_account: string;
+    since_token: string;
+    from_date?: string;
+    to_date?: string;
+    status?: TransactionStatusFilter;
+  } & Partial<TransactionListQuery>
+) {
+  return call<TransactionChanges>(bankRecApiPath, "get_transaction_changes", {
+    bank_account: params.bank_account,
+    since_token: params.since_token,
+    from_date: params.from_date,
+    to_date: params.to_date,
+    status: params.status,
+    search: params.search?.trim() || undefined,
+    direction: params.direction || undefined,
+    party: params.party || undefined,
+    min_amount: params.min_amount || undefined,
+    max_amount: params.max_amount || undefined,
+  });
 }
 
 export function getTransactionContext(bank_transaction_name: string) {
@@ -207,7 +323,10 @@ export function getMatchCandidates(params: {
   document_types?: string[];
   exact_match?: boolean;
 }) {
-  return call<MatchCandidatesResponse>(matchingApiPath, "get_match_candidates", params);
+  return call<MatchCandidatesResponse>(matchingApiPath, "get_match_candidates", {
+    ...params,
+    format: COLUMNAR_FORMAT,
+  });
 }
 
 export function submitMatch(params: {
@@ -264,11 +383,16 @@ export function getCashCodingRows(params: {
   bank_account: string;
   from_date?: string;
   to_date?: string;
+  search?: string;
 }) {
   return call<CashCodingRowsResponse>(
     cashCodingApiPath,
     "get_cash_coding_rows",
-    params
+    {
+      ...params,
+      search: params.search?.trim() || undefined,
+      format: COLUMNAR_FORMAT,
+    }
   );
 }
 
@@ -286,7 +410,7 @@ export function getMatchedTransactions(params: {
   return call<MatchedTransactionsResponse>(
     matchedApiPath,
     "get_matched_transactions",
-    params
+    { ...params, format: COLUMNAR_FORMAT }
   );
 }
 
@@ -7,8 +7,9 @@ import {
   getCreateDefaults,
   getMatchCandidates,
   getStatementSummary,
+  getTransactionChanges,
   getTransactionContext,
-  getTransactions,
+  getTransactionPage,
   createVoucherDraftFromTransaction,
   createVoucherFromTransaction,
   submitMatch,
@@ -25,14 +26,63 @@ import type {
   MatchVoucherSelection,
   StatementSummary,
   TransactionContext,
+  TransactionListQuery,
   TransactionStatusFilter,
 } from "@/types/bankRec";
 import { monthStartIso, todayIso } from "@/utils/format";
 
+const TRANSACTION_PAGE_LENGTH = 100;
+
+function defaultTransactionQuery(): TransactionListQuery {
+  return {
+    sort_by: "date",
+    sort_order: "asc",
+    direction: "",
+    party: "",
+    search: "",
+    min_amount: "",
+    max_amount: "",
+  };
+}
+
+function transactionSortValue(
+  row: BankTransaction,
+  sortBy: TransactionListQuery["sort_by"]
+) {
+  if (sortBy === "amount") {
+    return row.amount;
+  }
+  if (sortBy === "party") {
+    return row.party || "";
+  }
+  return row.date || "";
+}
+
+// Client-side mirror of the server's (sort key, name) listing order
+function compareTransactions(
+  a: BankTransaction,
+  b: BankTransaction,
+  query: TransactionListQuery
+) {
+  const left = transactionSortValue(a, query.sort_by);
+  const right = transactionSortValue(b, query.sort_by);
+  let result =
+    typeof left === "number" && typeof right === "number"
+      ? left - right
+      : String(left).localeCompare(String(right), undefined, {
+          sensitivity: "base",
+        });
+  if (!result) {
+    result = a.name < b.name ? -1 : a.name > b.name ? 1 : 0;
+  }
+  return query.sort_order === "desc" ? -result : result;
+}
+
 interface LoadingState {
   boot: boolean;
   bankAccounts: boolean;
   transactions: boolean;
+  moreTransactions: boolean;
   summary: boolean;
   context: boolean;
   rules: boolean;
@@ -95,7 +145,11 @@ export const useBankRecStore = defineStore("bankRec", {
     toDate: todayIso(),
     statementBalance: "",
     transactionStatus: "unreconciled" as TransactionStatusFilter,
-    transactions: [] as BankTransaction[],
+    transactionsByName: {} as Record<string, BankTransaction>,
+    transactionOrder: [] as string[],
+    transactionQuery: defaultTransactionQuery(),
+    transactionsCursor: null as string | null,
+    transactionsChangeToken: null as string | null,
     selectedTransactionName: "",
     selectedContext: null as TransactionContext | null,
     matchCandidates: [] as MatchCandidate[],
@@ -106,6 +160,7 @@ export const useBankRecStore = defineStore("bankRec", {
       boot: false,
       bankAccounts: false,
       transactions: false,
+      moreTransactions: false,
       summary: false,
       context: false,
       rules: false,
@@ -149,10 +204,11 @@ export const useBankRecStore = defineStore("bankRec", {
         (account) => account.name === state.selectedBankAccount
       );
     },
+    transactions(state): BankTransaction[] {
+      return state.transactionOrder.map((name) => state.transactionsByName[name]);
+    },
     selectedTransaction(state): BankTransaction | undefined {
-      return state.transactions.find(
-        (transaction) => transaction.name === state.selectedTransactionName
-      );
+      return state.transactionsByName[state.selectedTransactionName];
     },
     activeCurrency(): string | undefined {
       return this.selectedBankAccountDoc?.currency;
@@ -301,16 +357,38 @@ export const useBankRecStore = defineStore("bankRec", {
       this.selectedBankAccount = "";
       this.selectedTransactionName = "";
       this.selectedContext = null;
-      this.transactions = [];
+      this.setTransactions([]);
       this.summary = null;
       this.matchCandidates = [];
       this.createDefaults = null;
       await this.loadBankAccounts();
     },
 
+    setTransactions(rows: BankTransaction[]) {
+      this.transactionsByName = Object.fromEntries(
+        rows.map((row) => [row.name, row])
+      );
+      this.transactionOrder = rows.map((row) => row.name);
+      this.transactionsCursor = null;
+      this.transactionsChangeToken = null;
+    },
+
+    ensureSelectedTransaction() {
+      if (
+        this.selectedTransactionName &&
+        !this.transactionsByName[this.selectedTransactionName]
+      ) {
+        this.selectedTransactionName = "";
+        this.selectedContext = null;
+      }
+      if (!this.selectedTransactionName && this.transactionOrder.length) {
+        this.selectedTransactionName = this.transactionOrder[0];
+      }
+    },
+
     async loadTransactions() {
       if (!this.selectedBankAccount) {
-        this.transactions = [];
+        this.setTransactions([]);
         this.selectedTransactionName = "";
         return;
       }
@@ -321,28 +399,23 @@ export const useBankRecStore = defineStore("bankRec", {
       this.errors.transactions = "";
 
       try {
-        const rows = await getTransactions({
+        const page = await getTransactionPage({
           bank_account: this.selectedBankAccount,
           from_date: this.fromDate,
           to_date: this.toDate,
           status: this.transactionStatus,
+          page_length: TRANSACTION_PAGE_LENGTH,
+          ...this.transactionQuery,
         });
 
         if (this.requestIds.transactions !== requestId) {
           return;
         }
 
-        this.transactions = rows;
-        if (
-          this.selectedTransactionName &&
-          !rows.some((row) => row.name === this.selectedTransactionName)
-        ) {
-          this.selectedTransactionName = "";
-          this.selectedContext = null;
-        }
-        if (!this.selectedTransactionName && rows.length) {
-          this.selectedTransactionName = rows[0].name;
-        }
+        this.setTransactions(page.transactions);
+        this.transactionsCursor = page.next_cursor;
+        this.transactionsChangeToken = page.change_token;
+        this.ensureSelectedTransaction();
       } catch (error) {
         if (this.requestIds.transactions !== requestId) {
           return;
@@ -358,6 +431,127 @@ export const useBankRecStore = defineStore("bankRec", {
       }
     },
 
+    async loadMoreTransactions() {
+      if (!this.selectedBankAccount || !this.transactionsCursor) {
+        return;
+      }
+
+      const requestId = this.requestIds.transactions;
+      this.loading.moreTransactions = true;
+
+      try {
+        const page = await getTransactionPage({
+          bank_account: this.selectedBankAccount,
+          from_date: this.fromDate,
+          to_date: this.toDate,
+          status: this.transactionStatus,
+          page_length: TRANSACTION_PAGE_LENGTH,
+          cursor: this.transactionsCursor,
+          ...this.transactionQuery,
+        });
+
+        // A reload started meanwhile owns the list now
+        if (this.requestIds.transactions !== requestId) {
+          return;
+        }
+
+        for (const row of page.transactions) {
+          if (!this.transactionsByName[row.name]) {
+            this.transactionOrder.push(row.name);
+          }
+          this.transactionsByName[row.name] = row;
+        }
+        this.transactionsCursor = page.next_cursor;
+      } catch (error) {
+        this.errors.transactions =
+          error instanceof Error
+            ? error.message
+            : "Unable to load bank transactions.";
+      } finally {
+        this.loading.moreTransactions = false;
+      }
+    },
+
+    // Merge the rows changed since the last load or sync into the listing.
+    // New rows past the last loaded one are left to loadMoreTransactions.
+    async syncTransactions() {
+      if (!this.selectedBankAccount || !this.transactionsChangeToken) {
+        await this.loadTransactions();
+        return;
+      }
+
+      const requestId = this.requestIds.transactions;
+
+      try {
+        const changes = await getTransactionChanges({
+          bank_account: this.selectedBankAccount,
+          since_token: this.transactionsChangeToken,
+          from_date: this.fromDate,
+          to_date: this.toDate,
+          status: this.transactionStatus,
+          ...this.transactionQuery,
+        });
+
+        // A reload started meanwhile owns the list now
+        if (this.requestIds.transactions !== requestId) {
+          return;
+        }
+        if (changes.reset) {
+          await this.loadTransactions();
+          return;
+        }
+
+        const removed = new Set(changes.removed);
+        for (const name of removed) {
+          delete this.transactionsByName[name];
+        }
+
+        const lastName = this.transactionOrder[this.transactionOrder.length - 1];
+        const last = this.transactionsCursor
+          ? this.transactionsByName[lastName]
+          : undefined;
+        const inserted: string[] = [];
+        for (const row of changes.changed) {
+          if (
+            !this.transactionsByName[row.name] &&
+            last &&
+            compareTransactions(row, last, this.transactionQuery) > 0
+          ) {
+            continue;
+          }
+          if (!this.transactionsByName[row.name]) {
+            inserted.push(row.name);
+          }
+          this.transactionsByName[row.name] = row;
+        }
+
+        const order = this.transactionOrder
+          .filter((name) => !removed.has(name) && this.transactionsByName[name])
+          .concat(inserted);
+        if (inserted.length) {
+          order.sort((a, b) =>
+            compareTransactions(
+              this.transactionsByName[a],
+              this.transactionsByName[b],
+              this.transactionQuery
+            )
+          );
+        }
+        this.transactionOrder = order;
+        this.transactionsChangeToken = changes.change_token;
+        this.ensureSelectedTransaction();
+      } catch (error) {
+        if (this.requestIds.transactions === requestId) {
+          await this.loadTransactions();
+        }
+      }
+    },
+
+    async setTransactionQuery(query: Partial<TransactionListQuery>) {
+      this.transactionQuery = { ...this.transactionQuery, ...query };
+      await this.loadTransactions();
+    },
+
     async loadSummary() {
       if (!this.selectedBankAccount) {
         this.summary = null;
@@ -494,7 +688,7 @@ export const useBankRecStore = defineStore("bankRec", {
     },
 
     async refreshReconcile() {
-      await Promise.all([this.loadTransactions(), this.loadSummary()]);
+      await Promise.all([this.syncTransactions(), this.loadSummary()]);
       await this.loadSelectedContext();
     },
 
@@ -588,11 +782,9 @@ export const useBankRecStore = defineStore("bankRec", {
           ...payload,
         });
 
-        const index = this.transactions.findIndex(
-          (row) => row.name === response.transaction.name
-        );
-        if (index >= 0) {
-          this.transactions[index] = response.transaction;
+        if (this.transactionsByName[response.transaction.name]) {
+          this.transactionsByName[response.transaction.name] =
+            response.transaction;
         }
         if (this.selectedContext?.transaction.name === response.transaction.name) {
           this.selectedContext.transaction = response.transaction;
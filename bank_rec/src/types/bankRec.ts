@@ -85,6 +85,12 @@ export interface StatementSummary {
   unreconciled_count: number;
   cleared_balance: number;
   unreconciled_total: number;
+  transaction_count: number;
+  status_counts: Record<string, number>;
+  unreconciled_by_direction: Record<
+    "deposit" | "withdrawal" | "unknown",
+    { count: number; total: number }
+  >;
 }
 
 export interface BankRule {
@@ -109,6 +115,31 @@ export interface PartySearchResult {
 
 export type TransactionStatusFilter = "unreconciled" | "reconciled" | "all";
 
+export type TransactionSortKey = "date" | "amount" | "party";
+
+export interface TransactionListQuery {
+  sort_by: TransactionSortKey;
+  sort_order: "asc" | "desc";
+  direction: "" | "deposit" | "withdrawal";
+  party: "" | "set" | "unset";
+  search: string;
+  min_amount: string;
+  max_amount: string;
+}
+
+export interface TransactionPage {
+  transactions: BankTransaction[];
+  next_cursor: string | null;
+  change_token: string;
+}
+
+export interface TransactionChanges {
+  changed: BankTransaction[];
+  removed: string[];
+  change_token: string;
+  reset: boolean;
+}
+
 export type MatchConfidence = "high" | "medium" | "low";
 
 export interface MatchCandidate {